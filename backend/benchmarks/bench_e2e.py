@@ -0,0 +1,374 @@
+# backend/benchmarks/bench_e2e.py
+# End-to-end throughput benchmark: boots the main.py app in-process (httpx ASGI transport)
+# and drives realistic request mixes against it.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_e2e                                  # in-memory Mongo (mongomock-motor)
+#   python -m benchmarks.bench_e2e --mongo-url mongodb://localhost:27017 --output run.json
+#   python -m benchmarks.bench_e2e --scenarios login_storm library_listing --books 10000
+#
+# Stand-ins:
+# - MongoDB: a local server via --mongo-url (database "learn_ease_bench", whatever
+#   DATABASE_NAME says; dropped afterwards unless --keep-data), or mongomock-motor.
+# - Gemini: an in-process fake GenerativeModel with --gemini-latency-ms latency and canned
+#   responses. google-generativeai's async client only talks gRPC, so no HTTP fake is used.
+# - T5: SUMMARIZATION_MODEL_NAME, default a tiny public checkpoint (--t5-model).
+#
+# Prints one JSON object per scenario (requests, errors, throughput, p50/p95/p99 latency,
+# RSS); --output also writes the whole run, including its parameters, for comparison.
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+SCENARIOS = ("login_storm", "library_listing", "pdf_upload", "ai_burst")
+BENCH_DATABASE_NAME = "learn_ease_bench" # Never the app's DATABASE_NAME: the run drops it
+PASSWORD = "Bench-Password-123!"
+
+# --- Environment (must be set before the app modules are imported) ---
+def _configure_environment(args: argparse.Namespace, data_dir: str) -> None:
+    os.environ.setdefault("LOG_LEVEL", "ERROR") # Keep request logs out of the results on stdout
+    os.environ["DATABASE_NAME"] = BENCH_DATABASE_NAME # Overrides the shell and .env
+    os.environ["LOCAL_BOOK_UPLOAD_DIR_SUBPATH"] = os.path.join(data_dir, "books")
+    os.environ["LOCAL_EXTRACTED_TEXT_DIR_SUBPATH"] = os.path.join(data_dir, "extracted-texts")
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["SUMMARIZATION_MODEL_NAME"] = args.t5_model
+    os.environ.setdefault("GOOGLE_API_KEY", "bench-fake-key")
+    os.environ.setdefault("LLM_PROVIDERS", "gemini") # Measure the Gemini path; no hedging to a local model
+    # Every benchmark request comes from one client address; the limiter would reject the storm
+    for name in ("LOGIN_RATE_LIMIT_PER_IP_BURST", "LOGIN_RATE_LIMIT_PER_IP_PER_MINUTE",
+                 "LOGIN_RATE_LIMIT_PER_EMAIL_BURST", "LOGIN_RATE_LIMIT_PER_EMAIL_PER_MINUTE"):
+        os.environ[name] = "1000000"
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = "1000000"
+    if args.mongo_url:
+        os.environ["DATABASE_URL"] = args.mongo_url
+
+# --- Gemini stand-in ---
+class _FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = [text]
+        self.prompt_feedback = None
+
+class _FakeGeminiStream:
+    def __init__(self, text: str, latency_seconds: float, pieces: int = 8):
+        self._chunks = [text[i:i + -(-len(text) // pieces)] for i in range(0, len(text), -(-len(text) // pieces))]
+        self._delay = latency_seconds / len(self._chunks)
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay)
+            yield _FakeGeminiResponse(chunk)
+
+class FakeGenerativeModel:
+    """Replaces genai.GenerativeModel: waits latency_seconds, then returns a canned answer (streamed over latency_seconds with stream=True)."""
+    latency_seconds = 0.5
+
+    def __init__(self, model_name: str, *args, **kwargs):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt: str, generation_config=None, stream: bool = False, **kwargs):
+        if "flashcards" in prompt:
+            cards = [{"front": f"Term {i}", "back": f"Definition of term {i}."} for i in range(5)]
+            text = json.dumps(cards)
+        else:
+            text = "## Topic\n### Detail\n- Point one\n- Point two\n\n## Conclusion\n- Summary"
+        if stream:
+            return _FakeGeminiStream(text, self.latency_seconds)
+        await asyncio.sleep(self.latency_seconds)
+        return _FakeGeminiResponse(text)
+
+# --- Measurement helpers ---
+def _rss_mb() -> Dict[str, Optional[float]]:
+    current_kb = None
+    try:
+        with open("/proc/self/status") as status_f:
+            for line in status_f:
+                if line.startswith("VmRSS:"):
+                    current_kb = int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB on Linux, bytes on macOS
+    peak_kb = peak / 1024 if sys.platform == "darwin" else peak
+    return {
+        "rss_mb": round(current_kb / 1024, 1) if current_kb is not None else None,
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+    }
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+async def _drive(name: str, make_request: Callable[[int], Awaitable[int]], total: int, concurrency: int, **params) -> dict:
+    """Runs make_request(i) for i in range(total) with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status_code = str(await make_request(i))
+            except Exception as e:
+                status_code = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(total)])
+    wall_seconds = time.perf_counter() - wall_start
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    errors = sum(count for code, count in statuses.items() if not code.startswith("2"))
+    return {
+        "scenario": name,
+        "params": {"requests": total, "concurrency": concurrency, **params},
+        "requests": total,
+        "errors": errors,
+        "statuses": statuses,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(total / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies_ms), 2) if latencies_ms else None,
+            "p50": round(_percentile(latencies_ms, 0.50), 2) if latencies_ms else None,
+            "p95": round(_percentile(latencies_ms, 0.95), 2) if latencies_ms else None,
+            "p99": round(_percentile(latencies_ms, 0.99), 2) if latencies_ms else None,
+            "max": round(latencies_ms[-1], 2) if latencies_ms else None,
+        },
+        **_rss_mb(),
+    }
+
+# --- Fixtures ---
+async def _signup_and_login(client, email: str) -> str:
+    response = await client.post("/auth/signup", json={
+        "email": email, "password": PASSWORD, "firstname": "Bench", "lastname": "User",
+        "age": 21, "university_name": "Bench University",
+    })
+    if response.status_code not in (200, 201, 400): # 400: already exists (kept data)
+        raise RuntimeError(f"Signup failed for {email}: {response.status_code} {response.text}")
+    response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+def _build_pdf(pages: int) -> bytes:
+    import fitz
+    doc = fitz.open()
+    paragraph = ("Benchmark page text about cells, energy and the structure of matter. " * 12).strip()
+    for page_number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Chapter {page_number // 20 + 1}\n\n{paragraph}\n\n{paragraph}", fontsize=10)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+async def _seed_books(db, user_id, count: int) -> None:
+    from models.book_schemas import BookInDB
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    batch = []
+    for i in range(count):
+        batch.append(BookInDB(
+            title=f"Seeded book {i}",
+            original_filename=f"seeded_{i}.pdf",
+            content_type="application/pdf",
+            file_size_bytes=1024,
+            user_id=user_id,
+            stored_filename=f"seeded_{i}.pdf",
+            file_path_local="/nonexistent/seeded.pdf",
+            extracted_text_path_local="/nonexistent/seeded.txt",
+            upload_date=now - timedelta(seconds=i),
+            status="ready",
+        ).model_dump(by_alias=True, exclude_none=True))
+        if len(batch) == 1000:
+            await db["books"].insert_many(batch)
+            batch = []
+    if batch:
+        await db["books"].insert_many(batch)
+
+# --- Scenarios ---
+async def scenario_login_storm(client, db, args) -> List[dict]:
+    emails = [f"bench-login-{i}@example.com" for i in range(args.login_users)]
+    for email in emails:
+        await _signup_and_login(client, email)
+
+    async def login(i: int) -> int:
+        response = await client.post("/auth/login", json={"email": emails[i % len(emails)], "password": PASSWORD})
+        return response.status_code
+
+    return [await _drive("login_storm", login, args.logins, args.concurrency,
+                         users=len(emails), bcrypt_rounds=args.bcrypt_rounds)]
+
+async def scenario_library_listing(client, db, args) -> List[dict]:
+    from services import user_service
+    email = "bench-library@example.com"
+    token = await _signup_and_login(client, email)
+    headers = {"Authorization": f"Bearer {token}"}
+    user = await user_service.get_user_by_email(db, email)
+    if await db["books"].count_documents({"user_id": user.id}) < args.books:
+        await _seed_books(db, user.id, args.books)
+
+    async def list_full(i: int) -> int:
+        response = await client.get("/books", headers=headers)
+        return response.status_code
+
+    async def walk_pages(i: int) -> int:
+        # One "request" is the first page plus following cursors for --page-walk pages
+        params = {"limit": args.page_size}
+        for _ in range(args.page_walk):
+            response = await client.get("/books/page", headers=headers, params=params)
+            if response.status_code != 200 or not response.json()["next_cursor"]:
+                return response.status_code
+            params["cursor"] = response.json()["next_cursor"]
+        return response.status_code
+
+    return [
+        await _drive("library_listing_full", list_full, args.listing_requests, args.concurrency, books=args.books),
+        await _drive("library_listing_paged", walk_pages, args.listing_requests, args.concurrency,
+                     books=args.books, page_size=args.page_size, pages_per_request=args.page_walk),
+    ]
+
+async def scenario_pdf_upload(client, db, args) -> List[dict]:
+    token = await _signup_and_login(client, "bench-upload@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    pdf_bytes = _build_pdf(args.pdf_pages)
+
+    async def upload(i: int) -> int:
+        response = await client.post("/books/upload", headers=headers,
+                                     files={"file": (f"bench_{i}.pdf", pdf_bytes, "application/pdf")})
+        return response.status_code
+
+    return [await _drive("pdf_upload", upload, args.uploads, args.upload_concurrency,
+                         pdf_pages=args.pdf_pages, pdf_bytes=len(pdf_bytes))]
+
+async def scenario_ai_burst(client, db, args) -> List[dict]:
+    from services import ai_service
+    token = await _signup_and_login(client, "bench-ai@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    text = "Photosynthesis converts light energy into chemical energy stored in glucose. " * 40
+
+    async def flashcards(i: int) -> int:
+        response = await client.post("/ai/generate-flashcards", headers=headers, json={"text_to_generate_from": text})
+        return response.status_code
+
+    async def study_notes(i: int) -> int:
+        response = await client.post("/ai/generate-study-notes", headers=headers, json={"text_to_generate_notes_from": text})
+        return response.status_code
+
+    async def summarize(i: int) -> int:
+        response = await client.post("/ai/summarize-text", headers=headers, json={"text_to_summarize": text})
+        return response.status_code
+
+    gemini_params = {"gemini_latency_ms": args.gemini_latency_ms}
+    results = [
+        await _drive("ai_burst_flashcards", flashcards, args.ai_requests, args.concurrency, **gemini_params),
+        await _drive("ai_burst_study_notes", study_notes, args.ai_requests, args.concurrency, **gemini_params),
+    ]
+    if ai_service.is_summarization_available():
+        results.append(await _drive("ai_burst_summarize", summarize, args.summarize_requests, args.concurrency, t5_model=args.t5_model))
+    else:
+        print(json.dumps({"scenario": "ai_burst_summarize", "skipped": f"model {args.t5_model} not loaded"}), file=sys.stderr)
+    return results
+
+SCENARIO_FUNCTIONS = {
+    "login_storm": scenario_login_storm,
+    "library_listing": scenario_library_listing,
+    "pdf_upload": scenario_pdf_upload,
+    "ai_burst": scenario_ai_burst,
+}
+
+# --- Runner ---
+async def _run(args: argparse.Namespace) -> List[dict]:
+    import httpx
+    app_module = importlib.import_module("main")
+    from core import db as core_db
+    from core.indexes import ensure_indexes
+    from services import llm_providers
+
+    FakeGenerativeModel.latency_seconds = args.gemini_latency_ms / 1000.0
+    llm_providers.genai.GenerativeModel = FakeGenerativeModel
+
+    if args.mongo_url:
+        await core_db.connect_to_mongo()
+    else:
+        from mongomock_motor import AsyncMongoMockClient # In-memory fake; pip install mongomock-motor
+        mock_client = AsyncMongoMockClient()
+        core_db.db_manager.client = mock_client
+        core_db.db_manager.db = mock_client[BENCH_DATABASE_NAME]
+        core_db.db_manager.listing_db = core_db.db_manager.db
+    db = core_db.db_manager.db
+    await ensure_indexes(db)
+
+    results: List[dict] = []
+    transport = httpx.ASGITransport(app=app_module.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in args.scenarios:
+                for result in await SCENARIO_FUNCTIONS[scenario](client, db, args):
+                    print(json.dumps(result), flush=True)
+                    results.append(result)
+    finally:
+        if args.mongo_url:
+            if not args.keep_data:
+                await core_db.db_manager.client.drop_database(BENCH_DATABASE_NAME)
+            await core_db.close_mongo_connection()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end backend throughput benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--mongo-url", default=None, help="Local MongoDB to use instead of the in-memory fake")
+    parser.add_argument("--keep-data", action="store_true", help="Do not drop the benchmark database afterwards")
+    parser.add_argument("--output", default=None, help="Also write the full run (params + results) to this JSON file")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--login-users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--listing-requests", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--page-walk", type=int, default=5, help="Pages followed per paged-listing request")
+    parser.add_argument("--pdf-pages", type=int, default=300)
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--upload-concurrency", type=int, default=8)
+    parser.add_argument("--gemini-latency-ms", type=float, default=800)
+    parser.add_argument("--ai-requests", type=int, default=100)
+    parser.add_argument("--summarize-requests", type=int, default=20)
+    parser.add_argument("--t5-model", default="google/t5-efficient-tiny")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="learn-ease-bench-")
+    _configure_environment(args, data_dir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # backend/
+    started_at = datetime.now(timezone.utc).isoformat()
+    try:
+        results = asyncio.run(_run(args))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_f:
+            json.dump({
+                "started_at": started_at,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "mongo": "local" if args.mongo_url else "mongomock",
+                "args": {k: v for k, v in vars(args).items() if k not in ("output", "mongo_url")},
+                "results": results,
+            }, output_f, indent=2)
+
+if __name__ == "__main__":
+    main()
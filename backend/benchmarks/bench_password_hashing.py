@@ -0,0 +1,57 @@
+# backend/benchmarks/bench_password_hashing.py
+# Measures login-path bcrypt throughput through core.security's password pool.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_password_hashing --rounds 10 12 --workers 1 2 4 --requests 64
+#
+# Prints one JSON object per (rounds, workers) combination with verifies/sec overall
+# and per worker thread, which approximates login throughput per core.
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+PASSWORD = "Bench-Password-123!"
+
+async def _run_verifies(context: CryptContext, hashed: str, workers: int, requests: int) -> float:
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt-bench") as executor:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            loop.run_in_executor(executor, context.verify, PASSWORD, hashed) for _ in range(requests)
+        ])
+        return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="bcrypt verify throughput per worker thread")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 2])
+    parser.add_argument("--requests", type=int, default=32, help="Concurrent verifies per measurement")
+    args = parser.parse_args()
+
+    for rounds in args.rounds:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        hashed = context.hash(PASSWORD)
+        hash_start = time.perf_counter()
+        context.hash(PASSWORD)
+        hash_ms = (time.perf_counter() - hash_start) * 1000
+        for workers in args.workers:
+            elapsed = asyncio.run(_run_verifies(context, hashed, workers, args.requests))
+            throughput = args.requests / elapsed
+            print(json.dumps({
+                "rounds": rounds,
+                "workers": workers,
+                "requests": args.requests,
+                "hash_ms": round(hash_ms, 2),
+                "verifies_per_sec": round(throughput, 2),
+                "verifies_per_sec_per_worker": round(throughput / workers, 2),
+                "mean_latency_ms": round(elapsed / args.requests * 1000 * workers, 2),
+            }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# backend/benchmarks/bench_summarization.py
+# Summarization (T5 generate) tuning matrix: sweeps input length, beam width, padding
+# strategy, batch size, torch threads and backend, then recommends a profile.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_summarization --profile-out summarization_profile.json
+#   python -m benchmarks.bench_summarization --input-tokens 128 512 --beams 1 4 --batch-sizes 1 4 8 \
+#       --threads 1 4 8 --backends eager int8 --json rows.jsonl
+#
+# Prints a table with one row per combination: latency per batch and per item, generated
+# tokens/sec and RSS. The recommended profile is the fastest per-item configuration at
+# --recommend-beams and the longest input length, optionally within --latency-budget-ms.
+# Start the service with SUMMARIZATION_PROFILE_PATH=<profile-out> to use it.
+# peak_rss_mb is process-wide and never goes down; pass a single --backends value per run
+# for clean per-backend memory numbers.
+
+import argparse
+import itertools
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import torch
+from transformers import T5ForConditionalGeneration, T5Tokenizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # backend/
+from services.summarization_profile import (
+    DEFAULT_SUMMARIZATION_SETTINGS, BACKENDS, PADDING_STRATEGIES, apply_backend, generation_kwargs
+)
+
+SOURCE_PARAGRAPH = (
+    "Photosynthesis is the process by which green plants, algae and some bacteria convert light energy "
+    "into chemical energy. During the light-dependent reactions, chlorophyll absorbs photons and water is "
+    "split, releasing oxygen. The energy is stored as ATP and NADPH, which power the Calvin cycle, where "
+    "carbon dioxide is fixed into three-carbon sugars that the plant later assembles into glucose. "
+)
+
+def _rss_mb() -> dict:
+    current_kb = None
+    try:
+        with open("/proc/self/status") as status_f:
+            for line in status_f:
+                if line.startswith("VmRSS:"):
+                    current_kb = int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB on Linux, bytes on macOS
+    peak_kb = peak / 1024 if sys.platform == "darwin" else peak
+    return {
+        "rss_mb": round(current_kb / 1024, 1) if current_kb is not None else None,
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+    }
+
+def _build_texts(tokenizer, input_tokens: int, batch_size: int) -> List[str]:
+    """Batch items get lengths spread between half and all of input_tokens, so padding strategy matters."""
+    source_ids = tokenizer.encode(SOURCE_PARAGRAPH * (input_tokens // 40 + 2), add_special_tokens=False)
+    texts = []
+    for i in range(batch_size):
+        length = input_tokens if batch_size == 1 else input_tokens // 2 + (input_tokens // 2) * i // (batch_size - 1)
+        texts.append(tokenizer.decode(source_ids[:max(8, length - 4)])) # Leave room for the prefix and </s>
+    return texts
+
+def _measure(model, tokenizer, device, texts: List[str], padding: str, max_input_tokens: int, num_beams: int, repeats: int) -> dict:
+    inputs = tokenizer(
+        ["summarize: " + text for text in texts],
+        return_tensors="pt", max_length=max_input_tokens, truncation=True, padding=padding
+    ).to(device)
+    kwargs = generation_kwargs(DEFAULT_SUMMARIZATION_SETTINGS, num_beams=num_beams)
+
+    with torch.inference_mode():
+        model.generate(**inputs, **kwargs) # Warm-up
+        durations = []
+        generated_tokens = 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output_ids = model.generate(**inputs, **kwargs)
+            durations.append(time.perf_counter() - start)
+            generated_tokens = int(output_ids.ne(tokenizer.pad_token_id).sum())
+
+    batch_seconds = statistics.median(durations)
+    return {
+        "padded_input_tokens": int(inputs["input_ids"].shape[-1]),
+        "real_input_tokens": int(inputs["attention_mask"].sum()),
+        "batch_ms": round(batch_seconds * 1000, 2),
+        "per_item_ms": round(batch_seconds * 1000 / len(texts), 2),
+        "output_tokens_per_sec": round(generated_tokens / batch_seconds, 1),
+        **_rss_mb(),
+    }
+
+def _load_model(model_name: str, backend: str, device):
+    model = T5ForConditionalGeneration.from_pretrained(model_name)
+    model.eval()
+    model = apply_backend(model, backend, device)
+    return model.to(device)
+
+def _recommend(rows: List[dict], beams: int, latency_budget_ms: Optional[float]) -> Optional[dict]:
+    longest = max(row["input_tokens"] for row in rows)
+    candidates = [row for row in rows if row["num_beams"] == beams and row["input_tokens"] == longest]
+    if latency_budget_ms is not None:
+        candidates = [row for row in candidates if row["batch_ms"] <= latency_budget_ms]
+    return min(candidates, key=lambda row: row["per_item_ms"]) if candidates else None
+
+def _print_table(rows: List[dict]) -> None:
+    columns = ["backend", "threads", "input_tokens", "num_beams", "padding", "batch_size",
+               "batch_ms", "per_item_ms", "output_tokens_per_sec", "rss_mb", "peak_rss_mb"]
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).rjust(widths[column]) for column in columns))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="T5 summarization latency/throughput tuning matrix")
+    parser.add_argument("--model", default=os.getenv("SUMMARIZATION_MODEL_NAME", "mohsinnyz/Booksum-Edu"))
+    parser.add_argument("--input-tokens", type=int, nargs="+", default=[128, 512])
+    parser.add_argument("--beams", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--padding", nargs="+", choices=PADDING_STRATEGIES, default=list(PADDING_STRATEGIES))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["eager", "int8"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--recommend-beams", type=int, default=DEFAULT_SUMMARIZATION_SETTINGS["num_beams"])
+    parser.add_argument("--latency-budget-ms", type=float, default=None, help="Max batch latency for the recommendation")
+    parser.add_argument("--json", default=None, help="Also write every row as JSON lines to this file")
+    parser.add_argument("--profile-out", default=None, help="Write the recommended profile here")
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = T5Tokenizer.from_pretrained(args.model)
+    max_input_tokens = max(max(args.input_tokens), DEFAULT_SUMMARIZATION_SETTINGS["max_input_tokens"])
+
+    rows = []
+    for backend in args.backends:
+        model = _load_model(args.model, backend, device)
+        for threads, input_tokens, num_beams, padding, batch_size in itertools.product(
+            args.threads, args.input_tokens, args.beams, args.padding, args.batch_sizes
+        ):
+            torch.set_num_threads(threads)
+            texts = _build_texts(tokenizer, input_tokens, batch_size)
+            row = {
+                "backend": backend, "threads": threads, "input_tokens": input_tokens, "num_beams": num_beams,
+                "padding": padding, "batch_size": batch_size,
+                **_measure(model, tokenizer, device, texts, padding, max_input_tokens, num_beams, args.repeats),
+            }
+            print(json.dumps(row), file=sys.stderr, flush=True) # Progress
+            rows.append(row)
+        del model
+
+    _print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_f:
+            json_f.writelines(json.dumps(row) + "\n" for row in rows)
+
+    best = _recommend(rows, args.recommend_beams, args.latency_budget_ms)
+    if best is None:
+        print("\nNo configuration matched --recommend-beams / --latency-budget-ms; no profile written.")
+        return
+    profile = {
+        "source": "benchmarks/bench_summarization.py",
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "model": args.model,
+        "device": device.type,
+        "settings": {
+            **DEFAULT_SUMMARIZATION_SETTINGS,
+            "padding": best["padding"],
+            "num_beams": best["num_beams"],
+            "torch_threads": best["threads"],
+            "backend": best["backend"],
+            "max_batch_size": best["batch_size"],
+        },
+        "measured": {k: best[k] for k in ("input_tokens", "batch_ms", "per_item_ms", "output_tokens_per_sec", "peak_rss_mb")},
+    }
+    print("\nRecommended profile:")
+    print(json.dumps(profile, indent=2))
+    if args.profile_out:
+        with open(args.profile_out, "w", encoding="utf-8") as profile_f:
+            json.dump(profile, profile_f, indent=2)
+
+if __name__ == "__main__":
+    main()
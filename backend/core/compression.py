@@ -0,0 +1,198 @@
+# backend/core/compression.py
+# Response compression: gzip or brotli (when the "brotli" package is installed), picked
+# from the request's Accept-Encoding, for text-like responses above a size threshold.
+# Streamed responses are compressed chunk by chunk with a flush after each, so e.g.
+# NDJSON events still reach the client as they are produced.
+#
+# Large static payloads (the extracted text of a book) are compressed once when they
+# are stored (write_precompressed_variants) and served with their Content-Encoding;
+# the middleware passes responses that already have one through untouched.
+
+import gzip
+import os
+import uuid
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from core.http_cache import with_encoding
+from core.metrics import HTTP_COMPRESSED_BYTES
+
+try:
+    import brotli
+except ImportError: # Optional; gzip only
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml", "image/svg+xml")
+_STREAM_TYPES = ("application/x-ndjson", "text/event-stream") # Parts are sent on as they come, never held back
+_PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+_PRECOMPRESS_GZIP_LEVEL = 9 # Paid once per upload, so the highest settings
+_PRECOMPRESS_BROTLI_QUALITY = 11
+
+def available_encodings() -> List[str]:
+    """Supported encodings, preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def choose_encoding(accept_encoding: str, encodings: Optional[List[str]] = None) -> Optional[str]:
+    """The first of `encodings` (default: available_encodings()) the client accepts, or None for identity."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in encodings if encodings is not None else available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.lower().startswith(_COMPRESSIBLE_TYPES)
+
+def _is_stream(content_type: str) -> bool:
+    return content_type.lower().startswith(_STREAM_TYPES)
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31) # 31: gzip container
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+        return self._zlib.compress(data) + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        return self._brotli.finish() if self._brotli is not None else self._zlib.flush()
+
+class CompressionMiddleware:
+    """Compresses text-like responses of at least minimum_size bytes for clients that accept it."""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        buffered: List[bytes] = [] # Body parts held while the size is not yet known
+        buffered_size = 0
+        compressor = None # Set once the response is known to be compressed
+        passthrough = False
+        original_bytes = sent_bytes = 0
+
+        async def send_compressed(message):
+            nonlocal start_message, buffered_size, compressor, passthrough, original_bytes, sent_bytes
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message # Held until the body shows the size
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "")
+                compressible = _is_compressible(content_type) and "content-encoding" not in headers
+                if not compressible:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                # Responses often arrive in several parts (e.g. through BaseHTTPMiddleware), so
+                # wait for minimum_size bytes or the end; streams are decided on the first part
+                buffered.append(body)
+                buffered_size += len(body)
+                if more_body and buffered_size < self.minimum_size and not _is_stream(content_type):
+                    return
+                body = b"".join(buffered)
+                buffered.clear()
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers: # A strong ETag names exact bytes
+                    headers["ETag"] = with_encoding(headers["etag"], encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    compressed = compressor.compress(body, flush=False) + compressor.finish()
+                    headers["Content-Length"] = str(len(compressed))
+                    HTTP_COMPRESSED_BYTES.labels(encoding, "original").inc(len(body))
+                    HTTP_COMPRESSED_BYTES.labels(encoding, "sent").inc(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send(start_message)
+
+            # Streamed: flush each part so the client is not kept waiting on buffered data
+            chunk = compressor.compress(body, flush=more_body) + (b"" if more_body else compressor.finish())
+            original_bytes += len(body)
+            sent_bytes += len(chunk)
+            if not more_body:
+                HTTP_COMPRESSED_BYTES.labels(encoding, "original").inc(original_bytes)
+                HTTP_COMPRESSED_BYTES.labels(encoding, "sent").inc(sent_bytes)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+# --- Precompressed files ---
+def precompressed_paths(path: str) -> List[str]:
+    """Every precompressed variant a stored file may have (whether or not it exists)."""
+    return [path + suffix for suffix in _PRECOMPRESSED_SUFFIXES.values()]
+
+def write_precompressed_variants(path: str) -> List[str]:
+    """
+    Writes a compressed copy of the file next to it for every available encoding
+    (<path>.gz, and <path>.br with brotli installed). Blocking; returns the written paths.
+    """
+    with open(path, "rb") as source_f:
+        data = source_f.read()
+    written = []
+    for encoding in available_encodings():
+        variant_path = path + _PRECOMPRESSED_SUFFIXES[encoding]
+        if encoding == "br":
+            compressed = brotli.compress(data, quality=_PRECOMPRESS_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(data, compresslevel=_PRECOMPRESS_GZIP_LEVEL, mtime=0)
+        tmp_path = f"{variant_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp" # Concurrent writers don't share it
+        with open(tmp_path, "wb") as variant_f:
+            variant_f.write(compressed)
+        os.replace(tmp_path, variant_path) # Never serve a half-written variant
+        written.append(variant_path)
+    return written
+
+def find_precompressed_variant(path: str, accept_encoding: str) -> Optional[Tuple[str, str]]:
+    """(variant path, encoding) of an existing variant the client accepts, preferred encoding first."""
+    existing = [encoding for encoding, suffix in _PRECOMPRESSED_SUFFIXES.items() if os.path.exists(path + suffix)]
+    encoding = choose_encoding(accept_encoding, existing)
+    return (path + _PRECOMPRESSED_SUFFIXES[encoding], encoding) if encoding else None
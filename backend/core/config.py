@@ -1,33 +1,152 @@
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\core\config.py
+import logging
 import os
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
 load_dotenv(dotenv_path) 
 
 
 MONGO_DATABASE_URL = os.getenv("DATABASE_URL")
-DATABASE_NAME = "learn_ease_db" # Or load from env if preferred
+DATABASE_NAME = os.getenv("DATABASE_NAME", "learn_ease_db")
+
+# --- MongoDB client tuning (pymongo defaults apply where noted) ---
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0")) or None # 0 = never close idle connections
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0")) or None # 0 = wait for a free connection indefinitely
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")) or None # 0 = no socket timeout
+# Comma-separated wire compressors in preference order, e.g. "zstd,snappy,zlib".
+# zstd and snappy need the zstandard / python-snappy packages; empty disables compression.
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_RETRY_READS = os.getenv("MONGO_RETRY_READS", "true").lower() == "true"
+MONGO_RETRY_WRITES = os.getenv("MONGO_RETRY_WRITES", "true").lower() == "true"
+# Read preference for read-only listing endpoints; "secondaryPreferred" offloads them
+# from the primary at the cost of possibly missing a write made moments earlier.
+# Listings answered with library-version ETags read from the primary regardless
+# (see get_versioned_listing_database in core/db.py).
+MONGO_LISTING_READ_PREFERENCE = os.getenv("MONGO_LISTING_READ_PREFERENCE", "primary")
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "fallback_string")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+# bcrypt cost factor for new hashes. Existing hashes with a different cost are
+# transparently re-hashed on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dedicated to bcrypt; bounds how many hashes run at once (bcrypt releases the GIL)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Password operations allowed to be running or queued at once; beyond this the auth
+# endpoints fail fast with 429 instead of piling up CPU work
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+
+# Token buckets for the auth endpoints: burst size and sustained attempts per minute
+LOGIN_RATE_LIMIT_PER_IP_BURST = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP_BURST", "20"))
+LOGIN_RATE_LIMIT_PER_IP_PER_MINUTE = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP_PER_MINUTE", "10"))
+LOGIN_RATE_LIMIT_PER_EMAIL_BURST = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL_BURST", "5"))
+LOGIN_RATE_LIMIT_PER_EMAIL_PER_MINUTE = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL_PER_MINUTE", "5"))
+RATE_LIMIT_MAX_TRACKED_KEYS = int(os.getenv("RATE_LIMIT_MAX_TRACKED_KEYS", "100000"))
+
+# Authenticated-user cache used by get_current_user
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Comma-separated list of user emails allowed to use the /admin endpoints
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
 
 PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 BOOK_SUBPATH_FROM_ROOT = os.getenv("LOCAL_BOOK_UPLOAD_DIR_SUBPATH", "user-book-files/books")
 TEXT_SUBPATH_FROM_ROOT = os.getenv("LOCAL_EXTRACTED_TEXT_DIR_SUBPATH", "user-book-files/extracted-texts")
 
+BOOKS_PAGE_SIZE_DEFAULT = int(os.getenv("BOOKS_PAGE_SIZE_DEFAULT", "50"))
+BOOKS_PAGE_SIZE_MAX = int(os.getenv("BOOKS_PAGE_SIZE_MAX", "200"))
+
+# Keep a book_count on each category document, updated on every book write, so the
+# category listing with counts does not have to aggregate over books.
+# Categories without a count yet are filled in at startup; after turning it off and on again,
+# repair the counts with POST /admin/category-counts/recompute.
+CATEGORY_BOOK_COUNTERS_ENABLED = os.getenv("CATEGORY_BOOK_COUNTERS_ENABLED", "false").lower() == "true"
+
 LOCAL_BOOK_UPLOAD_DIR = os.path.join(PROJECT_ROOT_DIR, BOOK_SUBPATH_FROM_ROOT)
 LOCAL_EXTRACTED_TEXT_DIR = os.path.join(PROJECT_ROOT_DIR, TEXT_SUBPATH_FROM_ROOT)
 
+SUMMARIZATION_MODEL_NAME = os.getenv("SUMMARIZATION_MODEL_NAME", "mohsinnyz/Booksum-Edu") # Any T5 checkpoint, e.g. a tiny one for benchmarks
+# Optional tuning profile from benchmarks/bench_summarization.py (threads, backend, padding, beams...)
+SUMMARIZATION_PROFILE_PATH = os.getenv("SUMMARIZATION_PROFILE_PATH")
+# "load": every worker loads its own copy of the T5 weights (from_pretrained).
+# "mmap": workers memory-map one exported copy, shared through the page cache (see services/model_weights.py).
+SUMMARIZATION_WEIGHTS_MODE = os.getenv("SUMMARIZATION_WEIGHTS_MODE", "load")
+SUMMARIZATION_SHARED_WEIGHTS_DIR = os.path.join(PROJECT_ROOT_DIR, os.getenv("SUMMARIZATION_SHARED_WEIGHTS_SUBPATH", "model-cache"))
+
+# "in_process": each API worker loads the T5 model itself.
+# "server": summaries are sent over IPC to `python -m services.inference_server`, which owns the model.
+SUMMARIZATION_INFERENCE_MODE = os.getenv("SUMMARIZATION_INFERENCE_MODE", "in_process")
+INFERENCE_SERVER_ADDRESS = os.getenv("INFERENCE_SERVER_ADDRESS", "unix:/tmp/learn-ease-inference.sock") # or "tcp:127.0.0.1:8765"
+INFERENCE_SERVER_WORKERS = int(os.getenv("INFERENCE_SERVER_WORKERS", "1")) # Model-owning processes behind the server
+INFERENCE_REQUEST_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_REQUEST_TIMEOUT_SECONDS", "120"))
+INFERENCE_WORKER_HEARTBEAT_SECONDS = float(os.getenv("INFERENCE_WORKER_HEARTBEAT_SECONDS", "5"))
+INFERENCE_WORKER_HEARTBEAT_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_WORKER_HEARTBEAT_TIMEOUT_SECONDS", "30")) # Hung worker is killed and respawned
+INFERENCE_WORKER_START_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_WORKER_START_TIMEOUT_SECONDS", "600")) # Includes model download/load
+
+# --- Long selections: study notes / flashcards are generated per chunk and merged ---
+AI_CHUNKING_THRESHOLD_CHARS = int(os.getenv("AI_CHUNKING_THRESHOLD_CHARS", "12000")) # Longer selections are chunked; 0 disables
+AI_CHUNK_MAX_CHARS = int(os.getenv("AI_CHUNK_MAX_CHARS", "6000"))
+AI_CHUNK_MAX_CONCURRENCY = int(os.getenv("AI_CHUNK_MAX_CONCURRENCY", "4")) # Concurrent Gemini calls per request
+
+# --- LLM providers for study notes / flashcards (see services/llm_providers.py) ---
+LLM_PROVIDERS = [name.strip() for name in os.getenv("LLM_PROVIDERS", "gemini,local").split(",") if name.strip()] # Preference order; "fake" for tests
+LLM_LATENCY_SLO_MS = float(os.getenv("LLM_LATENCY_SLO_MS", "8000")) # Providers whose p90 exceeds this are passed over
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "true").lower() == "true"
+LLM_HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "0")) or LLM_LATENCY_SLO_MS # Upper bound; hedges earlier at the provider's p90
+LLM_PROVIDER_TIMEOUT_SECONDS = float(os.getenv("LLM_PROVIDER_TIMEOUT_SECONDS", "30"))
+LLM_STATS_WINDOW = int(os.getenv("LLM_STATS_WINDOW", "50")) # Recent calls per provider used for latency / error rate
+LLM_MIN_SAMPLES = int(os.getenv("LLM_MIN_SAMPLES", "5")) # Before this many calls a provider is assumed healthy
+LLM_MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+LLM_COOLDOWN_SECONDS = float(os.getenv("LLM_COOLDOWN_SECONDS", "30")) # After rate limiting or an error-rate trip
+LOCAL_LLM_URL = os.getenv("LOCAL_LLM_URL", "") # Ollama-compatible server, e.g. http://127.0.0.1:11434; empty disables "local"
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "llama3.1:8b")
+
+# --- HTTP caching (see core/http_cache.py) ---
+HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "86400")) # For a book's PDF and extracted text, which never change
+
+# --- Response compression (see core/compression.py) ---
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE_BYTES = int(os.getenv("COMPRESSION_MIN_SIZE_BYTES", "1024")) # Smaller bodies are sent as is
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")) # Per request; stored text uses 11
+
+# --- Logging (see core/logging_config.py) ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "") # Per-module overrides, e.g. "services.ai_service=DEBUG,core.db=WARNING"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json") # "json" or "text"
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0")) # Fraction of DEBUG records kept
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500")) # Cap for model outputs / documents in logs
+
+# --- Metrics (see core/metrics.py) ---
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true" # Exposes GET /metrics (Prometheus text format)
+
+# --- Request profiling (see core/profiling.py) ---
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.0")) # Fraction of requests profiled at random
+# Requests sending this value in X-Profile-Token are always profiled; empty disables the header
+PROFILING_HEADER_TOKEN = os.getenv("PROFILING_HEADER_TOKEN", "")
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5")) # Stack sampling interval
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "50")) # Oldest profiles are deleted beyond this
+PROFILING_DIR = os.path.join(PROJECT_ROOT_DIR, os.getenv("PROFILING_DIR_SUBPATH", "profiles"))
+
 # Basic check
 if not MONGO_DATABASE_URL:
-    print("⚠️ WARNING: DATABASE_URL not found in .env file")
+    logger.warning("DATABASE_URL not found in .env file")
     
 # print(f"DEBUG: Dotenv path used: {dotenv_path}")
 # print(f"DEBUG: Project Root Dir: {PROJECT_ROOT_DIR}")
 # print(f"DEBUG: Book Subpath from .env/default: {BOOK_SUBPATH_FROM_ROOT}")
 # print(f"DEBUG: Text Subpath from .env/default: {TEXT_SUBPATH_FROM_ROOT}")
 # print(f"DEBUG: Final Local Book Upload Dir: {LOCAL_BOOK_UPLOAD_DIR}")
-# print(f"DEBUG: Final Local Extracted Text Dir: {LOCAL_EXTRACTED_TEXT_DIR}")
\ No newline at end of file
+# print(f"DEBUG: Final Local Extracted Text Dir: {LOCAL_EXTRACTED_TEXT_DIR}")
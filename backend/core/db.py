@@ -1,31 +1,152 @@
 # backend/core/db.py
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\core\db.py
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from .config import MONGO_DATABASE_URL, DATABASE_NAME
+from pymongo import monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from .config import (
+    MONGO_DATABASE_URL, DATABASE_NAME,
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_COMPRESSORS, MONGO_RETRY_READS, MONGO_RETRY_WRITES, MONGO_LISTING_READ_PREFERENCE
+)
+from .metrics import MONGO_COMMAND_DURATION
+
+logger = logging.getLogger(__name__)
+
+# --- Request-scoped query counting ---
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.commands: list[str] = []
+
+# Holds the counter of the request (or track_queries block) currently running.
+# Motor copies the caller's context into its executor threads, so the listener
+# below sees the same (mutable) counter the request created.
+_current_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("current_query_counter", default=None)
+
+@contextmanager
+def track_queries() -> Iterator[QueryCounter]:
+    """Counts the Mongo commands issued inside the block, e.g. to assert round trips per endpoint."""
+    counter = QueryCounter()
+    token = _current_query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_query_counter.reset(token)
+
+class _QueryCountListener(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        counter = _current_query_counter.get()
+        if counter is not None:
+            counter.count += 1
+            counter.commands.append(event.command_name)
+
+    # Driver-measured round trip, exported as mongo_command_duration_seconds
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "success").observe(event.duration_micros / 1_000_000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "failure").observe(event.duration_micros / 1_000_000)
+
+# --- Connection pool (CMAP) statistics ---
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Per-server connection pool counters, fed by pymongo's CMAP events from its own threads."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict = defaultdict(lambda: defaultdict(int))
+
+    def _bump(self, address, **deltas) -> None:
+        key = f"{address[0]}:{address[1]}"
+        with self._lock:
+            for name, delta in deltas.items():
+                self._stats[key][name] += delta
+
+    def pool_created(self, event): self._bump(event.address, pools_created=1)
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): self._bump(event.address, pool_clears=1)
+    def pool_closed(self, event): pass
+    def connection_created(self, event): self._bump(event.address, open_connections=1, connections_created=1)
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): self._bump(event.address, open_connections=-1)
+    def connection_check_out_started(self, event): self._bump(event.address, waiting_checkouts=1)
+    def connection_check_out_failed(self, event): self._bump(event.address, waiting_checkouts=-1, checkout_failures=1)
+    def connection_checked_out(self, event): self._bump(event.address, waiting_checkouts=-1, checked_out=1, checkouts=1)
+    def connection_checked_in(self, event): self._bump(event.address, checked_out=-1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {address: dict(counters) for address, counters in self._stats.items()}
+
+pool_stats_listener = PoolStatsListener()
 
 class Database:
     client: AsyncIOMotorClient | None = None
     db: AsyncIOMotorDatabase | None = None
+    listing_db: AsyncIOMotorDatabase | None = None # Same database with MONGO_LISTING_READ_PREFERENCE
 
 db_manager = Database()
 
+def _client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "retryReads": MONGO_RETRY_READS,
+        "retryWrites": MONGO_RETRY_WRITES,
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
 async def connect_to_mongo():
-    print(f"Attempting to connect to MongoDB at {MONGO_DATABASE_URL[:15]}...")
     if MONGO_DATABASE_URL:
-        db_manager.client = AsyncIOMotorClient(MONGO_DATABASE_URL)
+        logger.info("Attempting to connect to MongoDB at %s...", MONGO_DATABASE_URL[:15])
+        db_manager.client = AsyncIOMotorClient(
+            MONGO_DATABASE_URL,
+            event_listeners=[_QueryCountListener(), pool_stats_listener],
+            **_client_options()
+        )
         db_manager.db = db_manager.client[DATABASE_NAME]
-        print(f"Successfully connected to MongoDB database: {DATABASE_NAME}")
+        listing_read_preference = make_read_preference(read_pref_mode_from_name(MONGO_LISTING_READ_PREFERENCE), None)
+        db_manager.listing_db = db_manager.db.with_options(read_preference=listing_read_preference)
+        logger.info("Successfully connected to MongoDB database: %s", DATABASE_NAME)
     else:
-        print("MongoDB connection string not configured.")
+        logger.error("MongoDB connection string not configured.")
 
 async def close_mongo_connection():
     if db_manager.client:
         db_manager.client.close()
-        print("MongoDB connection closed.")
+        logger.info("MongoDB connection closed.")
 
+# The client is created once by the app lifespan; requests never (re)connect lazily.
 async def get_database() -> AsyncIOMotorDatabase:
     if db_manager.db is None:
-        await connect_to_mongo()
-        if db_manager.db is None:
-             raise RuntimeError("Database is not connected")
+        raise RuntimeError("Database is not connected")
+    return db_manager.db
+
+async def get_listing_database() -> AsyncIOMotorDatabase:
+    """For read-only listing endpoints that may be served by a secondary."""
+    if db_manager.listing_db is None:
+        raise RuntimeError("Database is not connected")
+    return db_manager.listing_db
+
+async def get_versioned_listing_database() -> AsyncIOMotorDatabase:
+    """
+    For listings tagged with the library version (core/http_cache.py). The version is read
+    from the primary; a lagging secondary could return data older than it, which the client
+    would then keep as current until the next change. So these listings use the primary
+    whatever MONGO_LISTING_READ_PREFERENCE says; unchanged polls cost it one point read.
+    """
+    if db_manager.db is None:
+        raise RuntimeError("Database is not connected")
     return db_manager.db
\ No newline at end of file
@@ -0,0 +1,59 @@
+# backend/core/http_cache.py
+# Conditional GET: strong ETags and Cache-Control for responses the frontend polls.
+# Library reads (book and category listings, book details) are tagged with the user's
+# library version (services/library_version.py), which changes whenever one of their
+# books or categories does, so an unchanged poll is answered with 304 before any
+# listing query runs. Book files are tagged with content hashes.
+#
+# When the compression middleware compresses a response it appends the encoding to its
+# ETag ("<tag>-gzip"), as the bytes differ; etag_matches() accepts either form.
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+from core.config import HTTP_CACHE_MAX_AGE_SECONDS
+from core.metrics import HTTP_CONDITIONAL_REQUESTS
+
+# Polled data: the browser may keep it, but revalidates it on every use
+CACHE_CONTROL_REVALIDATE = "private, no-cache"
+# Content that never changes under its URL (a book's PDF)
+CACHE_CONTROL_IMMUTABLE = f"private, max-age={HTTP_CACHE_MAX_AGE_SECONDS}"
+
+_ENCODING_SUFFIXES = ("-gzip", "-br")
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+def with_encoding(etag: str, encoding: Optional[str]) -> str:
+    """The ETag of the `encoding`-compressed representation."""
+    if not encoding or not etag.startswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def _strip_encoding(etag: str) -> str:
+    for suffix in _ENCODING_SUFFIXES:
+        if etag.endswith(suffix + '"'):
+            return etag[:-len(suffix) - 1] + '"'
+    return etag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    matched = False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or _strip_encoding(candidate.removeprefix("W/")) == etag:
+            matched = True
+            break
+    HTTP_CONDITIONAL_REQUESTS.labels("not_modified" if matched else "modified").inc()
+    return matched
+
+def not_modified(etag: str, cache_control: str = CACHE_CONTROL_REVALIDATE) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = CACHE_CONTROL_REVALIDATE) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,125 @@
+# backend/core/indexes.py
+# Index registry for the collections the app queries on hot paths.
+# ensure_indexes() is called from the main.py lifespan; create_indexes is a no-op
+# for indexes that already exist with the same spec, so it is safe on every startup.
+
+import logging
+from typing import Dict, List, Set, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.collation import Collation, CollationStrength
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Case-insensitive comparison for category names. Queries on name must pass the
+# same collation to be able to use the unique index below.
+CATEGORY_NAME_COLLATION = Collation(locale="en", strength=CollationStrength.SECONDARY)
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "users": [
+        # users.find_one({"email"}) on login, signup and every authenticated request
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "books": [
+        # books.find({"user_id"}).sort([("upload_date", -1), ("_id", -1)]) for the keyset-paginated listing
+        IndexModel(
+            [("user_id", ASCENDING), ("upload_date", DESCENDING), ("_id", DESCENDING)],
+            name="user_id_upload_date_id",
+        ),
+        # Same listing filtered by category on the server
+        IndexModel(
+            [("user_id", ASCENDING), ("category_id", ASCENDING), ("upload_date", DESCENDING), ("_id", DESCENDING)],
+            name="user_id_category_id_upload_date_id",
+        ),
+    ],
+    "categories": [
+        # categories.find({"user_id"}).sort("created_at", 1) for the category listing
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING)], name="user_id_created_at"),
+        # Case-insensitive unique names per user; category_service relies on the
+        # DuplicateKeyError from this index instead of looking names up first
+        # (unless it could not be built, see index_available)
+        IndexModel(
+            [("user_id", ASCENDING), ("name", ASCENDING)],
+            name="user_id_name_ci_unique",
+            unique=True,
+            collation=CATEGORY_NAME_COLLATION,
+        ),
+    ],
+    "artifacts": [
+        # artifact_service lookup before generating; also serves the per-book listing
+        # (user_id, book_id prefix, sorted by span). Unique so concurrent first visits of a
+        # selection upsert into one document.
+        IndexModel(
+            [
+                ("user_id", ASCENDING), ("book_id", ASCENDING),
+                ("span.start_page", ASCENDING), ("span.end_page", ASCENDING),
+                ("span.start_offset", ASCENDING), ("span.end_offset", ASCENDING),
+                ("kind", ASCENDING), ("params_key", ASCENDING), ("source_sha256", ASCENDING),
+            ],
+            name="user_id_book_id_span_kind_params_source_unique",
+            unique=True,
+        ),
+    ],
+    "refresh_tokens": [
+        # Rotation deletes by _id; revocation deletes every token of a user
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Expired refresh token records are removed by MongoDB's TTL monitor
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Representative shapes of the hot queries, explained by the admin index report
+# to flag any that would fall back to a collection scan. The values are placeholders;
+# only the query shape matters to the planner.
+_PROBE_ID = ObjectId()
+
+# (collection, index name) of registry indexes ensure_indexes could not create
+_unavailable_indexes: Set[Tuple[str, str]] = set()
+
+HOT_QUERIES: List[dict] = [
+    {"collection": "users", "filter": {"email": "probe@example.com"}},
+    {"collection": "books", "filter": {"user_id": _PROBE_ID}, "sort": {"upload_date": -1, "_id": -1}},
+    {
+        "collection": "books",
+        "filter": {"user_id": _PROBE_ID, "category_id": _PROBE_ID},
+        "sort": {"upload_date": -1, "_id": -1},
+    },
+    {"collection": "categories", "filter": {"user_id": _PROBE_ID}, "sort": {"created_at": 1}},
+    {
+        "collection": "artifacts",
+        "filter": {
+            "user_id": _PROBE_ID, "book_id": _PROBE_ID, "span.start_page": 1, "span.end_page": 1,
+            "span.start_offset": None, "span.end_offset": None, "kind": "summary",
+            "params_key": "probe", "source_sha256": "probe",
+        },
+    },
+    {
+        "collection": "artifacts",
+        "filter": {"user_id": _PROBE_ID, "book_id": _PROBE_ID},
+        "sort": {"span.start_page": 1, "span.end_page": 1, "span.start_offset": 1},
+    },
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Creates every index in INDEX_REGISTRY. A conflicting or unbuildable index
+    (e.g. duplicate emails already stored) is reported and skipped so the app still starts;
+    code that relies on a unique index checks index_available() and falls back to a lookup.
+    """
+    for collection_name, index_models in INDEX_REGISTRY.items():
+        for index_model in index_models:
+            index_name = index_model.document["name"]
+            try:
+                await db[collection_name].create_indexes([index_model])
+                _unavailable_indexes.discard((collection_name, index_name))
+            except OperationFailure as e:
+                _unavailable_indexes.add((collection_name, index_name))
+                logger.error("Could not create index '%s' on '%s': %s", index_name, collection_name, e)
+    logger.info("MongoDB index registry applied.")
+
+def index_available(collection_name: str, index_name: str) -> bool:
+    """False if ensure_indexes failed to create this registry index."""
+    return (collection_name, index_name) not in _unavailable_indexes
@@ -0,0 +1,149 @@
+# backend/core/logging_config.py
+# Structured JSON logging for the backend.
+#
+# - Records are formatted and written by a QueueListener thread; request handlers only
+#   enqueue them (QueueHandler), so log I/O stays off request latency.
+# - LOG_LEVEL sets the root level and LOG_LEVELS overrides it per module, e.g.
+#   "services.ai_service=DEBUG,core.db=WARNING".
+# - DEBUG records are sampled with LOG_DEBUG_SAMPLE_RATE, and large payloads should go
+#   through truncate_for_log() so production debugging never dumps whole books.
+# - Every record carries the request id set by the request-id middleware in main.py.
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from .config import LOG_LEVEL, LOG_LEVELS, LOG_DEBUG_SAMPLE_RATE, LOG_PAYLOAD_MAX_CHARS, LOG_FORMAT
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+def set_request_id(request_id: Optional[str]):
+    return _request_id.set(request_id)
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+def truncate_for_log(value, max_chars: int = LOG_PAYLOAD_MAX_CHARS) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+class truncated:
+    """
+    Lazy log argument: logger.debug("raw: %s", truncated(payload)) only builds the
+    (capped) string if the record is actually emitted.
+    """
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value, max_chars: int = LOG_PAYLOAD_MAX_CHARS):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        return truncate_for_log(self.value, self.max_chars)
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_STANDARD_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on the record. Runs in the logging caller's context."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps only a fraction of DEBUG records; other levels always pass."""
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.sample_rate >= 1.0:
+            return True
+        return random.random() < self.sample_rate
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    The stock QueueHandler formats the whole record (traceback included) before enqueueing.
+    Only merge the message arguments here and leave formatting to the listener thread.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+def _parse_module_levels(spec: str) -> dict:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging() -> None:
+    """Installs the queue-based handler on the root logger. Safe to call more than once."""
+    global _queue_listener
+    if _queue_listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = _DeferredQueueHandler(log_queue)
+    # Filters run in the caller's thread/context, before the record is enqueued
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(LOG_LEVEL.upper())
+    for module_name, level in _parse_module_levels(LOG_LEVELS).items():
+        logging.getLogger(module_name).setLevel(level)
+
+    _queue_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _queue_listener.start()
+
+def shutdown_logging() -> None:
+    """Flushes queued records; called on app shutdown."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
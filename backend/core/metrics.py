@@ -0,0 +1,242 @@
+# backend/core/metrics.py
+# Minimal Prometheus-style metrics: counters, gauges and histograms rendered in the
+# text exposition format by GET /metrics (see main.py).
+#
+# Hot-path cost is kept low: label children are created once per label set and then
+# reused, observe() is a bisect plus two additions on preallocated slots, and nothing
+# takes a lock. Updates from pymongo's listener threads rely on the GIL, so a rare lost
+# increment under contention is accepted in exchange.
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; covers fast Mongo reads through multi-second model inference
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_COUNT_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+PAGES_PER_SECOND_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *labelvalues: str):
+        key = tuple(str(value) for value in labelvalues)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _render_child(self, labelvalues: Tuple[str, ...], child) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labelvalues, child in list(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def _render_child(self, labelvalues, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}"]
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].dec(amount)
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "bucket_counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.bucket_counts = [0] * (len(upper_bounds) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def _render_child(self, labelvalues, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for upper_bound, bucket_count in zip(self.upper_bounds + (float("inf"),), list(child.bucket_counts)):
+            cumulative += bucket_count
+            le = f'le="{_format_value(float(upper_bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# --- HTTP ---
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_PROGRESS = registry.gauge("http_requests_in_progress", "HTTP requests currently being served.")
+
+# --- Process memory (refreshed on each scrape, see core/process_memory.py) ---
+PROCESS_MEMORY = registry.gauge("process_memory_bytes", "Worker memory: rss, pss, uss (unique) and shared.", ("kind",))
+
+# --- MongoDB ---
+MONGO_COMMAND_DURATION = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency as reported by the driver.", ("command", "outcome")
+)
+
+# --- Summarization model (T5) ---
+SUMMARIZE_INFERENCE_DURATION = registry.histogram(
+    "summarize_inference_duration_seconds", "Tokenize + generate + decode time for one summary batch.", ("tier",)
+)
+SUMMARIZE_BATCH_SIZE = registry.histogram(
+    "summarize_batch_size", "Requests served by one generate() call.", ("tier",), buckets=(1, 2, 4, 8, 16, 32)
+)
+SUMMARIZE_QUEUE_WAIT = registry.histogram(
+    "summarize_queue_wait_seconds", "Time a summary request waited in its tier's queue.", ("tier",)
+)
+INFERENCE_CLIENT_DURATION = registry.histogram(
+    "inference_client_request_duration_seconds", "Summary round trips to the inference server.", ("outcome",)
+)
+SUMMARIZE_INPUT_TOKENS = registry.histogram(
+    "summarize_input_tokens", "Non-padding input tokens per summary request.", buckets=TOKEN_COUNT_BUCKETS
+)
+SUMMARIZE_OUTPUT_TOKENS = registry.histogram(
+    "summarize_output_tokens", "Generated tokens per summary.", buckets=TOKEN_COUNT_BUCKETS
+)
+
+# --- Gemini ---
+GEMINI_REQUEST_DURATION = registry.histogram(
+    "gemini_request_duration_seconds", "Gemini API call latency.", ("operation",)
+)
+GEMINI_ERRORS = registry.counter("gemini_errors_total", "Failed or blocked Gemini API calls.", ("operation",))
+
+# --- LLM provider router ---
+LLM_PROVIDER_DURATION = registry.histogram(
+    "llm_provider_request_duration_seconds", "LLM call latency per provider (completed calls).", ("provider", "operation")
+)
+LLM_PROVIDER_REQUESTS = registry.counter(
+    "llm_provider_requests_total", "LLM calls per provider by outcome (success, error, timeout, cancelled).", ("provider", "outcome")
+)
+LLM_ROUTER_HEDGES = registry.counter("llm_router_hedges_total", "Requests sent to a second provider because the first was slow.", ("operation",))
+LLM_ROUTER_FAILOVERS = registry.counter("llm_router_failovers_total", "Requests retried on another provider after a failure.", ("operation",))
+
+HTTP_CONDITIONAL_REQUESTS = registry.counter(
+    "http_conditional_requests_total", "Requests with If-None-Match, by whether they were answered with 304.", ("outcome",)
+)
+
+# --- Response compression ---
+HTTP_COMPRESSED_BYTES = registry.counter(
+    "http_compressed_response_bytes_total", "Body bytes of responses compressed on the fly, before (original) and after (sent).", ("encoding", "stage")
+)
+
+# --- Books ---
+BOOK_UPLOAD_BYTES = registry.counter("book_upload_bytes_total", "Bytes of PDF uploaded.")
+BOOK_EXTRACTION_DURATION = registry.histogram("book_extraction_duration_seconds", "PDF text extraction time per book.")
+BOOK_EXTRACTION_PAGES_PER_SECOND = registry.histogram(
+    "book_extraction_pages_per_second", "PDF text extraction throughput per book.", buckets=PAGES_PER_SECOND_BUCKETS
+)
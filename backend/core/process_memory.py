@@ -0,0 +1,51 @@
+# backend/core/process_memory.py
+# Memory usage of the current worker process, split into what it shares with other
+# processes (e.g. memory-mapped model weights) and what is unique to it.
+
+import os
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+def _read_smaps_rollup() -> Optional[dict]:
+    """Linux only; values in bytes."""
+    try:
+        with open("/proc/self/smaps_rollup") as smaps_f:
+            fields = {}
+            for line in smaps_f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+            return fields
+    except OSError:
+        return None
+
+def read_process_memory() -> dict:
+    """
+    rss: resident memory, shared pages included.
+    pss: proportional share; summing it over workers gives their real total.
+    uss: private (unique) memory, i.e. what killing this worker would free.
+    shared: resident pages also mapped by other processes.
+    """
+    smaps = _read_smaps_rollup()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None # KiB on Linux, bytes on macOS
+    memory = {
+        "pid": os.getpid(),
+        "rss_bytes": None,
+        "peak_rss_bytes": None if peak is None else peak if sys.platform == "darwin" else peak * 1024,
+        "pss_bytes": None,
+        "uss_bytes": None,
+        "shared_bytes": None,
+    }
+    if smaps is not None:
+        memory.update(
+            rss_bytes=smaps.get("Rss"),
+            pss_bytes=smaps.get("Pss"),
+            uss_bytes=smaps.get("Private_Clean", 0) + smaps.get("Private_Dirty", 0),
+            shared_bytes=smaps.get("Shared_Clean", 0) + smaps.get("Shared_Dirty", 0),
+        )
+    return memory
@@ -0,0 +1,142 @@
+# backend/core/profiling.py
+# Opt-in request profiling (PROFILING_ENABLED). A sampled request, or one carrying the
+# X-Profile-Token header, runs under a wall-clock stack sampler and the result is written
+# to PROFILING_DIR as collapsed ("folded") stacks, ready for flamegraph.pl or speedscope.
+# Only the newest PROFILING_MAX_PROFILES profiles are kept.
+#
+# The sampler captures every thread of the worker: the event loop (Pydantic, fitz, route
+# code) as well as the Motor and bcrypt executor threads. Other requests running on the
+# loop at the same time therefore show up too; one profile is captured at a time.
+
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from .config import (
+    PROFILING_SAMPLE_RATE, PROFILING_HEADER_TOKEN, PROFILING_INTERVAL_MS,
+    PROFILING_MAX_PROFILES, PROFILING_DIR
+)
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_SUFFIX = ".folded"
+META_SUFFIX = ".json"
+# Profile ids are generated here; anything else asked for by the admin endpoint is rejected
+PROFILE_ID_PATTERN = re.compile(r"^\d{13}_[0-9a-f]{32}$")
+
+class StackSampler:
+    """Samples the stacks of all threads (except its own) at a fixed interval."""
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.stacks[self._fold(thread_names.get(thread_id, str(thread_id)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _fold(thread_name: str, frame) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ";".join(reversed(frames))
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+# Guards against overlapping profiles; a second sampled request simply runs unprofiled
+_profile_slot = threading.Lock()
+
+def should_profile(header_value: Optional[str]) -> bool:
+    if header_value and PROFILING_HEADER_TOKEN:
+        return hmac.compare_digest(header_value, PROFILING_HEADER_TOKEN)
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+def start_profile() -> Optional[StackSampler]:
+    """Returns a running sampler, or None if another request is already being profiled."""
+    if not _profile_slot.acquire(blocking=False):
+        return None
+    sampler = StackSampler(PROFILING_INTERVAL_MS / 1000.0)
+    sampler.start()
+    return sampler
+
+def stop_profile(sampler: StackSampler) -> None:
+    try:
+        sampler.stop()
+    finally:
+        _profile_slot.release()
+
+def save_profile(profile_id: str, sampler: StackSampler, metadata: dict) -> None:
+    """Writes the folded stacks and a metadata sidecar, then trims the ring. Blocking; run in a thread."""
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    with open(os.path.join(PROFILING_DIR, profile_id + PROFILE_SUFFIX), "w", encoding="utf-8") as profile_f:
+        profile_f.write(sampler.folded())
+    with open(os.path.join(PROFILING_DIR, profile_id + META_SUFFIX), "w", encoding="utf-8") as meta_f:
+        json.dump({**metadata, "samples": sampler.samples}, meta_f)
+    _trim_profiles()
+
+def new_profile_id() -> str:
+    return f"{int(time.time() * 1000):013d}_{uuid.uuid4().hex}" # Sorts by creation time
+
+def _list_profile_ids() -> List[str]:
+    if not os.path.isdir(PROFILING_DIR):
+        return []
+    ids = [name[:-len(PROFILE_SUFFIX)] for name in os.listdir(PROFILING_DIR) if name.endswith(PROFILE_SUFFIX)]
+    return sorted(profile_id for profile_id in ids if PROFILE_ID_PATTERN.match(profile_id)) # Oldest first
+
+def _trim_profiles() -> None:
+    profile_ids = _list_profile_ids()
+    for profile_id in profile_ids[:max(0, len(profile_ids) - PROFILING_MAX_PROFILES)]:
+        for suffix in (PROFILE_SUFFIX, META_SUFFIX):
+            try:
+                os.remove(os.path.join(PROFILING_DIR, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+def list_profiles() -> List[dict]:
+    """Newest first. Blocking; run in a thread."""
+    profiles = []
+    for profile_id in reversed(_list_profile_ids()):
+        profile_path = os.path.join(PROFILING_DIR, profile_id + PROFILE_SUFFIX)
+        try:
+            with open(os.path.join(PROFILING_DIR, profile_id + META_SUFFIX), encoding="utf-8") as meta_f:
+                metadata = json.load(meta_f)
+            size_bytes = os.path.getsize(profile_path)
+        except (OSError, ValueError): # Trimmed concurrently or half-written
+            continue
+        created_at = datetime.fromtimestamp(int(profile_id.split("_", 1)[0]) / 1000, tz=timezone.utc)
+        profiles.append({"id": profile_id, "created_at": created_at, "size_bytes": size_bytes, **metadata})
+    return profiles
+
+def get_profile_path(profile_id: str) -> Optional[str]:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    profile_path = os.path.join(PROFILING_DIR, profile_id + PROFILE_SUFFIX)
+    return profile_path if os.path.isfile(profile_path) else None
@@ -0,0 +1,69 @@
+# backend/core/rate_limit.py
+# Token-bucket admission control for the CPU-expensive auth endpoints (bcrypt).
+# Buckets live in-process by default; call set_rate_limit_backend() at startup with a
+# shared implementation (e.g. Redis-backed) to enforce the limits across nodes.
+
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, status
+
+from .config import (
+    LOGIN_RATE_LIMIT_PER_IP_BURST, LOGIN_RATE_LIMIT_PER_IP_PER_MINUTE,
+    LOGIN_RATE_LIMIT_PER_EMAIL_BURST, LOGIN_RATE_LIMIT_PER_EMAIL_PER_MINUTE,
+    RATE_LIMIT_MAX_TRACKED_KEYS
+)
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def consume(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """
+        Takes one token from the bucket identified by key, creating it full if needed.
+        Returns 0 if a token was available, otherwise the seconds until one will be.
+        """
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int):
+        # Idle buckets are dropped after an hour; a refilled bucket is the same as a new one.
+        self._buckets: TTLCache = TTLCache(maxsize=max_keys, ttl=3600)
+
+    async def consume(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = time.monotonic()
+        tokens, last_refill = self._buckets.get(key, (float(capacity), now))
+        tokens = min(float(capacity), tokens + (now - last_refill) * refill_per_second)
+        if tokens >= 1.0:
+            self._buckets[key] = (tokens - 1.0, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1.0 - tokens) / refill_per_second
+
+_backend: RateLimitBackend = InMemoryRateLimitBackend(max_keys=RATE_LIMIT_MAX_TRACKED_KEYS)
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    global _backend
+    _backend = backend
+
+def too_many_requests(retry_after_seconds: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, int(retry_after_seconds + 0.999)))},
+    )
+
+def get_client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+async def enforce_rate_limit(key: str, burst: int, per_minute: int) -> None:
+    retry_after = await _backend.consume(key, burst, per_minute / 60.0)
+    if retry_after > 0:
+        raise too_many_requests(retry_after, "Too many attempts. Please try again later.")
+
+async def enforce_auth_rate_limits(request: Request, email: Optional[str] = None) -> None:
+    """
+    Checks the per-IP bucket and, when an email is given, the per-email bucket
+    (which throttles credential stuffing against one account from many IPs).
+    """
+    await enforce_rate_limit(f"auth:ip:{get_client_ip(request)}", LOGIN_RATE_LIMIT_PER_IP_BURST, LOGIN_RATE_LIMIT_PER_IP_PER_MINUTE)
+    if email:
+        await enforce_rate_limit(f"auth:email:{email.lower()}", LOGIN_RATE_LIMIT_PER_EMAIL_BURST, LOGIN_RATE_LIMIT_PER_EMAIL_PER_MINUTE)
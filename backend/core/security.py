@@ -1,7 +1,11 @@
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\core\security.py
 
+import logging
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from authlib.jose import jwt, JoseError
@@ -9,13 +13,20 @@ from passlib.context import CryptContext
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
-from .config import JWT_SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from .config import (
+    JWT_SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS,
+    ADMIN_EMAILS, BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+)
 from core.db import get_database 
-from models.user_schemas import TokenData, UserInDB, PyObjectId
+from core.user_cache import user_cache
+from core.rate_limit import too_many_requests
+from models.user_schemas import TokenData, UserInDB, PyObjectId, CurrentUserIdentity
 from services import user_service
 
+logger = logging.getLogger(__name__)
+
 # --- Password Hashing 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,49 +34,102 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# bcrypt costs 100+ ms of CPU per call, so the async paths run it on a dedicated,
+# bounded pool instead of the event loop.
+password_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+# Running + queued password operations in this process (only touched on the event loop)
+_pending_password_ops = 0
+
+async def _run_password_op(func, *args):
+    global _pending_password_ops
+    if _pending_password_ops >= PASSWORD_HASH_MAX_PENDING:
+        raise too_many_requests(1, "Authentication service is busy. Please retry shortly.")
+    _pending_password_ops += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_hash_executor, func, *args)
+    finally:
+        _pending_password_ops -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_op(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_op(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies the password and, if the stored hash uses a different bcrypt cost than
+    BCRYPT_ROUNDS, also returns a replacement hash (otherwise None).
+    """
+    return await _run_password_op(pwd_context.verify_and_update, plain_password, hashed_password)
+
 # --- JWT Token Creation 
+# Access tokens carry the user's id (sub), email and token version (ver); the version is
+# checked against the (cached) user on every request. Bumping the user's token_version
+# (see token_service.revoke_user_tokens) invalidates every token issued before it.
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": int(expire.timestamp())})  # Authlib expects Unix timestamp
+    to_encode.setdefault("type", ACCESS_TOKEN_TYPE)
+    to_encode.update({"exp": int(expire.timestamp()), "iat": int(now.timestamp())})  # Authlib expects Unix timestamp
     header = {"alg": ALGORITHM}
     
     encoded_jwt = jwt.encode(header, to_encode, JWT_SECRET_KEY)
     return encoded_jwt.decode("utf-8") if isinstance(encoded_jwt, bytes) else encoded_jwt
 
+def create_refresh_token(user_id: str, email: str, token_version: int) -> Tuple[str, str, datetime]:
+    """Returns (token, jti, expiry). The jti identifies the token's server-side record."""
+    jti = uuid.uuid4().hex
+    expires_delta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    token = create_access_token(
+        data={"sub": user_id, "email": email, "ver": token_version, "jti": jti, "type": REFRESH_TOKEN_TYPE},
+        expires_delta=expires_delta
+    )
+    return token, jti, datetime.now(timezone.utc) + expires_delta
+
+def decode_token(token: str, expected_type: str) -> dict:
+    """
+    Verifies the signature, expiry and type of a token and returns its claims.
+    Raises JoseError (or ValueError for malformed claims).
+    """
+    claims = jwt.decode(token, JWT_SECRET_KEY)
+    claims.validate()  # Checks exp
+    if claims.get("type") != expected_type:
+        raise ValueError(f"Expected a {expected_type} token.")
+    if not ObjectId.is_valid(claims.get("sub")) or not isinstance(claims.get("ver"), int):
+        raise ValueError("Token is missing the user id or version claim.")
+    return dict(claims)
+
 # tokenUrl should point to your actual login endpoint in auth_router.py
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-) -> UserInDB:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY)
-        email: Optional[str] = payload.get("sub")
-        ...
-    except JoseError:
-        raise credentials_exception
-    
-    # Fetch the user from DB to ensure they exist, are active, etc.
-    # Your user_service.get_user_by_email should return a UserInDB instance
+
+async def _load_user(db: AsyncIOMotorDatabase, user_id_str: str) -> Optional[UserInDB]:
+    """Reads the user from Mongo and caches it; None if there is no such user."""
+    # user_service.get_user_by_id returns a UserInDB instance
     # which includes the 'id' as a PyObjectId.
-    user = await user_service.get_user_by_email(db, email=email)
+    user = await user_service.get_user_by_id(db, user_id=ObjectId(user_id_str))
     if user is None:
-        raise credentials_exception
-    
-    
+        return None
+
     if not isinstance(user, UserInDB):
-        print(f"WARNING: get_current_user expected UserInDB but received {type(user)} for email {email}.")
+        logger.warning("get_current_user expected UserInDB but received %s for user %s.", type(user), user_id_str)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="User object retrieved in an unexpected format."
@@ -74,10 +138,81 @@ async def get_current_user(
     # Important check: Ensure the user.id is indeed a PyObjectId for consistency
     # with how book_service will use it to associate books.
     if not hasattr(user, 'id') or not isinstance(user.id, ObjectId): # <--- Changed PyObjectId to ObjectId
-        print(f"CRITICAL WARNING: User object for email {email} does not have a valid BSON ObjectId 'id'. Current id: {getattr(user, 'id', 'MISSING')}, type: {type(getattr(user, 'id', 'MISSING'))}")
+        logger.error("User object %s does not have a valid BSON ObjectId 'id'. Current id: %s, type: %s", user_id_str, getattr(user, 'id', 'MISSING'), type(getattr(user, 'id', 'MISSING')))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="User identity 'id' is not a valid ObjectId."
         )
 
-    return user
\ No newline at end of file
+    user_cache.set(user_id_str, user)
+    return user
+
+async def _get_user_for_claims(db: AsyncIOMotorDatabase, claims: dict, count_in_stats: bool) -> Optional[UserInDB]:
+    """
+    The token's user, from the cache when it is fresh enough to judge the token: a cached
+    copy with an older token_version than the token's (revoked and logged in again on
+    another worker) is re-read. Revocations on other workers are seen once this worker's
+    copy expires (USER_CACHE_TTL_SECONDS).
+    """
+    user_id_str = claims["sub"]
+    user = user_cache.get(user_id_str) if count_in_stats else user_cache.peek(user_id_str)
+    if user is None or user.token_version < claims["ver"]:
+        user = await _load_user(db, user_id_str)
+    return user
+
+async def get_current_user_identity(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> CurrentUserIdentity:
+    """
+    Authenticates the request from the access token claims, checking the token version
+    against the user cache (Mongo only on a miss). Use it for endpoints that only need
+    the user's id.
+    """
+    try:
+        claims = decode_token(token, ACCESS_TOKEN_TYPE)
+    except (JoseError, ValueError):
+        raise _credentials_exception()
+
+    min_version = user_cache.min_token_version(claims["sub"])
+    if min_version is not None and claims["ver"] < min_version: # Revoked through this worker
+        raise _credentials_exception()
+    user = await _get_user_for_claims(db, claims, count_in_stats=False)
+    if user is None or user.token_version != claims["ver"]:
+        raise _credentials_exception()
+
+    return CurrentUserIdentity(id=user.id, email=user.email, token_version=user.token_version)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> UserInDB:
+    """
+    Full user document for the token's user, served from the user cache when possible.
+    The token version must match the user's current token_version.
+    """
+    credentials_exception = _credentials_exception()
+    try:
+        claims = decode_token(token, ACCESS_TOKEN_TYPE)
+    except (JoseError, ValueError):
+        raise credentials_exception
+    
+    # FastAPI caches this dependency per request, so the router-level and endpoint-level
+    # Depends(get_current_user) resolve it only once.
+    user = await _get_user_for_claims(db, claims, count_in_stats=True)
+    if user is None:
+        raise credentials_exception
+
+    if user.token_version != claims["ver"]: # Revoked by a version bump
+        raise credentials_exception
+    return user
+
+async def get_current_admin_user(
+    current_user: UserInDB = Depends(get_current_user)
+) -> UserInDB:
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required."
+        )
+    return current_user
@@ -0,0 +1,72 @@
+# backend/core/user_cache.py
+# In-process cache of authenticated users, so get_current_user does not hit Mongo
+# on every protected request. Entries expire after USER_CACHE_TTL_SECONDS; writes to a
+# user (profile, password) must call invalidate() so this worker never serves stale data.
+# Other uvicorn workers keep their copy until it expires.
+#
+# Token revocations (a token_version bump) are also remembered here, for as long as an
+# access token lives, so get_current_user_identity can reject older tokens without a DB
+# hit even after the user's entry has expired or been invalidated.
+
+from typing import Optional
+from cachetools import TTLCache
+
+from .config import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES
+from models.user_schemas import UserInDB
+
+class UserCache:
+    def __init__(self, maxsize: int, ttl: float, revocation_ttl: float):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._token_versions: TTLCache = TTLCache(maxsize=maxsize, ttl=revocation_ttl) # key -> version after a revocation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[UserInDB]:
+        user = self._cache.get(key)
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def peek(self, key: str) -> Optional[UserInDB]:
+        """Like get(), but not counted in the hit-rate stats."""
+        return self._cache.get(key)
+
+    def set(self, key: str, user: UserInDB) -> None:
+        self._cache[key] = user
+
+    def invalidate(self, key: str) -> None:
+        if self._cache.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def revoke(self, key: str, token_version: int) -> None:
+        """Drops the cached user and remembers that tokens older than token_version are revoked."""
+        self.invalidate(key)
+        self._token_versions[key] = max(token_version, self._token_versions.get(key, token_version))
+
+    def min_token_version(self, key: str) -> Optional[int]:
+        """Lowest token version still valid after a revocation seen by this worker, if any."""
+        return self._token_versions.get(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._token_versions.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "ttl_seconds": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# Keyed by the token subject (the user's id as a string)
+user_cache = UserCache(
+    maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS, revocation_ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
@@ -1,28 +1,121 @@
 # backend/main.py
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\main.py
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
+import time
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from core.db import connect_to_mongo, close_mongo_connection, get_database 
+from core.logging_config import setup_logging, shutdown_logging, new_request_id, set_request_id, reset_request_id, get_request_id
+
+# Before the routers are imported, so records logged while loading models are handled too
+setup_logging()
+
+from core.db import connect_to_mongo, close_mongo_connection, get_database, db_manager, track_queries
+from core.indexes import ensure_indexes
+from core.config import (
+    METRICS_ENABLED, PROFILING_ENABLED, CATEGORY_BOOK_COUNTERS_ENABLED,
+    COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE_BYTES, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+)
+from core.compression import CompressionMiddleware
+from core import profiling
+from core.metrics import registry as metrics_registry, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_PROGRESS, PROCESS_MEMORY
+from core.process_memory import read_process_memory
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from routers import auth_router, book_router, ai_router, category_router, user_router
+from routers import auth_router, book_router, ai_router, category_router, user_router, admin_router, artifact_router
+from services.category_service import recompute_all_category_book_counts
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Lifespan manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    if db_manager.db is not None:
+        await ensure_indexes(db_manager.db)
+        if CATEGORY_BOOK_COUNTERS_ENABLED: # Fill in counts for categories created while the counters were off
+            recomputed_users = await recompute_all_category_book_counts(db_manager.db, only_missing=True)
+            if recomputed_users:
+                logger.info("Computed category book counts for %s users.", recomputed_users)
     yield
     # Shutdown
     await close_mongo_connection()
+    shutdown_logging()
 
 app = FastAPI(lifespan=lifespan) # Pass lifespan manager to app
 
+# Reports the number of Mongo round trips each request made
+@app.middleware("http")
+async def count_db_queries(request: Request, call_next):
+    with track_queries() as query_counter:
+        response = await call_next(request)
+    response.headers["X-DB-Query-Count"] = str(query_counter.count)
+    return response
+
+# Per-route latency histogram; labelled by route template (not raw path) to keep cardinality bounded
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    request_start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_PROGRESS.dec()
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_DURATION.labels(request.method, route_path, status_code).observe(time.perf_counter() - request_start)
+
+# Opt-in sampling profiler around sampled (or explicitly requested) requests; see core/profiling.py
+if PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        sampler = profiling.start_profile() if profiling.should_profile(request.headers.get(profiling.PROFILE_HEADER)) else None
+        if sampler is None:
+            return await call_next(request)
+
+        request_start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            profiling.stop_profile(sampler)
+        profile_id = profiling.new_profile_id()
+        metadata = {
+            "method": request.method,
+            "path": request.url.path,
+            "route": getattr(request.scope.get("route"), "path", None),
+            "status_code": response.status_code,
+            "duration_ms": round((time.perf_counter() - request_start) * 1000, 2),
+            "request_id": get_request_id(),
+        }
+        try:
+            await asyncio.to_thread(profiling.save_profile, profile_id, sampler, metadata)
+            response.headers["X-Profile-Id"] = profile_id
+        except OSError as e:
+            logger.warning("Could not save request profile: %s", e)
+        return response
+
+# Correlates every log record of a request; registered last so it wraps the other middleware
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = set_request_id(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request_id(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 origins = [
     "http://localhost:3000", 
 ]
@@ -35,16 +128,35 @@ app.add_middleware(
     allow_headers=["*"],  
 )
 
+# Outermost, so it sees the final headers and body of every response
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE_BYTES,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY
+    )
+
 app.include_router(auth_router.router)
 app.include_router(book_router.router)
 app.include_router(ai_router.router)
+app.include_router(artifact_router.router)
 app.include_router(category_router.router)
 app.include_router(user_router.router)
+app.include_router(admin_router.router)
 
 @app.get("/")
 async def root():
     return {"message": "Hello from Learn-Ease Backend!"}
 
+if METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        for kind, value in read_process_memory().items():
+            if kind.endswith("_bytes") and value is not None:
+                PROCESS_MEMORY.labels(kind[:-len("_bytes")]).set(value)
+        return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/test")
 async def get_test_message(db: AsyncIOMotorDatabase = Depends(get_database)): 
     try:
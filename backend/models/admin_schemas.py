@@ -0,0 +1,110 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+
+# --- Schemas for the index usage report ---
+class IndexUsage(BaseModel):
+    collection: str
+    name: str
+    key: Dict[str, Any]
+    accesses: int = Field(..., description="Number of operations that used the index since 'since'.")
+    since: Optional[str] = None
+    unused: bool = Field(..., description="True if the index has not served any operation yet.")
+
+class QueryPlanReport(BaseModel):
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[Dict[str, Any]] = None
+    winning_stages: List[str]
+    index_name: Optional[str] = None
+    collection_scan: bool
+
+class IndexReportResponse(BaseModel):
+    indexes: List[IndexUsage]
+    hot_queries: List[QueryPlanReport]
+    collection_scans_total: Optional[int] = Field(default=None, description="serverStatus collection scan counter, if the user may read it.")
+
+# --- Schemas for cache statistics ---
+class CacheStatsResponse(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    invalidations: int
+    hit_rate: float
+
+# --- Schemas for MongoDB connection pool statistics ---
+class PoolServerStats(BaseModel):
+    address: str
+    open_connections: int = 0
+    checked_out: int = 0
+    waiting_checkouts: int = 0
+    checkouts: int = 0
+    checkout_failures: int = Field(default=0, description="Includes wait-queue timeouts.")
+    connections_created: int = 0
+    pool_clears: int = 0
+
+class PoolStatsResponse(BaseModel):
+    max_pool_size: int
+    servers: List[PoolServerStats]
+
+# --- Schemas for captured request profiles ---
+class ProfileInfo(BaseModel):
+    id: str
+    created_at: datetime
+    method: str
+    path: str
+    route: Optional[str] = None
+    status_code: int
+    duration_ms: float
+    samples: int = Field(..., description="Stack samples taken while the request ran.")
+    size_bytes: int
+    request_id: Optional[str] = None
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileInfo]
+
+# --- Schemas for worker memory usage ---
+class MemoryStatsResponse(BaseModel):
+    pid: int
+    rss_bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    pss_bytes: Optional[int] = Field(default=None, description="Proportional set size; sum over workers for their real total.")
+    uss_bytes: Optional[int] = Field(default=None, description="Memory unique to this worker.")
+    shared_bytes: Optional[int] = None
+    summarization_weights_mode: str
+    summarization_weights_shared: bool = Field(..., description="True if this worker's T5 weights are memory-mapped and shared.")
+
+# --- Schemas for the summarization inference server ---
+class InferenceWorkerStatus(BaseModel):
+    index: int
+    pid: Optional[int] = None
+    ready: bool
+    in_flight: int
+    restarts: int = Field(..., description="Consecutive restarts; reset once the worker has stayed up.")
+
+class InferenceHealthResponse(BaseModel):
+    mode: str
+    ready_workers: int
+    workers: List[InferenceWorkerStatus] = []
+    error: Optional[str] = None
+
+class LLMProviderStatus(BaseModel):
+    name: str
+    model: str
+    configured: bool
+    calls: int = Field(..., description="Calls in the rolling window, including ones cancelled after losing a hedge.")
+    error_rate: float
+    p90_ms: Optional[float] = Field(default=None, description="None until the provider has enough samples.")
+    cooling_down: bool
+
+# --- Schemas for maintained category book counts ---
+class CategoryCountsRecomputeResponse(BaseModel):
+    counters_enabled: bool = Field(..., description="CATEGORY_BOOK_COUNTERS_ENABLED; the counts are only read when it is set.")
+    users_recomputed: int
+
+class LLMProvidersResponse(BaseModel):
+    latency_slo_ms: float
+    hedging_enabled: bool
+    providers: List[LLMProviderStatus]
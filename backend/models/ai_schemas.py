@@ -1,14 +1,23 @@
 from pydantic import BaseModel, Field
-from typing import List # Ensure List is imported
+from typing import List, Literal, Optional # Ensure List is imported
 
-class TextForSummarization(BaseModel):
+from .artifact_schemas import ArtifactTarget
+
+# Generation profiles, see services/summarization_profile.py
+SummarizationTier = Literal["fast", "balanced", "thorough"]
+
+class TextForSummarization(ArtifactTarget):
     text_to_summarize: str = Field(..., min_length=10, description="Text selected by the user to be summarized.")
+    tier: SummarizationTier = Field(default="balanced", description="'fast' for quick previews, 'balanced' (default) or 'thorough' for longer summaries.")
 
 class SummarizationResponse(BaseModel):
     summary: str
+    tier: SummarizationTier
+    artifact_id: Optional[str] = Field(default=None, description="Set when the result was saved for the request's book_id and span.")
+    reused: bool = Field(default=False, description="True if the saved result of an earlier request was returned.")
 
 # --- Schemas for Flashcard Generation ---
-class TextForFlashcards(BaseModel):
+class TextForFlashcards(ArtifactTarget):
     text_to_generate_from: str = Field(..., min_length=10, description="Text selected by the user to generate flashcards from.")
 
 class Flashcard(BaseModel):
@@ -17,10 +26,14 @@ class Flashcard(BaseModel):
 
 class FlashcardsResponse(BaseModel):
     flashcards: List[Flashcard] = Field(..., description="A list of generated flashcards.")
+    artifact_id: Optional[str] = None
+    reused: bool = False
 
 # --- Schemas for Study Notes Generation ---
-class TextForStudyNotes(BaseModel):
+class TextForStudyNotes(ArtifactTarget):
     text_to_generate_notes_from: str = Field(..., min_length=20, description="Text selected by the user to generate study notes from.")
 
 class StudyNotesResponse(BaseModel):
-    study_notes: str = Field(..., description="The generated structured study notes.")
\ No newline at end of file
+    study_notes: str = Field(..., description="The generated structured study notes.")
+    artifact_id: Optional[str] = None
+    reused: bool = False
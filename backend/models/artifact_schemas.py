@@ -0,0 +1,83 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime
+from bson import ObjectId
+
+from .user_schemas import PyObjectId
+
+ArtifactKind = Literal["summary", "flashcards", "study_notes"]
+
+class ArtifactSpan(BaseModel):
+    """Where in the book the source text was selected."""
+    start_page: int = Field(..., ge=1, description="First PDF page of the selection (1-based).")
+    end_page: int = Field(..., ge=1, description="Last PDF page of the selection (inclusive).")
+    start_offset: Optional[int] = Field(default=None, ge=0, description="Character offset of the selection in the book's extracted text.")
+    end_offset: Optional[int] = Field(default=None, ge=0, description="End offset (exclusive) in the extracted text.")
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.end_page < self.start_page:
+            raise ValueError("end_page must not be before start_page.")
+        if self.start_offset is not None and self.end_offset is not None and self.end_offset < self.start_offset:
+            raise ValueError("end_offset must not be before start_offset.")
+        return self
+
+class ArtifactTarget(BaseModel):
+    # Mixed into the /ai request bodies: with both set, the result is stored and reused
+    book_id: Optional[str] = Field(default=None, description="Book the text was selected from. Together with span, the generated result is saved and returned again for the same selection.")
+    span: Optional[ArtifactSpan] = None
+
+class ArtifactInDB(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    user_id: PyObjectId
+    book_id: PyObjectId
+    kind: ArtifactKind
+    span: ArtifactSpan
+    model: str
+    params: Dict[str, Any] = {}
+    params_key: str # Hash of model + params, part of the lookup key
+    source_sha256: str # Hash of the selected text, so an edited selection with the same span is not served stale content
+    content: Any # str for summaries and notes, a list of {front, back} for flashcards
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
+        json_encoders = {
+            ObjectId: str,
+            datetime: lambda dt: dt.isoformat()
+        }
+
+class ArtifactInfo(BaseModel): # Listing entry, without the content
+    id: str
+    book_id: str
+    kind: ArtifactKind
+    span: ArtifactSpan
+    model: str
+    params: Dict[str, Any] = {}
+    created_at: datetime
+
+    @classmethod
+    def from_db_doc(cls, artifact_doc: dict):
+        return cls(
+            id=str(artifact_doc["_id"]),
+            book_id=str(artifact_doc["book_id"]),
+            kind=artifact_doc["kind"],
+            span=artifact_doc["span"],
+            model=artifact_doc["model"],
+            params=artifact_doc.get("params", {}),
+            created_at=artifact_doc["created_at"]
+        )
+
+class ArtifactPublic(ArtifactInfo):
+    content: Any
+
+    @classmethod
+    def from_db_doc(cls, artifact_doc: dict):
+        return cls(**ArtifactInfo.from_db_doc(artifact_doc).model_dump(), content=artifact_doc["content"])
+
+# Everything ArtifactInfo needs; keeps (possibly large) content out of listings
+ARTIFACT_INFO_PROJECTION = {"_id": 1, "book_id": 1, "kind": 1, "span": 1, "model": 1, "params": 1, "created_at": 1}
+
+class ArtifactListResponse(BaseModel):
+    artifacts: List[ArtifactInfo]
@@ -18,10 +18,25 @@ class BookCreateInternal(BookBase): # Data for creating DB entry
     extracted_text_path_local: Optional[str] = None
     category_id: Optional[PyObjectId] = None # <<< NEW FIELD
 
+# One entry of a book's chapter index (see services/chapter_index.py)
+class BookChapter(BaseModel):
+    title: str
+    level: int = 1
+    start_page: int # 1-based, inclusive
+    end_page: int
+    start_offset: int # Characters into the extracted text; end is exclusive
+    end_offset: int
+    start_byte: int # Same range in UTF-8 bytes of the extracted text file
+    end_byte: int
+
 class BookInDB(BookCreateInternal):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     upload_date: datetime = Field(default_factory=datetime.utcnow)
     status: str = "processing" 
+    chapters: Optional[List[BookChapter]] = None # None for books uploaded before chapter indexing; built on first use
+    chapter_source: Optional[str] = None # "toc", "headings" or "single"
+    pdf_sha256: Optional[str] = None # Content hashes for ETags; None for books uploaded before, filled on first use
+    text_sha256: Optional[str] = None
     # category_id is inherited from BookCreateInternal <<< ALREADY INCLUDED IF ADDED ABOVE
 
     class Config:
@@ -49,6 +64,63 @@ class BookPublic(BaseModel): # Data returned to client
             category_id=str(db_book.category_id) if db_book.category_id else None # <<< UPDATE THIS
         )
 
+    @classmethod
+    def from_db_doc(cls, book_doc: dict):
+        # Builds directly from a (projected) raw Mongo document, skipping BookInDB validation
+        return cls(
+            id=str(book_doc["_id"]),
+            title=book_doc["title"],
+            filename=book_doc.get("original_filename"),
+            upload_date=book_doc["upload_date"].isoformat(),
+            category_id=str(book_doc["category_id"]) if book_doc.get("category_id") else None
+        )
+
+# Only the fields BookPublic needs; keeps local paths and sizes out of listing queries
+BOOK_PUBLIC_PROJECTION = {"_id": 1, "title": 1, "original_filename": 1, "upload_date": 1, "category_id": 1}
+
+class BookPage(BaseModel): # One page of a keyset-paginated book listing
+    books: List[BookPublic]
+    next_cursor: Optional[str] = Field(default=None, description="Opaque cursor for the next page. Null on the last page.")
+
 # Schema for updating a book's category
 class BookCategoryUpdate(BaseModel):
-    category_id: Optional[str] = Field(default=None, description="The new category ID for the book. Null to make it uncategorized.")
\ No newline at end of file
+    category_id: Optional[str] = Field(default=None, description="The new category ID for the book. Null to make it uncategorized.")
+
+# --- Schemas for bulk book operations ---
+class BookBulkDelete(BaseModel):
+    book_ids: List[str] = Field(..., min_length=1, max_length=500, description="IDs of the books to delete.")
+
+class BookBulkCategoryUpdate(BaseModel):
+    book_ids: List[str] = Field(..., min_length=1, max_length=500, description="IDs of the books to move.")
+    category_id: Optional[str] = Field(default=None, description="The target category ID. Null to make the books uncategorized.")
+
+class BookBulkResultItem(BaseModel):
+    id: str
+    status: str # "deleted", "updated", "not_found" or "invalid_id"
+    detail: Optional[str] = None
+
+class BookBulkOperationResponse(BaseModel):
+    results: List[BookBulkResultItem]
+
+# --- Schemas for chapter navigation ---
+class BookChapterPublic(BaseModel):
+    index: int
+    title: str
+    level: int
+    start_page: int
+    end_page: int
+    start_offset: int
+    end_offset: int
+
+    @classmethod
+    def from_chapter(cls, index: int, chapter: BookChapter):
+        return cls(index=index, **chapter.model_dump(exclude={"start_byte", "end_byte"}))
+
+class BookChaptersResponse(BaseModel):
+    book_id: str
+    source: str = Field(..., description="'toc' (PDF outline), 'headings' (detected chapter headings) or 'single' (no chapters found).")
+    chapters: List[BookChapterPublic]
+
+class BookChapterTextResponse(BookChapterPublic):
+    book_id: str
+    content: str
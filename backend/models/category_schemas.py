@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, constr
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from bson import ObjectId # For MongoDB ObjectId handling
 
@@ -22,6 +22,7 @@ class CategoryInDBBase(CategoryBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     user_id: PyObjectId = Field(..., description="The ID of the user who owns this category")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    book_count: Optional[int] = None # Only stored (and maintained) when CATEGORY_BOOK_COUNTERS_ENABLED is set
     # updated_at: datetime = Field(default_factory=datetime.utcnow) # Optional: for tracking updates
 
     class Config:
@@ -48,4 +49,12 @@ class CategoryPublic(BaseModel):
             user_id=str(db_category.user_id),
             created_at=db_category.created_at.isoformat(),
             # updated_at=db_category.updated_at.isoformat() if db_category.updated_at else None
-        )
\ No newline at end of file
+        )
+
+# --- Schemas for the category listing with book counts ---
+class CategoryWithCount(CategoryPublic):
+    book_count: int
+
+class CategoriesWithCountsResponse(BaseModel):
+    categories: List[CategoryWithCount]
+    uncategorized_book_count: int
@@ -76,6 +76,7 @@ class UserInDB(BaseModel):
     university_name: Optional[str] = None
     image: Optional[str] = None  
     verified: bool = False          
+    token_version: int = 0 # Bumped to revoke every token issued to the user
 
     class Config:
         populate_by_name = True 
@@ -127,9 +128,22 @@ class UserPasswordChange(BaseModel):
             raise ValueError('New password and confirmation password do not match')
         return self
 
+class CurrentUserIdentity(BaseModel): # Built from access token claims, no DB lookup
+    id: PyObjectId
+    email: EmailStr
+    token_version: int
+
+    class Config:
+        arbitrary_types_allowed = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None # Access token lifetime in seconds
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi.responses import FileResponse
+from typing import Annotated
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.admin_schemas import (
+    IndexReportResponse, CacheStatsResponse, PoolStatsResponse, PoolServerStats, ProfileInfo, ProfileListResponse,
+    MemoryStatsResponse, InferenceHealthResponse, InferenceWorkerStatus, LLMProviderStatus, LLMProvidersResponse,
+    CategoryCountsRecomputeResponse
+)
+from services import admin_service, ai_service, llm_providers, category_service
+from core.db import get_database, pool_stats_listener
+from core.config import (
+    MONGO_MAX_POOL_SIZE, SUMMARIZATION_WEIGHTS_MODE, SUMMARIZATION_INFERENCE_MODE, LLM_LATENCY_SLO_MS, LLM_HEDGING_ENABLED,
+    CATEGORY_BOOK_COUNTERS_ENABLED
+)
+from core.security import get_current_admin_user
+from core.user_cache import user_cache
+from core import profiling
+from core.process_memory import read_process_memory
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_current_admin_user)] # Only users listed in ADMIN_EMAILS
+)
+
+@router.get("/indexes", response_model=IndexReportResponse)
+async def get_index_report(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Index usage ($indexStats) for the app's collections, plus the query plans of the
+    hot queries with any collection scans flagged.
+    """
+    try:
+        return await admin_service.get_index_report(db=db)
+    except Exception as e:
+        logger.exception("/admin/indexes endpoint - Unexpected error: %s - %s", type(e).__name__, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not build the index report.")
+
+@router.post("/category-counts/recompute", response_model=CategoryCountsRecomputeResponse)
+async def recompute_category_counts(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Rewrites every user's maintained category book counts from the books collection,
+    e.g. after the counters were turned off for a while or to repair drift.
+    """
+    try:
+        users_recomputed = await category_service.recompute_all_category_book_counts(db)
+    except Exception as e:
+        logger.exception("/admin/category-counts/recompute endpoint - Unexpected error: %s - %s", type(e).__name__, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not recompute category book counts.")
+    return CategoryCountsRecomputeResponse(counters_enabled=CATEGORY_BOOK_COUNTERS_ENABLED, users_recomputed=users_recomputed)
+
+@router.get("/user-cache", response_model=CacheStatsResponse)
+async def get_user_cache_stats():
+    """
+    Size and hit-rate of this worker's authenticated-user cache.
+    """
+    return CacheStatsResponse(**user_cache.stats())
+
+@router.get("/db-pool", response_model=PoolStatsResponse)
+async def get_db_pool_stats():
+    """
+    This worker's MongoDB connection pool usage per server, from CMAP events.
+    """
+    servers = [
+        PoolServerStats(address=address, **{k: v for k, v in counters.items() if k != "pools_created"})
+        for address, counters in pool_stats_listener.snapshot().items()
+    ]
+    return PoolStatsResponse(max_pool_size=MONGO_MAX_POOL_SIZE, servers=servers)
+
+@router.get("/memory", response_model=MemoryStatsResponse)
+async def get_worker_memory():
+    """
+    This worker's memory split into unique and shared pages; with memory-mapped model
+    weights the weights show up as shared rather than unique.
+    """
+    return MemoryStatsResponse(
+        **read_process_memory(),
+        summarization_weights_mode=SUMMARIZATION_WEIGHTS_MODE,
+        summarization_weights_shared=ai_service.summarization_weights_shared()
+    )
+
+@router.get("/inference", response_model=InferenceHealthResponse)
+async def get_inference_health():
+    """
+    Summarization backend status. In server mode this asks the inference server for its
+    workers; an unreachable server is reported, not raised.
+    """
+    if ai_service.inference_client is None:
+        return InferenceHealthResponse(
+            mode=SUMMARIZATION_INFERENCE_MODE, ready_workers=1 if ai_service.is_summarization_available() else 0
+        )
+    try:
+        health = await ai_service.inference_client.health()
+    except (ai_service.InferenceUnavailableError, ai_service.InferenceTimeoutError) as e:
+        return InferenceHealthResponse(mode=SUMMARIZATION_INFERENCE_MODE, ready_workers=0, error=str(e))
+    return InferenceHealthResponse(
+        mode=SUMMARIZATION_INFERENCE_MODE,
+        ready_workers=health.get("ready_workers", 0),
+        workers=[InferenceWorkerStatus(**worker) for worker in health.get("workers", [])]
+    )
+
+@router.get("/llm-providers", response_model=LLMProvidersResponse)
+async def get_llm_providers():
+    """
+    Flashcard / study-notes providers in preference order, with the recent latency and
+    error rate the router uses to pick between them.
+    """
+    return LLMProvidersResponse(
+        latency_slo_ms=LLM_LATENCY_SLO_MS,
+        hedging_enabled=LLM_HEDGING_ENABLED,
+        providers=[LLMProviderStatus(**provider) for provider in llm_providers.llm_router.snapshot()]
+    )
+
+@router.get("/profiles", response_model=ProfileListResponse)
+async def list_request_profiles():
+    """
+    Request profiles captured by this worker's profiling middleware, newest first.
+    """
+    profiles = await asyncio.to_thread(profiling.list_profiles)
+    return ProfileListResponse(profiles=[ProfileInfo(**profile) for profile in profiles])
+
+@router.get("/profiles/{profile_id}", response_class=FileResponse)
+async def download_request_profile(
+    profile_id: Annotated[str, Path(description="Profile id, as returned in the X-Profile-Id header")],
+):
+    """
+    Downloads a profile as collapsed stacks (flamegraph.pl / speedscope input).
+    """
+    profile_path = profiling.get_profile_path(profile_id)
+    if not profile_path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found.")
+    return FileResponse(path=profile_path, media_type="text/plain", filename=f"{profile_id}{profiling.PROFILE_SUFFIX}")
@@ -1,8 +1,12 @@
 # learn-ease-fyp/backend/routers/ai_router.py
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\routers\ai_router.py
 
+import json
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
-# from typing import Annotated # Not used if current_user is only in router dependencies
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Any, Awaitable, Callable, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from models.ai_schemas import (
     TextForSummarization,
@@ -12,35 +16,123 @@ from models.ai_schemas import (
     TextForStudyNotes,
     StudyNotesResponse
 )
-from services import ai_service
-from core.security import get_current_user
-from models.user_schemas import UserInDB 
+from models.artifact_schemas import ArtifactTarget
+from services import ai_service, artifact_service, llm_providers
+from core.config import SUMMARIZATION_MODEL_NAME
+from core.db import get_database
+from core.security import get_current_user_identity
+from models.user_schemas import CurrentUserIdentity
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/ai", 
     tags=["AI Features"],
-    dependencies=[Depends(get_current_user)] 
+    dependencies=[Depends(get_current_user_identity)] 
 )
 
+async def _generate_for_selection(
+    db: AsyncIOMotorDatabase,
+    current_user: CurrentUserIdentity,
+    request_data: ArtifactTarget,
+    kind: str,
+    model: str,
+    params: dict,
+    text: str,
+    generate: Callable[[], Awaitable[Any]],
+    keep: Optional[Callable[[], bool]] = None
+) -> tuple[Any, Optional[str], bool]:
+    """
+    Returns (content, artifact_id, reused). Requests naming a book_id and span go through
+    the artifact store, so revisiting a selection returns the saved result.
+    """
+    if not (request_data.book_id and request_data.span):
+        return await generate(), None, False
+    artifact, reused = await artifact_service.get_or_create_artifact(
+        db, current_user.id, request_data.book_id, kind, request_data.span, model, params, text, generate, keep
+    )
+    if artifact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found or access denied.")
+    saved = reused or (artifact.content and (keep is None or keep()))
+    return artifact.content, str(artifact.id) if saved else None, reused
+
+async def _generate_llm_for_selection(
+    db: AsyncIOMotorDatabase,
+    current_user: CurrentUserIdentity,
+    request_data: ArtifactTarget,
+    kind: str,
+    params: dict,
+    text: str,
+    generate: Callable[[], Awaitable[Any]]
+) -> tuple[Any, Optional[str], bool]:
+    """
+    _generate_for_selection for the LLM router: artifacts are keyed by the preferred
+    provider's model, so a result a fallback provider helped produce is returned but not
+    saved. Neither is a partial one (e.g. some chunks of a long selection failed).
+    """
+    preferred = llm_providers.llm_router.preferred
+    served_by, partial = [], []
+
+    async def generate_recording_provider():
+        with llm_providers.record_served_by() as providers, ai_service.record_partial_results() as partial_results:
+            content = await generate()
+        served_by.extend(providers)
+        partial.extend(partial_results)
+        return content
+
+    return await _generate_for_selection(
+        db, current_user, request_data, kind, _llm_artifact_model(preferred), params, text, generate_recording_provider,
+        keep=lambda: _is_complete_preferred_result(preferred, served_by, partial)
+    )
+
+def _is_complete_preferred_result(preferred, served_by: list, partial: list) -> bool:
+    """Whether a result can be saved under the preferred provider's model."""
+    return preferred is not None and set(served_by) == {preferred.name} and not partial
+
+def _llm_artifact_model(preferred) -> str:
+    return f"{preferred.name}:{preferred.model}" if preferred else "none"
+
 @router.post("/summarize-text", response_model=SummarizationResponse)
 async def http_summarize_text(
     request_data: TextForSummarization,
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
-    # This line should use the corrected variable names
-    if not ai_service.model_summarize or not ai_service.tokenizer_summarize: 
+    async def generate():
+        # Checked only when generating: saved summaries are served even without the model
+        if not ai_service.is_summarization_available():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Summarization service is currently unavailable. Model not loaded."
+            )
+        return await ai_service.generate_summary(request_data.text_to_summarize, tier=request_data.tier)
+
+    try:
+        summary, artifact_id, reused = await _generate_for_selection(
+            db, current_user, request_data, "summary", SUMMARIZATION_MODEL_NAME, ai_service.summary_artifact_params(request_data.tier),
+            request_data.text_to_summarize, generate
+        )
+        return SummarizationResponse(summary=summary, tier=request_data.tier, artifact_id=artifact_id, reused=reused)
+    except HTTPException as he:
+        raise he
+    except ai_service.InferenceUnavailableError as e:
+        logger.error("/summarize-text: inference server unavailable: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Summarization service is currently unavailable. Model not loaded."
+            detail="Summarization service is currently unavailable. Please try again shortly."
+        )
+    except ai_service.InferenceTimeoutError as e:
+        logger.error("/summarize-text: inference server timed out: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Summarization took too long. Please try again or use the 'fast' tier."
         )
-    try:
-        summary = await ai_service.generate_summary(request_data.text_to_summarize)
-        return SummarizationResponse(summary=summary)
     except Exception as e:
         # If ai_service was not imported correctly, it would be an issue here too,
         # but the primary error (AttributeError) happens before this block is entered.
         # The NameError you're seeing now within this block means the AttributeError
         # is still the first problem, and then this logging line also fails.
-        print(f"Error in /summarize-text endpoint: {e}") 
+        logger.exception("Error in /summarize-text endpoint: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate summary: {str(e)}" 
@@ -49,34 +141,106 @@ async def http_summarize_text(
 @router.post("/generate-flashcards", response_model=FlashcardsResponse)
 async def http_generate_flashcards(
     request_data: TextForFlashcards,
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     try:
-        flashcards_list = await ai_service.generate_flashcards_from_text(request_data.text_to_generate_from)
-        return FlashcardsResponse(flashcards=flashcards_list)
+        flashcards_list, artifact_id, reused = await _generate_llm_for_selection(
+            db, current_user, request_data, "flashcards", ai_service.FLASHCARDS_GENERATION_PARAMS, request_data.text_to_generate_from,
+            lambda: ai_service.generate_flashcards_from_text(request_data.text_to_generate_from)
+        )
+        return FlashcardsResponse(flashcards=flashcards_list, artifact_id=artifact_id, reused=reused)
     except HTTPException as he: 
         raise he
     except Exception as e:
-        print(f"ERROR: /generate-flashcards endpoint - Unexpected error: {type(e).__name__} - {e}")
+        logger.exception("/generate-flashcards endpoint - Unexpected error: %s - %s", type(e).__name__, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while generating flashcards. Please try again later."
         )
 
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event) + "\n").encode("utf-8")
+
+@router.post("/generate-flashcards/stream")
+async def http_stream_flashcards(
+    request_data: TextForFlashcards,
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Like /generate-flashcards, but answers with newline-delimited JSON, one event per line:
+    {"type": "card", "card": {"front", "back"}} for each flashcard as soon as the model has
+    produced it, then {"type": "done", "count", "artifact_id", "reused"}. If generation
+    fails part way the last line is {"type": "error", "detail", "count"}; the cards already
+    sent are valid. Cards of a long selection with failed chunks are sent but not saved.
+    """
+    text = request_data.text_to_generate_from
+    params = ai_service.FLASHCARDS_GENERATION_PARAMS
+    preferred = llm_providers.llm_router.preferred
+    model = _llm_artifact_model(preferred)
+    store = bool(request_data.book_id and request_data.span)
+
+    if store: # Checked before streaming starts, so a bad book is still a plain 404
+        artifact, book_found = await artifact_service.find_artifact(
+            db, current_user.id, request_data.book_id, "flashcards", request_data.span, model, params, text
+        )
+        if not book_found:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found or access denied.")
+        if artifact:
+            async def saved_events():
+                for card in artifact.content:
+                    yield _ndjson({"type": "card", "card": card})
+                yield _ndjson({"type": "done", "count": len(artifact.content), "artifact_id": str(artifact.id), "reused": True})
+            return StreamingResponse(saved_events(), media_type="application/x-ndjson")
+
+    async def events():
+        cards = []
+        with llm_providers.record_served_by() as served_by, ai_service.record_partial_results() as partial:
+            try:
+                async for card in ai_service.stream_flashcards_from_text(text):
+                    cards.append(card)
+                    yield _ndjson({"type": "card", "card": card})
+            except Exception as e:
+                logger.exception("/generate-flashcards/stream - Generation failed after %s cards: %s - %s", len(cards), type(e).__name__, e)
+                yield _ndjson({"type": "error", "detail": "An error occurred while generating flashcards.", "count": len(cards)})
+                return
+
+        artifact_id = None
+        if partial:
+            logger.warning("/generate-flashcards/stream - Not saving %s cards: %s", len(cards), '; '.join(partial))
+        if store and cards and _is_complete_preferred_result(preferred, served_by, partial):
+            try:
+                artifact = await artifact_service.save_artifact(
+                    db, current_user.id, request_data.book_id, "flashcards", request_data.span, model, params, text, cards
+                )
+                artifact_id = str(artifact.id)
+            except Exception as e:
+                logger.exception("/generate-flashcards/stream - Failed to save artifact: %s", e)
+        yield _ndjson({"type": "done", "count": len(cards), "artifact_id": artifact_id, "reused": False})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 # --- New Endpoint for Study Notes Generation ---
 @router.post("/generate-study-notes", response_model=StudyNotesResponse)
 async def http_generate_study_notes(
     request_data: TextForStudyNotes,
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     """
     Receives text input and generates structured study notes using the AI service.
     """
     try:
-        notes_content = await ai_service.generate_study_notes_from_text(request_data.text_to_generate_notes_from)
-        return StudyNotesResponse(study_notes=notes_content)
+        notes_content, artifact_id, reused = await _generate_llm_for_selection(
+            db, current_user, request_data, "study_notes", ai_service.STUDY_NOTES_GENERATION_PARAMS, request_data.text_to_generate_notes_from,
+            lambda: ai_service.generate_study_notes_from_text(request_data.text_to_generate_notes_from)
+        )
+        return StudyNotesResponse(study_notes=notes_content, artifact_id=artifact_id, reused=reused)
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"ERROR: /generate-study-notes endpoint - Unexpected error: {type(e)._name_} - {e}")
+        logger.exception("/generate-study-notes endpoint - Unexpected error: %s - %s", type(e).__name__, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while generating study notes."
@@ -0,0 +1,63 @@
+# backend/routers/artifact_router.py
+# Saved summaries, flashcards and study notes of a book (see services/artifact_service.py).
+# They are created by the /ai endpoints when a request names a book_id and span.
+
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Annotated, Optional
+
+from models.artifact_schemas import ArtifactKind, ArtifactInfo, ArtifactPublic, ArtifactListResponse
+from models.user_schemas import CurrentUserIdentity
+from services import artifact_service
+from core.db import get_database
+from core.security import get_current_user_identity
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/books",
+    tags=["Study Artifacts"],
+    dependencies=[Depends(get_current_user_identity)]
+)
+
+@router.get("/{book_id}/artifacts", response_model=ArtifactListResponse)
+async def api_list_book_artifacts(
+    book_id: Annotated[str, Path(description="The ID of the book whose artifacts to list")],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    kind: Annotated[Optional[ArtifactKind], Query(description="Only artifacts of this kind.")] = None,
+):
+    """
+    Saved artifacts of a book in reading order (by span), without their content.
+    """
+    artifact_docs = await artifact_service.list_artifacts_for_book(db, current_user.id, book_id, kind)
+    if artifact_docs is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid book ID format.")
+    return ArtifactListResponse(artifacts=[ArtifactInfo.from_db_doc(doc) for doc in artifact_docs])
+
+@router.get("/{book_id}/artifacts/{artifact_id}", response_model=ArtifactPublic)
+async def api_get_book_artifact(
+    book_id: Annotated[str, Path(description="The ID of the book")],
+    artifact_id: Annotated[str, Path(description="The ID of the artifact to retrieve")],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    artifact_doc = await artifact_service.get_artifact_for_user(db, current_user.id, book_id, artifact_id)
+    if not artifact_doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artifact not found or access denied.")
+    return ArtifactPublic.from_db_doc(artifact_doc)
+
+@router.delete("/{book_id}/artifacts/{artifact_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def api_delete_book_artifact(
+    book_id: Annotated[str, Path(description="The ID of the book")],
+    artifact_id: Annotated[str, Path(description="The ID of the artifact to delete")],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Deletes a saved artifact; the next request for its selection generates it again.
+    """
+    if not await artifact_service.delete_artifact_for_user(db, current_user.id, book_id, artifact_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artifact not found or access denied.")
+    return None
@@ -1,13 +1,14 @@
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\routers\auth_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Annotated 
 
-from models.user_schemas import UserCreate, UserPublic, Token, UserLogin 
-from services import user_service
-from core.security import create_access_token
+from models.user_schemas import UserCreate, UserPublic, Token, UserLogin, RefreshTokenRequest, UserInDB
+from services import user_service, token_service
+from core.security import get_current_user
+from core.rate_limit import enforce_auth_rate_limits
 from core.db import get_database 
 
 router = APIRouter(
@@ -17,18 +18,23 @@ router = APIRouter(
 
 @router.post("/signup", response_model=UserPublic, status_code=status.HTTP_201_CREATED)
 async def signup_user(
+    request: Request,
     user_in: UserCreate, 
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
 ):
+    await enforce_auth_rate_limits(request)
     # user_service.create_user will raise HTTPException if email exists
     created_user = await user_service.create_user(db=db, user_create=user_in)
     return created_user
 
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     user_credentials: UserLogin,
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
 ):
+    # Rejected before any bcrypt work is queued
+    await enforce_auth_rate_limits(request, email=user_credentials.email)
     user = await user_service.authenticate_user(db=db, email=user_credentials.email, password=user_credentials.password)
     if not user:
         raise HTTPException(
@@ -36,5 +42,26 @@ async def login_for_access_token(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.email})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return await token_service.issue_tokens_for_user(db=db, user=user)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    refresh_request: RefreshTokenRequest,
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+    The presented refresh token cannot be used again.
+    """
+    return await token_service.rotate_refresh_token(db=db, refresh_token=refresh_request.refresh_token)
+
+@router.post("/revoke-all", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_all_tokens(
+    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+):
+    """
+    Log out everywhere: invalidates every access and refresh token of the current user.
+    """
+    await token_service.revoke_user_tokens(db=db, user_id=current_user.id)
+    return None
\ No newline at end of file
@@ -1,27 +1,46 @@
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\routers\book_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Path, Form
+import logging
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Path, Form, Query, Header, Response
 from fastapi.responses import FileResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Annotated, Optional
 from pydantic import BaseModel
 import os
 
-from models.book_schemas import BookPublic, BookCategoryUpdate
-from models.user_schemas import UserInDB # Or the precise type get_current_user returns
+from models.book_schemas import (
+    BookPublic,
+    BookPage,
+    BookCategoryUpdate,
+    BookBulkDelete,
+    BookBulkCategoryUpdate,
+    BookBulkOperationResponse,
+    BookChapterPublic,
+    BookChaptersResponse,
+    BookChapterTextResponse
+)
+from models.user_schemas import CurrentUserIdentity # Built from the token claims, no DB lookup
 from services import book_service
-from core.db import get_database
-from core.security import get_current_user
+from services.library_version import get_library_version
+from core.db import get_database, get_versioned_listing_database
+from core.http_cache import (
+    make_etag, with_encoding, etag_matches, not_modified, set_cache_headers, CACHE_CONTROL_IMMUTABLE,
+    CACHE_CONTROL_REVALIDATE,
+)
+from core.security import get_current_user_identity
+from core.config import BOOKS_PAGE_SIZE_DEFAULT, BOOKS_PAGE_SIZE_MAX
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/books", # Matches your frontend service's API_BASE_URL + /books
     tags=["Books"],
-    dependencies=[Depends(get_current_user)] # Protect all routes
+    dependencies=[Depends(get_current_user_identity)] # Protect all routes
 )
 
 @router.post("/upload", response_model=BookPublic, status_code=status.HTTP_201_CREATED)
 async def api_upload_book(
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
     file: UploadFile = File(..., description="The PDF book file to upload"),
     title: Optional[str] = Form(None, description="Optional title for the book"), # <<< NEW
@@ -45,7 +64,7 @@ async def api_upload_book(
     except HTTPException as e:
         raise e 
     except Exception as e:
-        print(f"Unhandled error in /upload endpoint: {str(e)}")
+        logger.exception("Unhandled error in /upload endpoint: %s", str(e))
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during book upload.")
 
 # ... (api_list_user_books, api_get_book_details, api_serve_book_pdf, api_get_book_extracted_text endpoints) ...
@@ -55,7 +74,7 @@ async def api_upload_book(
 async def api_update_book_category(
     book_id: Annotated[str, Path(description="The ID of the book to update")],
     book_category_update: BookCategoryUpdate, # Request body
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     """
@@ -75,27 +94,115 @@ async def api_update_book_category(
     except ValueError as ve: # Catch errors from service layer (e.g., invalid category_id)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
-        print(f"Error updating category for book {book_id}: {e}")
+        logger.exception("Error updating category for book %s: %s", book_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not update book category.")
 
 
+# --- Bulk Endpoints ---
+@router.post("/bulk/category", response_model=BookBulkOperationResponse)
+async def api_bulk_update_book_category(
+    bulk_update: BookBulkCategoryUpdate,
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Move several books into a category in one request.
+    Send `"category_id": null` to make them uncategorized. The response reports a status per book id.
+    """
+    try:
+        results = await book_service.bulk_update_books_category(
+            db=db,
+            book_id_strs=bulk_update.book_ids,
+            new_category_id_str=bulk_update.category_id,
+            user_id=current_user.id
+        )
+        return BookBulkOperationResponse(results=results)
+    except ValueError as ve: # Invalid target category
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        logger.exception("/books/bulk/category endpoint - Unexpected error: %s - %s", type(e).__name__, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not update book categories.")
+
+@router.post("/bulk/delete", response_model=BookBulkOperationResponse)
+async def api_bulk_delete_books(
+    bulk_delete: BookBulkDelete,
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Delete several books (and their files) in one request.
+    The response reports a status per book id.
+    """
+    try:
+        results = await book_service.bulk_delete_books_for_user(
+            db=db, book_id_strs=bulk_delete.book_ids, user_id=current_user.id
+        )
+        return BookBulkOperationResponse(results=results)
+    except Exception as e:
+        logger.exception("/books/bulk/delete endpoint - Unexpected error: %s - %s", type(e).__name__, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not delete books.")
+
+
 @router.get("", response_model=List[BookPublic]) # GET /api/books
 async def api_list_user_books(
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
-    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_versioned_listing_database)],
+    response: Response,
+    category_id: Annotated[Optional[str], Query(description="Only return books in this category")] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     try:
-        return await book_service.get_user_books(db=db, user_id=current_user.id)
+        etag = make_etag("books", current_user.id, await get_library_version(db, current_user.id), category_id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
+        return await book_service.get_user_books(db=db, user_id=current_user.id, category_id_str=category_id)
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        logger.exception("Unhandled error in GET /api/books endpoint: %s", str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve books.")
+
+@router.get("/page", response_model=BookPage) # Must be declared before /{book_id}
+async def api_list_user_books_page(
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_versioned_listing_database)],
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=BOOKS_PAGE_SIZE_MAX, description="Page size")] = BOOKS_PAGE_SIZE_DEFAULT,
+    cursor: Annotated[Optional[str], Query(description="next_cursor from the previous page")] = None,
+    category_id: Annotated[Optional[str], Query(description="Only return books in this category")] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    List the current user's books newest first, one page at a time.
+    Pass the returned `next_cursor` to fetch the following page.
+    """
+    try:
+        etag = make_etag("books-page", current_user.id, await get_library_version(db, current_user.id), limit, cursor, category_id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
+        return await book_service.get_user_books_page(
+            db=db, user_id=current_user.id, limit=limit, cursor=cursor, category_id_str=category_id
+        )
+    except ValueError as ve: # Malformed cursor or category id
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
-        print(f"Unhandled error in GET /api/books endpoint: {str(e)}")
+        logger.exception("Unhandled error in GET /books/page endpoint: %s", str(e))
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve books.")
 
 @router.get("/{book_id}", response_model=BookPublic)
 async def api_get_book_details(
     book_id: Annotated[str, Path(description="The ID of the book to retrieve")],
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
+    etag = make_etag("book", current_user.id, await get_library_version(db, current_user.id), book_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
     book_db = await book_service.get_book_by_id_for_user(db=db, book_id_str=book_id, user_id=current_user.id)
     if not book_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found or access denied.")
@@ -105,9 +212,17 @@ async def api_get_book_details(
 @router.get("/{book_id}/pdf", response_class=FileResponse)
 async def api_serve_book_pdf(
     book_id: Annotated[str, Path(description="The ID of the book PDF to retrieve")],
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
+    book_db = await book_service.get_book_with_content_hashes(db=db, book_id_str=book_id, user_id=current_user.id)
+    if not book_db or not book_db.pdf_sha256:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PDF file not found or access denied.")
+    etag = make_etag("pdf", book_db.pdf_sha256)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, CACHE_CONTROL_IMMUTABLE)
+
     pdf_filepath = await book_service.get_book_pdf_filepath(db=db, book_id_str=book_id, user_id=current_user.id)
     if not pdf_filepath:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PDF file not found or access denied.")
@@ -118,7 +233,8 @@ async def api_serve_book_pdf(
     return FileResponse(
         path=pdf_filepath, 
         media_type='application/pdf', 
-        filename=filename # Suggests filename to browser, good for "Save As"
+        filename=filename, # Suggests filename to browser, good for "Save As"
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL_IMMUTABLE}
     )
 
 # Model for returning text content
@@ -130,27 +246,104 @@ class BookTextContentResponse(BaseModel):
 @router.get("/{book_id}/extracted-text", response_model=BookTextContentResponse)
 async def api_get_book_extracted_text(
     book_id: Annotated[str, Path(description="The ID of the book whose extracted text to retrieve")],
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
-    book_db = await book_service.get_book_by_id_for_user(db=db, book_id_str=book_id, user_id=current_user.id)
+    book_db = await book_service.get_book_with_content_hashes(db=db, book_id_str=book_id, user_id=current_user.id)
     if not book_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found or access denied.")
+    # The title is part of the response, so of the tag; checked before the file is read
+    etag = make_etag("extracted-text", book_db.id, book_db.text_sha256, book_db.title)
+    if book_db.text_sha256 and etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
     extracted_text = await book_service.get_book_extracted_text(db=db, book_id_str=book_id, user_id=current_user.id)
     if extracted_text is None: # Could be None if file not found or error reading
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Extracted text not found for this book.")
         
+    if book_db.text_sha256:
+        set_cache_headers(response, etag)
     return BookTextContentResponse(
         id=str(book_db.id),
         title=book_db.title,
         content=extracted_text
     )
+
+@router.get("/{book_id}/extracted-text/raw", response_class=FileResponse)
+async def api_get_book_extracted_text_raw(
+    book_id: Annotated[str, Path(description="The ID of the book whose extracted text to retrieve")],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    accept_encoding: Annotated[str, Header()] = "",
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    The extracted text as text/plain. Sent from the copy compressed at upload (brotli or
+    gzip, as the client accepts), so large books cost no compression work per request.
+    """
+    book_db = await book_service.get_book_with_content_hashes(db=db, book_id_str=book_id, user_id=current_user.id)
+    if not book_db or not book_db.text_sha256:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Extracted text not found for this book.")
+    etag = make_etag("extracted-text-raw", book_db.text_sha256)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    text_file = await book_service.get_book_extracted_text_file(
+        db=db, book_id_str=book_id, user_id=current_user.id, accept_encoding=accept_encoding
+    )
+    if not text_file:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Extracted text not found for this book.")
+    path, encoding = text_file
+    # Revalidated, not immutable: a legacy book's text can be rewritten under the same URL
+    headers = {"Vary": "Accept-Encoding", "ETag": with_encoding(etag, encoding), "Cache-Control": CACHE_CONTROL_REVALIDATE}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path=path, media_type="text/plain; charset=utf-8", headers=headers)
     
+@router.get("/{book_id}/chapters", response_model=BookChaptersResponse)
+async def api_get_book_chapters(
+    book_id: Annotated[str, Path(description="The ID of the book whose chapters to list")],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Chapter index of the book: title, page range and offsets into the extracted text.
+    """
+    book_db = await book_service.get_book_with_chapters(db=db, book_id_str=book_id, user_id=current_user.id)
+    if not book_db:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found or access denied.")
+    return BookChaptersResponse(
+        book_id=str(book_db.id),
+        source=book_db.chapter_source,
+        chapters=[BookChapterPublic.from_chapter(index, chapter) for index, chapter in enumerate(book_db.chapters)]
+    )
+
+@router.get("/{book_id}/chapters/{chapter_index}/text", response_model=BookChapterTextResponse)
+async def api_get_book_chapter_text(
+    book_id: Annotated[str, Path(description="The ID of the book")],
+    chapter_index: Annotated[int, Path(ge=0, description="Position of the chapter in the chapter index")],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+):
+    """
+    Text of one chapter, read directly from its range of the extracted text file.
+    """
+    result = await book_service.get_book_chapter_text(db=db, book_id_str=book_id, user_id=current_user.id, chapter_index=chapter_index)
+    if not result:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chapter not found or access denied.")
+    book_db, chapter, content = result
+    return BookChapterTextResponse(
+        **BookChapterPublic.from_chapter(chapter_index, chapter).model_dump(),
+        book_id=str(book_db.id),
+        content=content
+    )
+
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def api_delete_book(
     book_id: Annotated[str, Path(description="The ID of the book to delete")],
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     """
@@ -175,7 +368,7 @@ async def api_delete_book(
         raise he
     except Exception as e:
         # Log the detailed error on the server for diagnostics
-        print(f"ERROR: /books/{book_id} DELETE endpoint - Unexpected error: {type(e).__name__} - {e}")
+        logger.exception("/books/%s DELETE endpoint - Unexpected error: %s - %s", book_id, type(e).__name__, e)
         # Return a generic error response to the client
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,24 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Annotated 
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
+from typing import List, Annotated, Optional
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from models.category_schemas import CategoryCreate, CategoryPublic, CategoryUpdate
-from models.user_schemas import UserInDB # To type hint current_user
+from models.category_schemas import CategoryCreate, CategoryPublic, CategoryUpdate, CategoriesWithCountsResponse
+from models.user_schemas import CurrentUserIdentity # To type hint current_user
 from services import category_service
-from core.db import get_database
-from core.security import get_current_user
+from services.library_version import get_library_version
+from core.db import get_database, get_versioned_listing_database
+from core.http_cache import make_etag, etag_matches, not_modified, set_cache_headers
+from core.security import get_current_user_identity
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/categories",
     tags=["Categories"],
-    dependencies=[Depends(get_current_user)] # Protect all routes in this router
+    dependencies=[Depends(get_current_user_identity)] # Protect all routes in this router
 )
 
 @router.post("", response_model=CategoryPublic, status_code=status.HTTP_201_CREATED)
 async def create_new_category(
     category_in: CategoryCreate,
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     """
@@ -33,29 +38,57 @@ async def create_new_category(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
         # Log the exception e for server-side details
-        print(f"Error creating category: {e}")
+        logger.exception("Error creating category: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not create category.")
 
 @router.get("", response_model=List[CategoryPublic])
 async def list_categories_for_user(
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
-    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_versioned_listing_database)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     """
     List all categories for the current authenticated user.
+    Answers 304 when If-None-Match carries the current ETag.
     """
     try:
+        etag = make_etag("categories", current_user.id, await get_library_version(db, current_user.id))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
         categories_db = await category_service.get_categories_by_user(db=db, user_id=current_user.id)
         return [CategoryPublic.from_db_model(cat) for cat in categories_db]
     except Exception as e:
-        print(f"Error listing categories: {e}")
+        logger.exception("Error listing categories: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not retrieve categories.")
+
+@router.get("/with-counts", response_model=CategoriesWithCountsResponse)
+async def list_categories_with_book_counts(
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_versioned_listing_database)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    List all categories for the current authenticated user with the number of books in each,
+    plus the number of uncategorized books. Answers 304 when If-None-Match carries the current ETag.
+    """
+    try:
+        etag = make_etag("categories-with-counts", current_user.id, await get_library_version(db, current_user.id))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
+        return await category_service.get_categories_with_book_counts(db=db, user_id=current_user.id)
+    except Exception as e:
+        logger.exception("Error listing categories with counts: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not retrieve categories.")
 
 @router.put("/{category_id}", response_model=CategoryPublic)
 async def update_existing_category(
     category_id: str,
     category_update_data: CategoryUpdate,
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     """
@@ -71,13 +104,13 @@ async def update_existing_category(
     except ValueError as ve: # Catch duplicate name error
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
-        print(f"Error updating category {category_id}: {e}")
+        logger.exception("Error updating category %s: %s", category_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not update category.")
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_existing_category(
     category_id: str,
-    current_user: Annotated[UserInDB, Depends(get_current_user)],
+    current_user: Annotated[CurrentUserIdentity, Depends(get_current_user_identity)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     """
@@ -92,5 +125,5 @@ async def delete_existing_category(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found or you do not have permission to delete it.")
         return None # For 204 No Content
     except Exception as e:
-        print(f"Error deleting category {category_id}: {e}")
+        logger.exception("Error deleting category %s: %s", category_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not delete category.")
\ No newline at end of file
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from typing import Annotated 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
@@ -6,6 +7,9 @@ from models.user_schemas import UserPublic, UserUpdate, UserInDB, UserPasswordCh
 from services import user_service
 from core.db import get_database
 from core.security import get_current_user
+from core.rate_limit import enforce_auth_rate_limits
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/users",
@@ -43,14 +47,17 @@ async def update_current_user_profile(
 
 @router.post("/me/change-password", status_code=status.HTTP_204_NO_CONTENT)
 async def update_current_user_password(
+    request: Request,
     password_data: UserPasswordChange,
     current_user: Annotated[UserInDB, Depends(get_current_user)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
 ):
     """
     Change current logged-in user's password.
+    Signs out every session, this one included; log in again with the new password.
     """
     try:
+        await enforce_auth_rate_limits(request, email=current_user.email)
         success = await user_service.change_user_password(
             db=db, user=current_user, password_data=password_data
         )
@@ -71,7 +78,7 @@ async def update_current_user_password(
         raise he # Re-raise specific HTTPExceptions from the service
     except Exception as e:
         # Log the detailed error on the server for diagnostics
-        print(f"ERROR: /users/me/change-password endpoint - Unexpected error: {type(e).__name__} - {e}")
+        logger.exception("/users/me/change-password endpoint - Unexpected error: %s - %s", type(e).__name__, e)
         # Return a generic error response to the client
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,90 @@
+# backend/services/admin_service.py
+import logging
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import List, Optional
+
+from models.admin_schemas import IndexUsage, QueryPlanReport, IndexReportResponse
+from core.indexes import INDEX_REGISTRY, HOT_QUERIES
+
+logger = logging.getLogger(__name__)
+
+def _collect_plan_stages(plan: dict, stages: List[str], index_names: List[str]) -> None:
+    """Walks an explain() plan tree depth-first, collecting stage and index names."""
+    if not plan:
+        return
+    stages.append(plan.get("stage", "UNKNOWN"))
+    if plan.get("indexName"):
+        index_names.append(plan["indexName"])
+    if "inputStage" in plan:
+        _collect_plan_stages(plan["inputStage"], stages, index_names)
+    for child in plan.get("inputStages", []):
+        _collect_plan_stages(child, stages, index_names)
+
+def _stringify_values(doc: dict) -> dict:
+    return {k: v if isinstance(v, (int, float, str, bool, dict)) or v is None else str(v) for k, v in doc.items()}
+
+async def _get_index_usage(db: AsyncIOMotorDatabase, collection_name: str) -> List[IndexUsage]:
+    stats = await db[collection_name].aggregate([{"$indexStats": {}}]).to_list(length=None)
+    usage = []
+    for stat in stats:
+        accesses = int(stat.get("accesses", {}).get("ops", 0))
+        since = stat.get("accesses", {}).get("since")
+        usage.append(IndexUsage(
+            collection=collection_name,
+            name=stat["name"],
+            key=dict(stat.get("key", {})),
+            accesses=accesses,
+            since=since.isoformat() if since else None,
+            unused=accesses == 0
+        ))
+    return usage
+
+async def _explain_hot_query(db: AsyncIOMotorDatabase, query: dict) -> QueryPlanReport:
+    find_command = {"find": query["collection"], "filter": query["filter"]}
+    if query.get("sort"):
+        find_command["sort"] = query["sort"]
+    if query.get("collation"):
+        find_command["collation"] = query["collation"]
+
+    explain_result = await db.command("explain", find_command, verbosity="queryPlanner")
+    winning_plan = explain_result.get("queryPlanner", {}).get("winningPlan", {})
+    # Slot-based engine plans nest the classic plan under "queryPlan"
+    winning_plan = winning_plan.get("queryPlan", winning_plan)
+
+    stages: List[str] = []
+    index_names: List[str] = []
+    _collect_plan_stages(winning_plan, stages, index_names)
+    return QueryPlanReport(
+        collection=query["collection"],
+        filter=_stringify_values(query["filter"]),
+        sort=query.get("sort"),
+        winning_stages=stages,
+        index_name=index_names[0] if index_names else None,
+        collection_scan="COLLSCAN" in stages
+    )
+
+async def _get_collection_scans_total(db: AsyncIOMotorDatabase) -> Optional[int]:
+    try:
+        server_status = await db.client.admin.command("serverStatus")
+    except Exception as e: # Needs the clusterMonitor role; the report is still useful without it
+        logger.warning("serverStatus unavailable: %s", e)
+        return None
+    scans = server_status.get("metrics", {}).get("queryExecutor", {}).get("collectionScans", {})
+    return scans.get("total")
+
+async def get_index_report(db: AsyncIOMotorDatabase) -> IndexReportResponse:
+    """
+    Reports $indexStats for every registered collection and explains the registered
+    hot queries, flagging any whose winning plan is a collection scan.
+    """
+    indexes: List[IndexUsage] = []
+    for collection_name in INDEX_REGISTRY:
+        indexes.extend(await _get_index_usage(db, collection_name))
+
+    hot_queries = [await _explain_hot_query(db, query) for query in HOT_QUERIES]
+
+    return IndexReportResponse(
+        indexes=indexes,
+        hot_queries=hot_queries,
+        collection_scans_total=await _get_collection_scans_total(db)
+    )
@@ -1,191 +1,287 @@
 # learn-ease-fyp/backend/services/ai_service.py
-from transformers import T5ForConditionalGeneration, T5Tokenizer # For summarization
-import torch # For summarization
-import json
-import os
-from typing import List, Dict
-
-# --- Google Gemini API ---
-import google.generativeai as genai
-
-# Load configurations from environment variables
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest") # Default if not in .env
-
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+import asyncio
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional
+
+from core.logging_config import truncated
+from core.config import (
+    SUMMARIZATION_INFERENCE_MODE, SUMMARIZATION_PROFILE_PATH, INFERENCE_SERVER_ADDRESS, INFERENCE_REQUEST_TIMEOUT_SECONDS,
+    AI_CHUNKING_THRESHOLD_CHARS, AI_CHUNK_MAX_CHARS, AI_CHUNK_MAX_CONCURRENCY
+)
+from .summarization_profile import (
+    SUMMARIZATION_TIERS, DEFAULT_SUMMARIZATION_TIER, load_summarization_settings, tier_output_settings
+)
+from .inference_client import InferenceClient, InferenceUnavailableError, InferenceTimeoutError
+from .text_chunking import chunk_text
+from .json_stream_parser import JsonObjectStreamParser
+# --- Flashcards / Study Notes: Gemini or a local model, picked per request ---
+from .llm_providers import llm_router
+
+logger = logging.getLogger(__name__)
+
+# Also recorded with saved artifacts (services/artifact_service.py), so changing them regenerates
+FLASHCARDS_GENERATION_PARAMS = {"temperature": 0.2, "max_output_tokens": 1024}
+STUDY_NOTES_GENERATION_PARAMS = {"temperature": 0.5, "max_output_tokens": 1500}
+# Constrains the model's output (Gemini response_schema, Ollama format)
+FLASHCARDS_JSON_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"front": {"type": "string"}, "back": {"type": "string"}},
+        "required": ["front", "back"],
+    },
+}
+
+# --- Summarization (T5) ---
+# In "server" mode the model lives in the inference server processes and this worker
+# only needs the IPC client; otherwise it is loaded here (torch + transformers).
+if SUMMARIZATION_INFERENCE_MODE == "server":
+    summarization_engine = None
+    inference_client = InferenceClient(INFERENCE_SERVER_ADDRESS, INFERENCE_REQUEST_TIMEOUT_SECONDS)
+    # The server loads the same profile (same environment); read here for summary_artifact_params
+    summarization_settings = load_summarization_settings(SUMMARIZATION_PROFILE_PATH)
 else:
-    print("WARNING: GOOGLE_API_KEY not found in environment. AI generation features (Flashcards, Study Notes) will not work.")
+    from . import summarization_engine # Loads the model
+    inference_client = None
+    summarization_settings = summarization_engine.summarization_settings
 
-# --- Summarization Model (existing) ---
-MODEL_NAME_SUMMARIZE = "mohsinnyz/Booksum-Edu"
-tokenizer_summarize = None
-model_summarize = None
-device_summarize = None
+def is_summarization_available() -> bool:
+    if inference_client is not None:
+        return True # Checked per request; an unreachable server raises InferenceUnavailableError
+    return summarization_engine.is_model_loaded()
 
-def load_summarization_model():
-    global tokenizer_summarize, model_summarize, device_summarize
-    try:
-        print(f"INFO: AI Service - Initializing and loading tokenizer for {MODEL_NAME_SUMMARIZE}...")
-        tokenizer_summarize = T5Tokenizer.from_pretrained(MODEL_NAME_SUMMARIZE)
-        print(f"INFO: AI Service - Tokenizer for {MODEL_NAME_SUMMARIZE} loaded.")
+def summary_artifact_params(tier: str) -> dict:
+    """Parameters saved summaries are keyed by: the tier and what the tuning profile makes of it."""
+    return {"tier": tier, **tier_output_settings(summarization_settings, tier)}
 
-        print(f"INFO: AI Service - Initializing and loading model {MODEL_NAME_SUMMARIZE}...")
-        model_summarize = T5ForConditionalGeneration.from_pretrained(MODEL_NAME_SUMMARIZE)
-        print(f"INFO: AI Service - Model {MODEL_NAME_SUMMARIZE} loaded.")
+def summarization_weights_shared() -> bool:
+    return summarization_engine is not None and summarization_engine.summarization_weights_shared
 
-        device_summarize = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        model_summarize.to(device_summarize)
-        print(f"INFO: AI Service - Summarization model moved to {device_summarize}.")
+async def generate_summary(text_to_summarize: str, tier: str = DEFAULT_SUMMARIZATION_TIER) -> str:
+    # The check for the model being available should be done in the ROUTER
+    # (is_summarization_available) before calling this service function.
 
-    except Exception as e:
-        print(f"ERROR: AI Service - Failed to load summarization model or tokenizer '{MODEL_NAME_SUMMARIZE}': {e}")
-        tokenizer_summarize = None
-        model_summarize = None
-
-if model_summarize is None: 
-    load_summarization_model()
-
-async def generate_summary(text_to_summarize: str) -> str:
-    # The check for model_summarize and tokenizer_summarize being loaded
-    # should be done in the ROUTER before calling this service function.
-    # This service function assumes they are loaded if it's called.
-
-    if not model_summarize or not tokenizer_summarize: # This check can remain as an internal safeguard in the service
-        print("ERROR: AI Service (generate_summary) - Summarization model/tokenizer is not available. This should have been caught by the router.")
+    if not is_summarization_available(): # This check can remain as an internal safeguard in the service
+        logger.error("(generate_summary) Summarization model/tokenizer is not available. This should have been caught by the router.")
         raise Exception("Summarization model/tokenizer is not available internally.")
 
     if not text_to_summarize or len(text_to_summarize.strip()) < 20:
         return "Input text is too short to summarize effectively."
 
+    if tier not in SUMMARIZATION_TIERS:
+        raise ValueError(f"Unknown summarization tier '{tier}'.")
+
     try:
-        input_text_with_prefix = "summarize: " + text_to_summarize
-        inputs = tokenizer_summarize.encode( # Use specific summarization tokenizer
-            input_text_with_prefix,
-            return_tensors='pt',
-            max_length=512,
-            truncation=True,
-            padding='max_length'
-        ).to(device_summarize) # Use specific summarization device
-
-        summary_ids = model_summarize.generate( # Use specific summarization model
-            inputs,
-            num_beams=4,
-            max_length=150,
-            min_length=30,
-            length_penalty=2.0,
-            early_stopping=True
-        )
-        summary = tokenizer_summarize.decode(summary_ids[0], skip_special_tokens=True)
-        return summary
+        if inference_client is not None:
+            return await inference_client.summarize(text_to_summarize, tier)
+        return await summarization_engine.summarize(text_to_summarize, tier)
+    except (InferenceUnavailableError, InferenceTimeoutError):
+        raise # Mapped to 503/504 by the router
     except Exception as e:
-        print(f"ERROR: AI Service - Error during summarization with model {MODEL_NAME_SUMMARIZE}: {e}")
+        logger.error("Error during summarization (tier %s): %s", tier, e)
         raise Exception(f"Error generating summary: {str(e)}")
 
 
-# --- Helper function to call Gemini API and parse JSON list output (for Flashcards) ---
-async def _call_gemini_for_json_list(prompt: str, error_context: str) -> List[Dict[str, str]]:
-    if not GOOGLE_API_KEY:
-        print(f"ERROR: AI Service ({error_context}) - GOOGLE_API_KEY is not configured.")
-        raise Exception(f"{error_context} service is not configured (API Key missing).")
-    if not GEMINI_MODEL_NAME:
-        print(f"ERROR: AI Service ({error_context}) - GEMINI_MODEL_NAME is not configured.")
-        raise Exception(f"{error_context} service is not configured (Model Name missing).")
-
-    raw_generated_text = "" 
-    parsed_flashcard_data = [] 
+# --- Helper function to stream JSON objects from the LLM router (for Flashcards) ---
+async def _stream_llm_json_objects(prompt: str, error_context: str) -> AsyncIterator[Dict[str, str]]:
+    """
+    Yields each valid {front, back} object as soon as it is complete in the model's
+    streamed output. Malformed objects are skipped. An error after some objects have been
+    yielded is still raised, so the caller knows the list is incomplete but keeps them.
+    """
+    if llm_router.preferred is None:
+        logger.error("(%s) No LLM provider is configured.", error_context)
+        raise Exception(f"{error_context} service is not configured (no LLM provider; set GOOGLE_API_KEY or LOCAL_LLM_URL).")
 
+    parser = JsonObjectStreamParser()
+    yielded = 0
     try:
-        print(f"INFO: AI Service ({error_context}) - Calling Gemini API ({GEMINI_MODEL_NAME}).")
-        gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
-        generation_config = genai.types.GenerationConfig(
-            temperature=0.2, 
-            max_output_tokens=1024 
-        )
-        # The prompt for flashcards already asks for JSON, so no need to add "Output:\n" here
-        # if it makes the model add conversational fluff.
-        
-        if hasattr(gemini_model, 'generate_content_async'):
-            response = await gemini_model.generate_content_async(prompt, generation_config=generation_config)
-        else:
-            print(f"WARN: AI Service ({error_context}) - generate_content_async not found. Update 'google-generativeai'. This will block.")
-            response = gemini_model.generate_content(prompt, generation_config=generation_config)
-        
-        if not response.parts:
-            print(f"ERROR: AI Service ({error_context}) - Gemini API response has no parts. Full response: {response}")
-            if response.prompt_feedback and response.prompt_feedback.block_reason:
-                raise Exception(f"Gemini API call blocked for {error_context}: {response.prompt_feedback.block_reason_message}")
-            return []
-
-        raw_generated_text = response.text.strip()
-        print(f"DEBUG: AI Service ({error_context}) - Gemini API Raw Response Text: {raw_generated_text}")
-        
-        # --- More Robust JSON Cleaning and Extraction ---
-        # Attempt to remove markdown code block fences if present
-        cleaned_text = raw_generated_text
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[len("```json"):]
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[len("```"):]
-        
-        if cleaned_text.endswith("```"):
-            cleaned_text = cleaned_text[:-len("```")]
-        
-        cleaned_text = cleaned_text.strip() # Final strip
-
-        if not cleaned_text:
-            print(f"ERROR: AI Service ({error_context}) - Content became empty after cleaning attempts.")
-            return []
-        
-        print(f"DEBUG: AI Service ({error_context}) - Text after initial cleaning for JSON: '{cleaned_text}'")
-
-        # Find the first '[' and the last ']'
-        json_start_index = cleaned_text.find('[')
-        json_end_index = cleaned_text.rfind(']')
-
-        if json_start_index != -1 and json_end_index != -1 and json_end_index > json_start_index:
-            json_string_to_parse = cleaned_text[json_start_index : json_end_index+1]
-            print(f"DEBUG: AI Service ({error_context}) - Extracted JSON string for parsing: '{json_string_to_parse}'")
-            parsed_flashcard_data = json.loads(json_string_to_parse)
-        else:
-            # If no clear array found, try parsing the whole cleaned string (might fail)
-            print(f"WARN: AI Service ({error_context}) - Could not find clear JSON array [..] in Gemini output. Attempting to parse cleaned string as is: '{cleaned_text}'")
-            parsed_flashcard_data = json.loads(cleaned_text) 
-        # --- End Robust JSON Cleaning ---
-
-        if not isinstance(parsed_flashcard_data, list):
-            raise ValueError("Parsed data is not a list.")
-        
-        validated_items = []
-        for item in parsed_flashcard_data:
-            if isinstance(item, dict) and "front" in item and "back" in item:
-                validated_items.append({"front": str(item["front"]), "back": str(item["back"])})
-            else:
-                print(f"WARN: AI Service ({error_context}) - Skipping invalid item: {item}")
-        
-        if not validated_items and parsed_flashcard_data:
-            raise ValueError("No valid items found after validation.")
-        return validated_items
-
-    except json.JSONDecodeError as e:
-        # Use raw_generated_text in error if cleaned_text parsing failed, or json_string_to_parse if that was attempted
-        text_that_failed_parsing = json_string_to_parse if 'json_string_to_parse' in locals() and json_string_to_parse else cleaned_text if 'cleaned_text' in locals() and cleaned_text else raw_generated_text
-        print(f"ERROR: AI Service ({error_context}) - Failed to decode JSON. Text attempted for parsing was: '{text_that_failed_parsing}'. Error: {e}")
-        raise Exception(f"Failed to parse {error_context} data from Gemini API (JSONDecodeError).")
-    except ValueError as e: # Catches validation errors for list/dict structure
-        print(f"ERROR: AI Service ({error_context}) - Data structure validation failed. Parsed data: {parsed_flashcard_data}. Error: {e}")
-        raise Exception(f"{error_context} data from Gemini API has incorrect structure: {e}")
+        async for piece in llm_router.stream(prompt, FLASHCARDS_GENERATION_PARAMS, error_context, json_schema=FLASHCARDS_JSON_SCHEMA):
+            for item in parser.feed(piece):
+                if "front" in item and "back" in item:
+                    yielded += 1
+                    yield {"front": str(item["front"]), "back": str(item["back"])}
+                else:
+                    logger.warning("(%s) Skipping invalid item: %s", error_context, truncated(item))
     except Exception as e:
-        print(f"ERROR: AI Service ({error_context}) - Error during Gemini API call: {type(e).__name__} - {e}")
-        raise Exception(f"An unexpected error occurred while generating {error_context} with Gemini: {str(e)}")
-
-
-# --- Flashcard Generation using Gemini ---
+        logger.error("(%s) Error during LLM stream after %s items: %s - %s", error_context, yielded, type(e).__name__, e)
+        raise Exception(f"An unexpected error occurred while generating {error_context}: {str(e)}")
+    finally:
+        dropped = parser.close()
+        if dropped:
+            logger.warning("(%s) Stream ended inside an object; dropped its %s characters.", error_context, dropped)
+
+    if not yielded and (parser.objects_parsed or parser.objects_skipped):
+        raise Exception(f"{error_context} data from the LLM has incorrect structure: no valid items found.")
+
+
+# --- Long selections: map the prompt over chunks concurrently, then merge ---
+# Results that are missing part of their selection, see record_partial_results()
+_partial_results: ContextVar[Optional[list]] = ContextVar("ai_partial_results", default=None)
+
+@contextmanager
+def record_partial_results():
+    """
+    Collects a note for every result produced inside the block that is missing parts of
+    its input (failed chunks, a stream that broke off, a placeholder for an empty answer).
+    Such results are returned, but should not be saved as the result for the selection.
+    """
+    partial = []
+    token = _partial_results.set(partial)
+    try:
+        yield partial
+    finally:
+        _partial_results.reset(token)
+
+def _note_partial_result(note: str) -> None:
+    partial = _partial_results.get()
+    if partial is not None:
+        partial.append(note)
+
+def _should_chunk(text: str) -> bool:
+    return AI_CHUNKING_THRESHOLD_CHARS > 0 and len(text) > AI_CHUNKING_THRESHOLD_CHARS
+
+def _part_note(part: int, total: int) -> str:
+    return f"\nThis text is part {part} of {total} of a longer selection; cover only what this part contains.\n"
+
+async def _map_chunks(chunks: List[str], generate: Callable[[str, str], Awaitable], operation: str) -> list:
+    """
+    Runs generate(chunk, part_note) for every chunk, at most AI_CHUNK_MAX_CONCURRENCY at a
+    time, so latency follows the slowest chunk rather than the total length. Returns the
+    results in chunk order, with an exception in place of each failed chunk (and records
+    a partial result); raises only if every chunk failed.
+    """
+    semaphore = asyncio.Semaphore(max(1, AI_CHUNK_MAX_CONCURRENCY))
+
+    async def run(index: int, chunk: str):
+        async with semaphore:
+            return await generate(chunk, _part_note(index + 1, len(chunks)))
+
+    logger.info("(%s) Generating from %s chunks of up to %s chars.", operation, len(chunks), AI_CHUNK_MAX_CHARS)
+    results = await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks)), return_exceptions=True)
+    failures = [result for result in results if isinstance(result, Exception)]
+    if len(failures) == len(chunks):
+        raise failures[0]
+    if failures:
+        logger.warning("(%s) %s of %s chunks failed; first error: %s", operation, len(failures), len(chunks), failures[0])
+        _note_partial_result(f"{len(failures)} of {len(chunks)} chunks failed")
+    return results
+
+def _normalize_front(front: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", front.lower()).split())
+
+async def _stream_chunks(chunks: List[str], stream: Callable[[str, str], AsyncIterator], operation: str) -> AsyncIterator:
+    """
+    Streaming counterpart of _map_chunks: runs stream(chunk, part_note) for every chunk,
+    at most AI_CHUNK_MAX_CONCURRENCY at a time, and yields items as any chunk produces
+    them (so not in chunk order). Raises the first error only if every chunk failed;
+    otherwise failed chunks are recorded as a partial result.
+    """
+    semaphore = asyncio.Semaphore(max(1, AI_CHUNK_MAX_CONCURRENCY))
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def run(index: int, chunk: str):
+        try:
+            async with semaphore:
+                async for item in stream(chunk, _part_note(index + 1, len(chunks))):
+                    queue.put_nowait(item)
+        finally:
+            queue.put_nowait(finished)
+
+    logger.info("(%s) Streaming from %s chunks of up to %s chars.", operation, len(chunks), AI_CHUNK_MAX_CHARS)
+    tasks = [asyncio.ensure_future(run(i, chunk)) for i, chunk in enumerate(chunks)]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is finished:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+    failures = [task.exception() for task in tasks if not task.cancelled() and task.exception()]
+    if len(failures) == len(chunks):
+        raise failures[0]
+    if failures:
+        logger.warning("(%s) %s of %s chunks failed; first error: %s", operation, len(failures), len(chunks), failures[0])
+        _note_partial_result(f"{len(failures)} of {len(chunks)} chunks failed")
+
+_NOTES_HEADING_RE = re.compile(r"^(#{1,2})\s+(.*?)\s*$")
+_CONCLUSION_RE = re.compile(r"^\W*conclusions?\b", re.IGNORECASE)
+
+def _merge_study_notes(parts: List[str]) -> str:
+    """
+    Stitches per-chunk notes into one document: an outline of all major (##) headings,
+    the sections in order, then the chunks' conclusions combined into a single Conclusion.
+    Per-chunk titles (#) are dropped.
+    """
+    outline, sections, conclusions = [], [], []
+    for part in parts:
+        body, conclusion, in_conclusion = [], [], False
+        for line in part.splitlines():
+            heading = _NOTES_HEADING_RE.match(line)
+            if heading:
+                title = heading.group(2).strip("* ")
+                in_conclusion = bool(_CONCLUSION_RE.match(title))
+                if in_conclusion or heading.group(1) == "#":
+                    continue
+                if title not in outline:
+                    outline.append(title)
+            (conclusion if in_conclusion else body).append(line)
+        sections.append("\n".join(body).strip())
+        if "\n".join(conclusion).strip():
+            conclusions.append("\n".join(conclusion).strip())
+
+    document = ["## Outline", "\n".join(f"{i}. {title}" for i, title in enumerate(outline, 1))]
+    document.extend(section for section in sections if section)
+    if conclusions:
+        document.extend(["## Conclusion", "\n".join(conclusions)])
+    return "\n\n".join(document)
+
+
+# --- Flashcard Generation ---
 async def generate_flashcards_from_text(text_to_generate_from: str) -> List[Dict[str, str]]:
+    flashcards = []
+    try:
+        async for card in stream_flashcards_from_text(text_to_generate_from):
+            flashcards.append(card)
+    except Exception as e:
+        if not flashcards:
+            raise
+        logger.warning("(flashcards) Generation failed after %s cards; returning those: %s", len(flashcards), e)
+        _note_partial_result(f"generation failed after {len(flashcards)} cards")
+    return flashcards
+
+async def stream_flashcards_from_text(text_to_generate_from: str) -> AsyncIterator[Dict[str, str]]:
+    """
+    Yields flashcards as the model produces them, skipping repeated fronts. Long selections
+    are streamed from all their chunks concurrently. An error raised after some cards
+    leaves those cards valid.
+    """
     if not text_to_generate_from or len(text_to_generate_from.strip()) < 10:
-        print("WARN: AI Service - Input text for flashcards is too short.")
-        return []
+        logger.warning("Input text for flashcards is too short.")
+        return
 
+    if _should_chunk(text_to_generate_from):
+        cards = _stream_chunks(
+            chunk_text(text_to_generate_from, AI_CHUNK_MAX_CHARS), _stream_flashcards_for_text, "flashcards"
+        )
+    else:
+        cards = _stream_flashcards_for_text(text_to_generate_from)
+    seen = set()
+    async for card in cards:
+        key = _normalize_front(card["front"])
+        if key and key not in seen:
+            seen.add(key)
+            yield card
+
+def _stream_flashcards_for_text(text_to_generate_from: str, part_note: str = "") -> AsyncIterator[Dict[str, str]]:
     prompt = f"""From the following text, generate a concise list of flashcards focusing on the most essential concepts.
 
     Guidelines:
@@ -198,21 +294,31 @@ async def generate_flashcards_from_text(text_to_generate_from: str) -> List[Dict
 - Prioritize uniqueness, depth, and relevance of the concepts.
 
 Only output valid JSON, no markdown formatting or introductory/explanatory text.
-
+{part_note}
 Text to process:
 ---
 {text_to_generate_from}
 ---
 """ # Added "Flashcards JSON:" to guide the model to start the JSON immediately.
-    return await _call_gemini_for_json_list(prompt, "flashcards")
+    return _stream_llm_json_objects(prompt, "flashcards")
 
 
-# --- Study Notes Generation using Gemini ---
+# --- Study Notes Generation ---
 async def generate_study_notes_from_text(text_to_generate_from: str) -> str:
     if not text_to_generate_from or len(text_to_generate_from.strip()) < 20:
-        print("WARN: AI Service - Input text for study notes is too short.")
+        logger.warning("Input text for study notes is too short.")
         return "Input text is too short to generate effective study notes."
 
+    if _should_chunk(text_to_generate_from):
+        chunks = chunk_text(text_to_generate_from, AI_CHUNK_MAX_CHARS)
+        results = await _map_chunks(chunks, _generate_study_notes_for_text, "study_notes")
+        return _merge_study_notes([
+            f"_(Notes for part {i} of {len(chunks)} could not be generated.)_" if isinstance(notes, Exception) else notes
+            for i, notes in enumerate(results, 1)
+        ])
+    return await _generate_study_notes_for_text(text_to_generate_from)
+
+async def _generate_study_notes_for_text(text_to_generate_from: str, part_note: str = "") -> str:
     prompt = f"""You are an expert educational assistant. Your task is to generate *comprehensive, clearly structured, and visually well-formatted study notes* from the following academic text.
 
 ### Instructions:
@@ -232,52 +338,31 @@ async def generate_study_notes_from_text(text_to_generate_from: str) -> str:
 ### Output Style:
 - The final output should be a *single markdown-formatted text block* ready for display in a study application.
 - The tone should be academic but accessible to students.
-
+{part_note}
 Text to process:
 ---
 {text_to_generate_from}
 ---
 """ 
     
-    if not GOOGLE_API_KEY:
-        print("ERROR: AI Service (Study Notes) - GOOGLE_API_KEY is not configured.")
-        raise Exception("Study notes generation service is not configured (API Key missing).")
-    if not GEMINI_MODEL_NAME:
-        print(f"ERROR: AI Service (Study Notes) - GEMINI_MODEL_NAME is not configured.")
-        raise Exception(f"Study notes service is not configured (Model Name missing).")
+    if llm_router.preferred is None:
+        logger.error("(Study Notes) No LLM provider is configured.")
+        raise Exception("Study notes generation service is not configured (no LLM provider; set GOOGLE_API_KEY or LOCAL_LLM_URL).")
     
     raw_generated_text_notes = ""
 
     try:
-        print(f"INFO: AI Service (Study Notes) - Calling Gemini API ({GEMINI_MODEL_NAME}).")
-        gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
-        generation_config = genai.types.GenerationConfig(
-            temperature=0.5, 
-            max_output_tokens=1500 
-        )
-        
-        if hasattr(gemini_model, 'generate_content_async'):
-            response = await gemini_model.generate_content_async(prompt, generation_config=generation_config)
-        else:
-            print(f"WARN: AI Service (Study Notes) - generate_content_async not found. Update 'google-generativeai'. This will block.")
-            response = gemini_model.generate_content(prompt, generation_config=generation_config)
-
-        if not response.parts:
-            print(f"ERROR: AI Service (Study Notes) - Gemini API response has no parts. Full response: {response}")
-            if response.prompt_feedback and response.prompt_feedback.block_reason:
-                raise Exception(f"Gemini API call blocked for Study Notes: {response.prompt_feedback.block_reason_message}")
-            return "The AI could not generate study notes (empty response parts)."
-
-        raw_generated_text_notes = response.text.strip()
-        print(f"DEBUG: AI Service (Study Notes) - Gemini API Raw Response Text: {raw_generated_text_notes}")
+        raw_generated_text_notes = (await llm_router.generate(prompt, STUDY_NOTES_GENERATION_PARAMS, "study_notes")).strip()
+        logger.debug("(Study Notes) LLM raw response text: %s", truncated(raw_generated_text_notes))
         
         if not raw_generated_text_notes:
-            print("ERROR: AI Service (Study Notes) - Gemini API returned empty content.")
+            logger.error("(Study Notes) LLM returned empty content.")
+            _note_partial_result("empty study notes answer")
             return "The AI could not generate study notes from the selected text."
         
         return raw_generated_text_notes
 
     except Exception as e:
-        print(f"ERROR: AI Service (Study Notes) - Error during Gemini API call: {type(e).__name__} - {e}") # Corrected typo
-        raise Exception(f"An unexpected error occurred while generating study notes with Gemini: {str(e)}")
+        logger.error("(Study Notes) Error during LLM call: %s - %s", type(e).__name__, e) # Corrected typo
+        raise Exception(f"An unexpected error occurred while generating study notes: {str(e)}")
 
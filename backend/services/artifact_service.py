@@ -0,0 +1,186 @@
+# backend/services/artifact_service.py
+# Generated summaries, flashcards and study notes, saved per book and text span so that
+# revisiting a selection is a single indexed read instead of another model call.
+# An artifact is reused only when the span, the selected text, the model and the
+# generation parameters all match.
+
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from models.artifact_schemas import ArtifactInDB, ArtifactSpan, ARTIFACT_INFO_PROJECTION
+from models.user_schemas import PyObjectId
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_COLLECTION = "artifacts"
+BOOKS_COLLECTION = "books"
+
+def params_key(model: str, params: dict) -> str:
+    return hashlib.sha256(json.dumps({"model": model, "params": params}, sort_keys=True).encode()).hexdigest()
+
+def source_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _lookup_filter(user_id: PyObjectId, book_oid: ObjectId, kind: str, span: ArtifactSpan, model: str, params: dict, text: str) -> dict:
+    # Field order matches the unique index in core/indexes.py
+    return {
+        "user_id": user_id,
+        "book_id": book_oid,
+        "span.start_page": span.start_page,
+        "span.end_page": span.end_page,
+        "span.start_offset": span.start_offset,
+        "span.end_offset": span.end_offset,
+        "kind": kind,
+        "params_key": params_key(model, params),
+        "source_sha256": source_sha256(text),
+    }
+
+async def find_artifact(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    book_id_str: str,
+    kind: str,
+    span: ArtifactSpan,
+    model: str,
+    params: dict,
+    text: str
+) -> tuple[Optional[ArtifactInDB], bool]:
+    """
+    Returns (artifact, book_found): the stored artifact for the selection, if any, and
+    whether the book exists and belongs to the user.
+    """
+    if not ObjectId.is_valid(book_id_str):
+        return None, False
+    book_oid = ObjectId(book_id_str)
+    artifact_doc = await db[ARTIFACTS_COLLECTION].find_one(_lookup_filter(user_id, book_oid, kind, span, model, params, text))
+    if artifact_doc:
+        return ArtifactInDB(**artifact_doc), True
+
+    # Only checked on a miss: a stored artifact already proves the book is the user's
+    book_found = await db[BOOKS_COLLECTION].find_one({"_id": book_oid, "user_id": user_id}, {"_id": 1}) is not None
+    return None, book_found
+
+async def save_artifact(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    book_id_str: str,
+    kind: str,
+    span: ArtifactSpan,
+    model: str,
+    params: dict,
+    text: str,
+    content: Any
+) -> ArtifactInDB:
+    """Saves generated content for the selection (the book must have been checked with find_artifact)."""
+    lookup = _lookup_filter(user_id, ObjectId(book_id_str), kind, span, model, params, text)
+    artifact = ArtifactInDB(
+        user_id=user_id, book_id=lookup["book_id"], kind=kind, span=span, model=model, params=params,
+        params_key=lookup["params_key"], source_sha256=lookup["source_sha256"], content=content
+    )
+    # Upsert on the lookup key: concurrent first visits of the same selection keep one document
+    saved_doc = await db[ARTIFACTS_COLLECTION].find_one_and_update(
+        lookup,
+        {
+            "$set": {"content": content, "created_at": artifact.created_at},
+            "$setOnInsert": {"_id": artifact.id, "model": model, "params": params},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return ArtifactInDB(**saved_doc)
+
+async def get_or_create_artifact(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    book_id_str: str,
+    kind: str,
+    span: ArtifactSpan,
+    model: str,
+    params: dict,
+    text: str,
+    generate: Callable[[], Awaitable[Any]],
+    keep: Optional[Callable[[], bool]] = None
+) -> tuple[Optional[ArtifactInDB], bool]:
+    """
+    Returns (artifact, reused). A stored artifact for the same selection is returned as is;
+    otherwise generate() is awaited and its result saved. Returns (None, False) if the
+    book does not exist or belongs to someone else. Empty results are returned without
+    being saved, so a failed generation is retried on the next visit; so are results for
+    which keep() returns False (e.g. produced by a fallback model rather than `model`).
+    """
+    artifact, book_found = await find_artifact(db, user_id, book_id_str, kind, span, model, params, text)
+    if artifact:
+        return artifact, True
+    if not book_found:
+        return None, False
+
+    content = await generate()
+    if not content or (keep is not None and not keep()):
+        return ArtifactInDB(
+            user_id=user_id, book_id=ObjectId(book_id_str), kind=kind, span=span, model=model, params=params,
+            params_key=params_key(model, params), source_sha256=source_sha256(text), content=content
+        ), False
+    return await save_artifact(db, user_id, book_id_str, kind, span, model, params, text, content), False
+
+async def list_artifacts_for_book(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    book_id_str: str,
+    kind: Optional[str] = None
+) -> Optional[List[dict]]:
+    """
+    Artifact documents (without content, see ARTIFACT_INFO_PROJECTION) in reading order.
+    Returns None for an invalid book id.
+    """
+    if not ObjectId.is_valid(book_id_str):
+        return None
+    query = {"user_id": user_id, "book_id": ObjectId(book_id_str)}
+    if kind:
+        query["kind"] = kind
+    cursor = db[ARTIFACTS_COLLECTION].find(query, ARTIFACT_INFO_PROJECTION).sort(
+        [("span.start_page", 1), ("span.end_page", 1), ("span.start_offset", 1)]
+    )
+    return await cursor.to_list(length=None)
+
+async def get_artifact_for_user(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    book_id_str: str,
+    artifact_id_str: str
+) -> Optional[dict]:
+    if not ObjectId.is_valid(book_id_str) or not ObjectId.is_valid(artifact_id_str):
+        return None
+    return await db[ARTIFACTS_COLLECTION].find_one(
+        {"_id": ObjectId(artifact_id_str), "user_id": user_id, "book_id": ObjectId(book_id_str)}
+    )
+
+async def delete_artifact_for_user(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    book_id_str: str,
+    artifact_id_str: str
+) -> bool:
+    if not ObjectId.is_valid(book_id_str) or not ObjectId.is_valid(artifact_id_str):
+        return False
+    delete_result = await db[ARTIFACTS_COLLECTION].delete_one(
+        {"_id": ObjectId(artifact_id_str), "user_id": user_id, "book_id": ObjectId(book_id_str)}
+    )
+    return delete_result.deleted_count == 1
+
+async def delete_artifacts_for_books(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    book_oids: List[ObjectId]
+) -> None:
+    """Called when books are deleted."""
+    if not book_oids:
+        return
+    delete_result = await db[ARTIFACTS_COLLECTION].delete_many({"user_id": user_id, "book_id": {"$in": book_oids}})
+    if delete_result.deleted_count:
+        logger.info("Deleted %s artifacts of %s deleted book(s) for user %s.", delete_result.deleted_count, len(book_oids), user_id)
@@ -1,19 +1,35 @@
 #C:\Users\mohsi\Projects\learn-ease-fyp\backend\services\book_service.py
 
+import logging
 import os
 import uuid
 import shutil
+import asyncio
+import base64
+import json
+import hashlib
 import fitz 
+import time
 from fastapi import UploadFile, HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
+from collections import Counter
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 
-from models.book_schemas import BookCreateInternal, BookInDB, BookPublic, PyObjectId
-from models.user_schemas import UserInDB 
-from core.config import LOCAL_BOOK_UPLOAD_DIR, LOCAL_EXTRACTED_TEXT_DIR
-from . import category_service
+from models.book_schemas import (
+    BookCreateInternal, BookInDB, BookPublic, BookPage, BookBulkResultItem, BookChapter, PyObjectId, BOOK_PUBLIC_PROJECTION
+)
+from models.user_schemas import CurrentUserIdentity
+from core.config import LOCAL_BOOK_UPLOAD_DIR, LOCAL_EXTRACTED_TEXT_DIR, BOOKS_PAGE_SIZE_DEFAULT, BOOKS_PAGE_SIZE_MAX
+from core.metrics import BOOK_UPLOAD_BYTES, BOOK_EXTRACTION_DURATION, BOOK_EXTRACTION_PAGES_PER_SECOND
+from core.compression import write_precompressed_variants, precompressed_paths, find_precompressed_variant
+from . import category_service, artifact_service
+from .library_version import bump_library_version
+from .chapter_index import build_chapter_index
+
+logger = logging.getLogger(__name__)
 
 # Ensure upload directories exist when the service module is loaded
 os.makedirs(LOCAL_BOOK_UPLOAD_DIR, exist_ok=True)
@@ -24,7 +40,7 @@ BOOKS_COLLECTION = "books"
 async def process_and_save_book(
     db: AsyncIOMotorDatabase,
     file: UploadFile,
-    current_user: UserInDB,
+    current_user: CurrentUserIdentity,
     title_from_user: Optional[str] = None, # Optional title from user
     category_id_str: Optional[str] = None  # <<< NEW Optional category_id string
 ) -> BookPublic:
@@ -66,19 +82,36 @@ async def process_and_save_book(
         with open(pdf_save_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         file_size_bytes = os.path.getsize(pdf_save_path)
+        pdf_sha256 = _file_sha256(pdf_save_path)
+        BOOK_UPLOAD_BYTES.inc(file_size_bytes)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not save PDF: {str(e)}")
     finally:
         await file.close()
 
     try:
+        extraction_start = time.perf_counter()
         doc = fitz.open(pdf_save_path)
-        extracted_text = "".join(page.get_text() for page in doc)
+        page_count = doc.page_count
+        page_texts = [page.get_text() for page in doc]
+        toc = doc.get_toc()
         doc.close()
-        with open(text_save_path, "w", encoding="utf-8") as text_f:
+        extraction_seconds = time.perf_counter() - extraction_start
+        BOOK_EXTRACTION_DURATION.observe(extraction_seconds)
+        if extraction_seconds > 0:
+            BOOK_EXTRACTION_PAGES_PER_SECOND.observe(page_count / extraction_seconds)
+        chapter_source, chapters = build_chapter_index(page_texts, toc)
+        # newline="" keeps the file byte-for-byte equal to the text, so chapter byte offsets hold on every OS
+        extracted_text = "".join(page_texts)
+        with open(text_save_path, "w", encoding="utf-8", newline="") as text_f:
             text_f.write(extracted_text)
+        text_sha256 = hashlib.sha256(extracted_text.encode("utf-8")).hexdigest()
+        # Compressed once here, served as is by /extracted-text/raw; off the event loop,
+        # brotli at its highest quality takes about a second per MB
+        await asyncio.to_thread(write_precompressed_variants, text_save_path)
     except Exception as e:
-        if os.path.exists(pdf_save_path): os.remove(pdf_save_path)
+        for path in [pdf_save_path, text_save_path, *precompressed_paths(text_save_path)]:
+            if os.path.exists(path): os.remove(path)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to extract text from PDF: {str(e)}")
 
     book_meta = BookCreateInternal(
@@ -93,35 +126,27 @@ async def process_and_save_book(
         category_id=category_oid # <<< ASSIGN VALIDATED category_oid
     )
     
-    book_doc_for_db = BookInDB(
+    book_in_db_instance = BookInDB(
         **book_meta.model_dump(), 
-        status="ready"
-    ).model_dump(by_alias=True, exclude_none=True) # Use exclude_none=True
-
-    if book_doc_for_db.get("_id") is None: # Ensure _id is not sent if it's meant to be auto-generated by MongoDB
-        book_doc_for_db.pop("_id", None)
-
-
-    result = await db[BOOKS_COLLECTION].insert_one(book_doc_for_db)
-    created_book_doc_from_db = await db[BOOKS_COLLECTION].find_one({"_id": result.inserted_id})
-    if not created_book_doc_from_db:
-        if os.path.exists(pdf_save_path): os.remove(pdf_save_path)
-        if os.path.exists(text_save_path): os.remove(text_save_path)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to save book metadata after file processing.")
-    
-    # Explicitly try to print what's in created_book_doc_from_db before Pydantic conversion
-    print(f"DEBUG: Raw doc from DB before BookInDB instantiation: {created_book_doc_from_db}")
+        status="ready",
+        chapters=chapters,
+        chapter_source=chapter_source,
+        pdf_sha256=pdf_sha256,
+        text_sha256=text_sha256
+    )
+    # The _id is generated client-side, so the inserted document is already the full record
+    book_doc_for_db = book_in_db_instance.model_dump(by_alias=True, exclude_none=True) # Use exclude_none=True
 
     try:
-        # Ensure all fields including inherited ones are passed correctly
-        # Pydantic should handle the _id to id aliasing due to Config.populate_by_name = True
-        # and alias="_id" on the id field.
-        book_in_db_instance = BookInDB(**created_book_doc_from_db)
-        print(f"DEBUG: BookInDB instance original_filename: {getattr(book_in_db_instance, 'original_filename', 'NOT FOUND')}")
-    except Exception as pydantic_error:
-        print(f"ERROR: Pydantic validation/instantiation error for BookInDB: {pydantic_error}")
-        print(f"ERROR: Data passed to BookInDB: {created_book_doc_from_db}")
-        raise # Re-raise the Pydantic error to see its traceback
+        await db[BOOKS_COLLECTION].insert_one(book_doc_for_db)
+    except Exception as e:
+        for path in [pdf_save_path, text_save_path, *precompressed_paths(text_save_path)]:
+            if os.path.exists(path): os.remove(path)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to save book metadata after file processing: {str(e)}")
+
+    if category_oid:
+        await category_service.adjust_category_book_counts(db, current_user.id, {category_oid: 1})
+    await bump_library_version(db, current_user.id)
 
     return book_in_db_instance # Return BookInDB instance
 
@@ -138,9 +163,10 @@ async def update_book_category(
     Updates the category of a specific book for a user.
     If new_category_id_str is None, the book becomes uncategorized.
     """
-    book_to_update = await get_book_by_id_for_user(db, book_id_str, user_id)
-    if not book_to_update:
-        return None # Book not found or doesn't belong to user
+    try:
+        book_oid = PyObjectId(book_id_str)
+    except Exception:
+        return None # Invalid book_id format
 
     new_category_oid: Optional[PyObjectId] = None
     if new_category_id_str:
@@ -150,28 +176,87 @@ async def update_book_category(
             raise ValueError(f"Target category ID '{new_category_id_str}' not found or does not belong to user.")
         new_category_oid = category_obj.id
     
-    update_result = await db[BOOKS_COLLECTION].update_one(
-        {"_id": book_to_update.id, "user_id": user_id},
-        {"$set": {"category_id": new_category_oid}}
+    # Ownership check and update in a single round trip. The pre-update document gives
+    # the old category for the book counters; the updated state is derived from it.
+    previous_book_doc = await db[BOOKS_COLLECTION].find_one_and_update(
+        {"_id": book_oid, "user_id": user_id},
+        {"$set": {"category_id": new_category_oid}},
+        return_document=ReturnDocument.BEFORE
     )
+    if not previous_book_doc:
+        return None # Book not found or doesn't belong to user
 
-    if update_result.modified_count == 1:
-        updated_book_doc = await db[BOOKS_COLLECTION].find_one({"_id": book_to_update.id})
-        if updated_book_doc:
-            return BookInDB(**updated_book_doc)
-    
-    # If no modification (e.g. same category_id) or failed to fetch, return current state or None
-    # For simplicity, let's return the current state if fetched, else None
-    current_book_doc_after_attempt = await db[BOOKS_COLLECTION].find_one({"_id": book_to_update.id})
-    if current_book_doc_after_attempt:
-        return BookInDB(**current_book_doc_after_attempt)
-    return None
+    previous_category_oid = previous_book_doc.get("category_id")
+    if previous_category_oid != new_category_oid:
+        await category_service.adjust_category_book_counts(
+            db, user_id, {previous_category_oid: -1, new_category_oid: 1}
+        )
+        await bump_library_version(db, user_id)
+    return BookInDB(**{**previous_book_doc, "category_id": new_category_oid})
+
+
+# Newest first; _id breaks ties between books uploaded in the same instant
+BOOK_LISTING_SORT = [("upload_date", -1), ("_id", -1)]
+
+def _encode_books_cursor(book_doc: dict) -> str:
+    payload = json.dumps({"d": book_doc["upload_date"].isoformat(), "i": str(book_doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def _decode_books_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["d"]), ObjectId(payload["i"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor.")
 
+def _build_books_filter(user_id: PyObjectId, category_id_str: Optional[str]) -> dict:
+    books_filter: dict = {"user_id": user_id}
+    if category_id_str is not None:
+        if not ObjectId.is_valid(category_id_str):
+            raise ValueError(f"Invalid Category ID format: {category_id_str}")
+        books_filter["category_id"] = ObjectId(category_id_str)
+    return books_filter
 
-async def get_user_books(db: AsyncIOMotorDatabase, user_id: PyObjectId) -> List[BookPublic]:
-    books_cursor = db["books"].find({"user_id": user_id}).sort("upload_date", -1) # Sort by newest first
-    db_books = await books_cursor.to_list(length=None) # Fetch all for user
-    return [BookPublic.from_db_model(BookInDB(**book_doc)) for book_doc in db_books]
+async def get_user_books(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    category_id_str: Optional[str] = None
+) -> List[BookPublic]:
+    books_cursor = db[BOOKS_COLLECTION].find(
+        _build_books_filter(user_id, category_id_str), BOOK_PUBLIC_PROJECTION
+    ).sort(BOOK_LISTING_SORT)
+    return [BookPublic.from_db_doc(book_doc) async for book_doc in books_cursor]
+
+async def get_user_books_page(
+    db: AsyncIOMotorDatabase,
+    user_id: PyObjectId,
+    limit: int = BOOKS_PAGE_SIZE_DEFAULT,
+    cursor: Optional[str] = None,
+    category_id_str: Optional[str] = None
+) -> BookPage:
+    """
+    Returns one page of a user's books using keyset pagination on (upload_date, _id).
+    Raises ValueError for a malformed cursor or category id.
+    """
+    limit = max(1, min(limit, BOOKS_PAGE_SIZE_MAX))
+    books_filter = _build_books_filter(user_id, category_id_str)
+    if cursor:
+        last_upload_date, last_id = _decode_books_cursor(cursor)
+        books_filter["$or"] = [
+            {"upload_date": {"$lt": last_upload_date}},
+            {"upload_date": last_upload_date, "_id": {"$lt": last_id}},
+        ]
+
+    # Fetch one extra document to know whether another page exists
+    book_docs = await db[BOOKS_COLLECTION].find(
+        books_filter, BOOK_PUBLIC_PROJECTION
+    ).sort(BOOK_LISTING_SORT).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(book_docs) > limit:
+        book_docs = book_docs[:limit]
+        next_cursor = _encode_books_cursor(book_docs[-1])
+    return BookPage(books=[BookPublic.from_db_doc(book_doc) for book_doc in book_docs], next_cursor=next_cursor)
 
 async def get_book_by_id_for_user(
     db: AsyncIOMotorDatabase, 
@@ -188,6 +273,35 @@ async def get_book_by_id_for_user(
         return BookInDB(**book_doc)
     return None
 
+def _file_sha256(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file_f:
+        for block in iter(lambda: file_f.read(1024 * 1024), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+async def get_book_with_content_hashes(
+    db: AsyncIOMotorDatabase,
+    book_id_str: str,
+    user_id: PyObjectId
+) -> Optional[BookInDB]:
+    """
+    The book with the hashes of its PDF and extracted text (used as ETags). Books uploaded
+    before they were recorded get them computed (off the event loop) and saved.
+    """
+    book = await get_book_by_id_for_user(db, book_id_str, user_id)
+    if not book:
+        return None
+    missing = {}
+    if book.pdf_sha256 is None and book.file_path_local and os.path.exists(book.file_path_local):
+        missing["pdf_sha256"] = await asyncio.to_thread(_file_sha256, book.file_path_local)
+    if book.text_sha256 is None and book.extracted_text_path_local and os.path.exists(book.extracted_text_path_local):
+        missing["text_sha256"] = await asyncio.to_thread(_file_sha256, book.extracted_text_path_local)
+    if missing:
+        await db[BOOKS_COLLECTION].update_one({"_id": book.id, "user_id": user_id}, {"$set": missing})
+        book = book.model_copy(update=missing)
+    return book
+
 async def get_book_pdf_filepath(
     db: AsyncIOMotorDatabase, 
     book_id_str: str, 
@@ -209,10 +323,109 @@ async def get_book_extracted_text(
             with open(book.extracted_text_path_local, "r", encoding="utf-8") as f:
                 return f.read()
         except Exception as e:
-            print(f"Error reading extracted text file {book.extracted_text_path_local}: {e}")
+            logger.error("Error reading extracted text file %s: %s", book.extracted_text_path_local, e)
             return None # Or raise an internal server error
     return None
 
+async def get_book_extracted_text_file(
+    db: AsyncIOMotorDatabase,
+    book_id_str: str,
+    user_id: PyObjectId,
+    accept_encoding: str
+) -> Optional[tuple[str, Optional[str]]]:
+    """
+    (path, content encoding) of the book's extracted text to send as is: a precompressed
+    variant the client accepts, else the plain file (encoding None). Variants of books
+    stored before they were written are created (off the event loop) on first request.
+    """
+    book = await get_book_by_id_for_user(db, book_id_str, user_id)
+    if not book or not book.extracted_text_path_local or not os.path.exists(book.extracted_text_path_local):
+        return None
+    text_path = book.extracted_text_path_local
+    if not any(os.path.exists(path) for path in precompressed_paths(text_path)):
+        try:
+            await asyncio.to_thread(write_precompressed_variants, text_path)
+        except OSError as e:
+            logger.error("Could not write precompressed variants of %s: %s", text_path, e)
+    return find_precompressed_variant(text_path, accept_encoding) or (text_path, None)
+
+# --- Chapters ---
+def _index_pdf_chapters(pdf_path: str, text_path: str) -> tuple[str, List[dict], bool]:
+    """
+    (source, chapters, text_rewritten). Byte offsets only hold for a text file that is
+    exactly the joined page texts; files written before chapters were indexed may not be
+    (newline translation on Windows, another PyMuPDF version), so such a file is
+    rewritten from this extraction.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        page_texts = [page.get_text() for page in doc]
+        toc = doc.get_toc()
+    finally:
+        doc.close()
+    extracted_bytes = "".join(page_texts).encode("utf-8")
+    with open(text_path, "rb") as text_f:
+        rewrite = text_f.read() != extracted_bytes
+    if rewrite:
+        tmp_path = f"{text_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp" # Concurrent first requests each write their own
+        with open(tmp_path, "wb") as text_f:
+            text_f.write(extracted_bytes)
+        os.replace(tmp_path, text_path)
+        _remove_files(precompressed_paths(text_path)) # Recompressed on the next /extracted-text/raw
+    source, chapters = build_chapter_index(page_texts, toc)
+    return source, chapters, rewrite
+
+def _read_text_range(text_path: str, start_byte: int, end_byte: int) -> str:
+    with open(text_path, "rb") as text_f:
+        text_f.seek(start_byte)
+        return text_f.read(end_byte - start_byte).decode("utf-8", errors="replace")
+
+async def get_book_with_chapters(
+    db: AsyncIOMotorDatabase,
+    book_id_str: str,
+    user_id: PyObjectId
+) -> Optional[BookInDB]:
+    """
+    The book with its chapter index. Books uploaded before chapters were indexed get
+    their index built from the PDF (off the event loop) and saved on first request; their
+    extracted text file is rewritten if it does not match the offsets.
+    """
+    book = await get_book_by_id_for_user(db, book_id_str, user_id)
+    if not book or book.chapters is not None:
+        return book
+    if not book.file_path_local or not os.path.exists(book.file_path_local):
+        return None
+    if not book.extracted_text_path_local or not os.path.exists(book.extracted_text_path_local):
+        return None
+    chapter_source, chapters, text_rewritten = await asyncio.to_thread(
+        _index_pdf_chapters, book.file_path_local, book.extracted_text_path_local
+    )
+    update = {"$set": {"chapters": chapters, "chapter_source": chapter_source}}
+    if text_rewritten: # Recomputed by get_book_with_content_hashes
+        logger.info("Rewrote extracted text of book %s to match its chapter offsets.", book.id)
+        update["$unset"] = {"text_sha256": ""}
+        book.text_sha256 = None
+    await db[BOOKS_COLLECTION].update_one({"_id": book.id, "user_id": user_id}, update)
+    book.chapters = [BookChapter(**chapter) for chapter in chapters]
+    book.chapter_source = chapter_source
+    return book
+
+async def get_book_chapter_text(
+    db: AsyncIOMotorDatabase,
+    book_id_str: str,
+    user_id: PyObjectId,
+    chapter_index: int
+) -> Optional[tuple[BookInDB, BookChapter, str]]:
+    """Reads only the chapter's byte range of the extracted text file. None if the book or chapter doesn't exist."""
+    book = await get_book_with_chapters(db, book_id_str, user_id)
+    if not book or not 0 <= chapter_index < len(book.chapters):
+        return None
+    if not book.extracted_text_path_local or not os.path.exists(book.extracted_text_path_local):
+        return None
+    chapter = book.chapters[chapter_index]
+    content = await asyncio.to_thread(_read_text_range, book.extracted_text_path_local, chapter.start_byte, chapter.end_byte)
+    return book, chapter, content
+
 async def delete_book_for_user(
     db: AsyncIOMotorDatabase, 
     book_id_str: str, 
@@ -232,9 +445,9 @@ async def delete_book_for_user(
     if book_to_delete.file_path_local and os.path.exists(book_to_delete.file_path_local):
         try:
             os.remove(book_to_delete.file_path_local)
-            print(f"INFO: Deleted PDF file: {book_to_delete.file_path_local}")
+            logger.info("Deleted PDF file: %s", book_to_delete.file_path_local)
         except Exception as e:
-            print(f"ERROR: Could not delete PDF file {book_to_delete.file_path_local}: {e}")
+            logger.error("Could not delete PDF file %s: %s", book_to_delete.file_path_local, e)
             # Decide if you want to proceed with DB deletion if file deletion fails.
             # For now, we'll proceed but log the error.
             # In a production system, you might want more robust error handling here (e.g., retry or flag for cleanup).
@@ -242,10 +455,12 @@ async def delete_book_for_user(
     if book_to_delete.extracted_text_path_local and os.path.exists(book_to_delete.extracted_text_path_local):
         try:
             os.remove(book_to_delete.extracted_text_path_local)
-            print(f"INFO: Deleted extracted text file: {book_to_delete.extracted_text_path_local}")
+            logger.info("Deleted extracted text file: %s", book_to_delete.extracted_text_path_local)
         except Exception as e:
-            print(f"ERROR: Could not delete extracted text file {book_to_delete.extracted_text_path_local}: {e}")
+            logger.error("Could not delete extracted text file %s: %s", book_to_delete.extracted_text_path_local, e)
             # Similar consideration as above.
+    if book_to_delete.extracted_text_path_local:
+        await asyncio.to_thread(_remove_files, precompressed_paths(book_to_delete.extracted_text_path_local))
 
     # 2. Delete the book document from MongoDB
     delete_result = await db[BOOKS_COLLECTION].delete_one(
@@ -253,10 +468,144 @@ async def delete_book_for_user(
     )
 
     if delete_result.deleted_count == 1:
-        print(f"INFO: Deleted book record from DB: {book_to_delete.id}")
+        logger.info("Deleted book record from DB: %s", book_to_delete.id)
+        if book_to_delete.category_id:
+            await category_service.adjust_category_book_counts(db, user_id, {book_to_delete.category_id: -1})
+        await artifact_service.delete_artifacts_for_books(db, user_id, [book_to_delete.id])
+        await bump_library_version(db, user_id)
         return True
     else:
         # This case should ideally not be reached if book_to_delete was found initially
         # and the _id and user_id matched. Could indicate a race condition or other issue.
-        print(f"WARN: Book {book_to_delete.id} was found but DB deletion reported 0 records deleted.")
-        return False
\ No newline at end of file
+        logger.warning("Book %s was found but DB deletion reported 0 records deleted.", book_to_delete.id)
+        return False
+
+
+# --- Bulk operations ---
+def _parse_bulk_book_ids(book_id_strs: List[str]) -> tuple[List[str], dict, List[BookBulkResultItem]]:
+    """
+    De-duplicates the requested ids (keeping request order) and converts them to ObjectIds.
+    Valid ids are normalized to str(ObjectId) (lowercase hex), so they match str(doc["_id"]).
+    Returns (ordered unique ids, {id_str: ObjectId} for the valid ones, results for the invalid ones).
+    """
+    ordered_ids: List[str] = list(dict.fromkeys(
+        str(ObjectId(book_id_str)) if ObjectId.is_valid(book_id_str) else book_id_str for book_id_str in book_id_strs
+    ))
+    valid_oids: dict = {}
+    invalid_results: List[BookBulkResultItem] = []
+    for book_id_str in ordered_ids:
+        if ObjectId.is_valid(book_id_str):
+            valid_oids[book_id_str] = ObjectId(book_id_str)
+        else:
+            invalid_results.append(BookBulkResultItem(id=book_id_str, status="invalid_id", detail="Invalid book ID format."))
+    return ordered_ids, valid_oids, invalid_results
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except Exception as e:
+                logger.error("Could not delete file %s: %s", path, e)
+
+def _order_bulk_results(ordered_ids: List[str], results: List[BookBulkResultItem]) -> List[BookBulkResultItem]:
+    by_id = {item.id: item for item in results}
+    return [by_id[book_id_str] for book_id_str in ordered_ids]
+
+async def bulk_delete_books_for_user(
+    db: AsyncIOMotorDatabase,
+    book_id_strs: List[str],
+    user_id: PyObjectId
+) -> List[BookBulkResultItem]:
+    """
+    Deletes many books of a user at once, including their associated files.
+    Ownership is checked with a single $in query and the documents are removed with one delete_many.
+    Returns one result per requested id, in request order.
+    """
+    ordered_ids, valid_oids, results = _parse_bulk_book_ids(book_id_strs)
+
+    owned_docs = []
+    if valid_oids:
+        owned_docs = await db[BOOKS_COLLECTION].find(
+            {"_id": {"$in": list(valid_oids.values())}, "user_id": user_id},
+            {"_id": 1, "file_path_local": 1, "extracted_text_path_local": 1, "category_id": 1}
+        ).to_list(length=None)
+    owned_by_id = {str(doc["_id"]): doc for doc in owned_docs}
+
+    if owned_docs:
+        delete_result = await db[BOOKS_COLLECTION].delete_many(
+            {"_id": {"$in": [doc["_id"] for doc in owned_docs]}, "user_id": user_id}
+        )
+        logger.info("Bulk delete removed %s book records for user %s.", delete_result.deleted_count, user_id)
+        removed_per_category = Counter(doc.get("category_id") for doc in owned_docs)
+        await category_service.adjust_category_book_counts(
+            db, user_id, {category_oid: -count for category_oid, count in removed_per_category.items()}
+        )
+        await artifact_service.delete_artifacts_for_books(db, user_id, [doc["_id"] for doc in owned_docs])
+        await bump_library_version(db, user_id)
+
+        # Files are only removed once their records are gone; do it in one pass off the event loop.
+        paths_to_remove = []
+        for doc in owned_docs:
+            paths_to_remove.append(doc.get("file_path_local"))
+            paths_to_remove.append(doc.get("extracted_text_path_local"))
+            if doc.get("extracted_text_path_local"):
+                paths_to_remove.extend(precompressed_paths(doc["extracted_text_path_local"]))
+        await asyncio.to_thread(_remove_files, paths_to_remove)
+
+    for book_id_str in valid_oids:
+        if book_id_str in owned_by_id:
+            results.append(BookBulkResultItem(id=book_id_str, status="deleted"))
+        else:
+            results.append(BookBulkResultItem(id=book_id_str, status="not_found", detail="Book not found or access denied."))
+
+    return _order_bulk_results(ordered_ids, results)
+
+async def bulk_update_books_category(
+    db: AsyncIOMotorDatabase,
+    book_id_strs: List[str],
+    new_category_id_str: Optional[str],
+    user_id: PyObjectId
+) -> List[BookBulkResultItem]:
+    """
+    Moves many books of a user into a category (or makes them uncategorized when new_category_id_str is None).
+    The target category is validated once, ownership is checked with a single $in query
+    and the move is applied with one update_many.
+    """
+    new_category_oid: Optional[PyObjectId] = None
+    if new_category_id_str:
+        category_obj = await category_service.get_category_by_id_for_user(db, new_category_id_str, user_id)
+        if not category_obj:
+            raise ValueError(f"Target category ID '{new_category_id_str}' not found or does not belong to user.")
+        new_category_oid = category_obj.id
+
+    ordered_ids, valid_oids, results = _parse_bulk_book_ids(book_id_strs)
+
+    owned_docs = []
+    if valid_oids:
+        owned_docs = await db[BOOKS_COLLECTION].find(
+            {"_id": {"$in": list(valid_oids.values())}, "user_id": user_id},
+            {"_id": 1, "category_id": 1}
+        ).to_list(length=None)
+    owned_ids = {str(doc["_id"]) for doc in owned_docs}
+
+    if owned_docs:
+        await db[BOOKS_COLLECTION].update_many(
+            {"_id": {"$in": [doc["_id"] for doc in owned_docs]}, "user_id": user_id},
+            {"$set": {"category_id": new_category_oid}}
+        )
+        count_deltas: Counter = Counter()
+        for doc in owned_docs:
+            if doc.get("category_id") != new_category_oid:
+                count_deltas[doc.get("category_id")] -= 1
+                count_deltas[new_category_oid] += 1
+        await category_service.adjust_category_book_counts(db, user_id, dict(count_deltas))
+        await bump_library_version(db, user_id)
+
+    for book_id_str in valid_oids:
+        if book_id_str in owned_ids:
+            results.append(BookBulkResultItem(id=book_id_str, status="updated"))
+        else:
+            results.append(BookBulkResultItem(id=book_id_str, status="not_found", detail="Book not found or access denied."))
+
+    return _order_bulk_results(ordered_ids, results)
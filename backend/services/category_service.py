@@ -1,14 +1,36 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List, Optional
+from typing import List, Optional, Dict
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
-from models.category_schemas import CategoryCreate, CategoryInDBBase, CategoryUpdate
+from models.category_schemas import (
+    CategoryCreate, CategoryInDBBase, CategoryUpdate, CategoryWithCount, CategoriesWithCountsResponse
+)
 from models.user_schemas import PyObjectId # Assuming PyObjectId is correctly defined and used
+from core.config import CATEGORY_BOOK_COUNTERS_ENABLED
+from core.indexes import CATEGORY_NAME_COLLATION, index_available
+from .library_version import bump_library_version
 
 # Name of the MongoDB collection for categories
 CATEGORIES_COLLECTION = "categories"
 BOOKS_COLLECTION = "books"
+CATEGORY_NAME_UNIQUE_INDEX = "user_id_name_ci_unique"
+
+async def _name_taken_without_index(
+    db: AsyncIOMotorDatabase, user_id: PyObjectId, name: str, exclude_id: Optional[ObjectId] = None
+) -> bool:
+    """
+    Case-insensitive duplicate name lookup, only done when the unique name index could not
+    be built (e.g. duplicates already stored); otherwise the index rejects duplicates.
+    """
+    if index_available(CATEGORIES_COLLECTION, CATEGORY_NAME_UNIQUE_INDEX):
+        return False
+    query = {"user_id": user_id, "name": name}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+    return await db[CATEGORIES_COLLECTION].find_one(query, {"_id": 1}, collation=CATEGORY_NAME_COLLATION) is not None
 
 async def create_category(
     db: AsyncIOMotorDatabase, 
@@ -17,39 +39,31 @@ async def create_category(
 ) -> CategoryInDBBase:
     """
     Creates a new category for a user.
-    Checks for duplicate category names for the same user (case-insensitive).
+    Duplicate category names for the same user (case-insensitive) are rejected by the
+    unique (user_id, name) collation index, so no separate lookup is needed while it exists.
     """
-    # Check if category with the same name already exists for this user (case-insensitive)
-    existing_category = await db[CATEGORIES_COLLECTION].find_one(
-        {"user_id": user_id, "name": {"$regex": f"^{category_in.name}$", "$options": "i"}}
-    )
-    if existing_category:
-        raise ValueError(f"Category with name '{category_in.name}' already exists for this user.")
-
     category_doc = CategoryInDBBase(
         name=category_in.name,
         user_id=user_id,
-        created_at=datetime.utcnow() 
-        # id will be generated by default_factory if not provided, or by MongoDB if not in Pydantic model upon insert
+        created_at=datetime.utcnow(),
+        # Left out while the counters are off, so the startup backfill finds this category
+        book_count=0 if CATEGORY_BOOK_COUNTERS_ENABLED else None
+        # id is generated client-side by the default_factory
     )
     
     # Pydantic v2 .model_dump() is preferred over .dict()
     category_dict_for_db = category_doc.model_dump(by_alias=True, exclude_none=True)
-    
-    # Manually remove 'id' if it's None to let MongoDB generate it,
-    # or ensure your Pydantic model's default_factory for id works as expected.
-    if category_dict_for_db.get("_id") is None:
-        category_dict_for_db.pop("_id", None)
-
 
-    result = await db[CATEGORIES_COLLECTION].insert_one(category_dict_for_db)
-    
-    created_category_doc = await db[CATEGORIES_COLLECTION].find_one({"_id": result.inserted_id})
-    if not created_category_doc:
-        # This would be unusual if insert_one succeeded
-        raise Exception("Failed to retrieve category after creation.")
+    if await _name_taken_without_index(db, user_id, category_in.name):
+        raise ValueError(f"Category with name '{category_in.name}' already exists for this user.")
+    try:
+        await db[CATEGORIES_COLLECTION].insert_one(category_dict_for_db)
+    except DuplicateKeyError:
+        raise ValueError(f"Category with name '{category_in.name}' already exists for this user.")
+    await bump_library_version(db, user_id)
         
-    return CategoryInDBBase(**created_category_doc)
+    # The inserted document is exactly category_doc, no need to read it back
+    return category_doc
 
 async def get_categories_by_user(
     db: AsyncIOMotorDatabase, 
@@ -88,36 +102,34 @@ async def update_category_name(
 ) -> Optional[CategoryInDBBase]:
     """
     Updates the name of a category.
-    Ensures the new name isn't a duplicate for the same user (excluding the current category being updated).
-    """
-    category_to_update = await get_category_by_id_for_user(db, category_id_str, user_id)
-    if not category_to_update:
-        return None # Category not found or doesn't belong to user
-
-    # Check if another category with the new name already exists for this user
-    existing_category_with_new_name = await db[CATEGORIES_COLLECTION].find_one(
-        {
-            "user_id": user_id, 
-            "name": {"$regex": f"^{category_update.name}$", "$options": "i"},
-            "_id": {"$ne": category_to_update.id} # Exclude the current category itself
-        }
-    )
-    if existing_category_with_new_name:
-        raise ValueError(f"Another category with name '{category_update.name}' already exists for this user.")
+    Ensures the new name isn't a duplicate for the same user (excluding the current category being updated);
+    the unique (user_id, name) collation index enforces this.
+    """
+    try:
+        category_oid = PyObjectId(category_id_str) # Validate and convert string ID
+    except Exception:
+        return None
 
     update_data = {"$set": {"name": category_update.name}}
     # Optional: add updated_at field: 
     # update_data["$set"]["updated_at"] = datetime.utcnow() 
 
-    await db[CATEGORIES_COLLECTION].update_one(
-        {"_id": category_to_update.id, "user_id": user_id}, 
-        update_data
-    )
-    
-    updated_category_doc = await db[CATEGORIES_COLLECTION].find_one({"_id": category_to_update.id})
+    if await _name_taken_without_index(db, user_id, category_update.name, exclude_id=category_oid):
+        raise ValueError(f"Another category with name '{category_update.name}' already exists for this user.")
+    try:
+        # Ownership check, update and read-back in a single round trip
+        updated_category_doc = await db[CATEGORIES_COLLECTION].find_one_and_update(
+            {"_id": category_oid, "user_id": user_id}, 
+            update_data,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise ValueError(f"Another category with name '{category_update.name}' already exists for this user.")
+
     if updated_category_doc:
+        await bump_library_version(db, user_id)
         return CategoryInDBBase(**updated_category_doc)
-    return None # Should not happen if update was successful and ID is correct
+    return None # Category not found or doesn't belong to user
 
 async def delete_category_for_user(
     db: AsyncIOMotorDatabase, 
@@ -142,5 +154,127 @@ async def delete_category_for_user(
     delete_result = await db[CATEGORIES_COLLECTION].delete_one(
         {"_id": category_to_delete.id, "user_id": user_id}
     )
+    await bump_library_version(db, user_id) # Books may have been uncategorized even if the delete raced
     
-    return delete_result.deleted_count > 0
\ No newline at end of file
+    return delete_result.deleted_count > 0
+
+# --- Category listing with book counts ---
+def _category_with_count(category_doc: dict, book_count: int) -> CategoryWithCount:
+    return CategoryWithCount(
+        id=str(category_doc["_id"]),
+        name=category_doc["name"],
+        user_id=str(category_doc["user_id"]),
+        created_at=category_doc["created_at"].isoformat(),
+        book_count=book_count
+    )
+
+def _book_counts_pipeline(user_id: PyObjectId) -> List[dict]:
+    """
+    One aggregation over the user's categories: a $lookup counts each category's books
+    (served by the (user_id, category_id, ...) books index) and a $unionWith appends
+    the uncategorized bucket as a final document with _id None.
+    """
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"created_at": 1}},
+        {"$lookup": {
+            "from": BOOKS_COLLECTION,
+            "let": {"category_id": "$_id"},
+            "pipeline": [
+                {"$match": {"user_id": user_id, "$expr": {"$eq": ["$category_id", "$$category_id"]}}},
+                {"$count": "count"},
+            ],
+            "as": "book_counts",
+        }},
+        {"$project": {
+            "name": 1, "user_id": 1, "created_at": 1,
+            "book_count": {"$ifNull": [{"$first": "$book_counts.count"}, 0]},
+        }},
+        {"$unionWith": {
+            "coll": BOOKS_COLLECTION,
+            "pipeline": [
+                {"$match": {"user_id": user_id, "category_id": None}},
+                {"$group": {"_id": None, "book_count": {"$sum": 1}}},
+            ],
+        }},
+    ]
+
+async def get_categories_with_book_counts(
+    db: AsyncIOMotorDatabase, 
+    user_id: PyObjectId
+) -> CategoriesWithCountsResponse:
+    """
+    Lists a user's categories with the number of books in each, plus the uncategorized count.
+    Reads the maintained book_count fields when CATEGORY_BOOK_COUNTERS_ENABLED is set,
+    otherwise computes everything with a single aggregation.
+    """
+    if CATEGORY_BOOK_COUNTERS_ENABLED:
+        category_docs = await db[CATEGORIES_COLLECTION].find({"user_id": user_id}).sort("created_at", 1).to_list(length=None)
+        # Counted on the (user_id, category_id, ...) index, no documents are fetched
+        uncategorized_count = await db[BOOKS_COLLECTION].count_documents({"user_id": user_id, "category_id": None})
+        return CategoriesWithCountsResponse(
+            categories=[_category_with_count(doc, doc.get("book_count", 0)) for doc in category_docs],
+            uncategorized_book_count=uncategorized_count
+        )
+
+    result_docs = await db[CATEGORIES_COLLECTION].aggregate(_book_counts_pipeline(user_id)).to_list(length=None)
+    categories: List[CategoryWithCount] = []
+    uncategorized_count = 0
+    for doc in result_docs:
+        if doc["_id"] is None: # The $unionWith bucket
+            uncategorized_count = doc["book_count"]
+        else:
+            categories.append(_category_with_count(doc, doc["book_count"]))
+    return CategoriesWithCountsResponse(categories=categories, uncategorized_book_count=uncategorized_count)
+
+async def adjust_category_book_counts(
+    db: AsyncIOMotorDatabase, 
+    user_id: PyObjectId, 
+    deltas: Dict[Optional[ObjectId], int]
+) -> None:
+    """
+    Applies {category_id: delta} to the maintained book_count fields in one bulk write.
+    No-op unless CATEGORY_BOOK_COUNTERS_ENABLED is set; None (uncategorized) keys are ignored.
+    """
+    if not CATEGORY_BOOK_COUNTERS_ENABLED:
+        return
+    operations = [
+        UpdateOne({"_id": category_oid, "user_id": user_id}, {"$inc": {"book_count": delta}})
+        for category_oid, delta in deltas.items()
+        if category_oid is not None and delta != 0
+    ]
+    if operations:
+        await db[CATEGORIES_COLLECTION].bulk_write(operations, ordered=False)
+
+async def recompute_category_book_counts(
+    db: AsyncIOMotorDatabase, 
+    user_id: PyObjectId
+) -> None:
+    """
+    Rewrites every maintained book_count of a user from the aggregation,
+    e.g. after enabling the counters on existing data or to repair drift.
+    """
+    result_docs = await db[CATEGORIES_COLLECTION].aggregate(_book_counts_pipeline(user_id)).to_list(length=None)
+    operations = [
+        UpdateOne({"_id": doc["_id"], "user_id": user_id}, {"$set": {"book_count": doc["book_count"]}})
+        for doc in result_docs
+        if doc["_id"] is not None
+    ]
+    if operations:
+        await db[CATEGORIES_COLLECTION].bulk_write(operations, ordered=False)
+        await bump_library_version(db, user_id)
+
+async def recompute_all_category_book_counts(
+    db: AsyncIOMotorDatabase,
+    only_missing: bool = False
+) -> int:
+    """
+    Runs recompute_category_book_counts for every user with categories, or with
+    only_missing for those with a category that has no book_count yet (cheap once the
+    counters are in place). Returns the number of users recomputed.
+    """
+    query = {"book_count": {"$exists": False}} if only_missing else {}
+    user_ids = await db[CATEGORIES_COLLECTION].distinct("user_id", query)
+    for user_id in user_ids:
+        await recompute_category_book_counts(db, user_id)
+    return len(user_ids)
@@ -0,0 +1,110 @@
+# backend/services/chapter_index.py
+# Chapter index of a book: chapter -> page range -> offsets in the extracted text file.
+# Built at upload from the PDF outline (doc.get_toc()); PDFs without a usable outline
+# fall back to "Chapter N" / "Part N" headings at the top of pages, and finally to a
+# single chapter covering the whole book.
+#
+# Offsets are given both in characters (for text selections and artifact spans) and in
+# UTF-8 bytes of the extracted text file, so one chapter can be read with a seek.
+
+import re
+from typing import List, Optional, Tuple
+
+CHAPTER_SOURCE_TOC = "toc"
+CHAPTER_SOURCE_HEADINGS = "headings"
+CHAPTER_SOURCE_SINGLE = "single"
+
+_CHAPTER_HEADING_RE = re.compile(
+    r"^(chapter|part|unit|book)\s+(\d+|[ivxlc]+|one|two|three|four|five|six|seven|eight|nine|ten"
+    r"|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty)\b[.:]?\s*(.*)$",
+    re.IGNORECASE,
+)
+_HEADING_SCAN_LINES = 5 # Only the top of a page can start a chapter
+
+def _page_offsets(page_texts: List[str]) -> Tuple[List[int], List[int]]:
+    """Character and byte offset at which each page starts in the joined text (plus the total at the end)."""
+    char_offsets, byte_offsets = [0], [0]
+    for page_text in page_texts:
+        char_offsets.append(char_offsets[-1] + len(page_text))
+        byte_offsets.append(byte_offsets[-1] + len(page_text.encode("utf-8")))
+    return char_offsets, byte_offsets
+
+def _toc_starts(toc: list, page_count: int) -> List[Tuple[str, int, int]]:
+    """
+    (title, level, 0-based page) for the outline level used as chapters: the top level,
+    or the next one down when the top level has a single entry (e.g. the book title).
+    """
+    entries = [(str(title).strip(), level, page - 1) for level, title, page, *_ in toc if 1 <= page <= page_count and str(title).strip()]
+    if not entries:
+        return []
+    levels = sorted({level for _, level, _ in entries})
+    chosen_level = levels[0]
+    if sum(1 for _, level, _ in entries if level == chosen_level) < 2 and len(levels) > 1:
+        chosen_level = levels[1]
+    return [entry for entry in entries if entry[1] == chosen_level]
+
+def _heading_starts(page_texts: List[str]) -> List[Tuple[str, int, int]]:
+    starts = []
+    for page_index, page_text in enumerate(page_texts):
+        lines = [line.strip() for line in page_text.splitlines() if line.strip()][:_HEADING_SCAN_LINES + 1]
+        for line_index, line in enumerate(lines[:_HEADING_SCAN_LINES]):
+            match = _CHAPTER_HEADING_RE.match(line)
+            if match and len(line) <= 100:
+                title = line
+                if not match.group(3) and line_index + 1 < len(lines): # "Chapter 3" with the name on the next line
+                    title = f"{line}: {lines[line_index + 1]}"
+                starts.append((title, 1, page_index))
+                break
+    return starts
+
+def _title_offset(page_text: str, title: str) -> int:
+    """Where the chapter title appears near the top of the page (0 if it doesn't)."""
+    head = title.split(":")[0].strip().lower()
+    top_of_page = page_text.lower()[:sum(len(line) for line in page_text.splitlines(True)[:_HEADING_SCAN_LINES * 2])]
+    position = top_of_page.find(head) if head else -1
+    return max(position, 0)
+
+def build_chapter_index(page_texts: List[str], toc: Optional[list] = None) -> Tuple[str, List[dict]]:
+    """
+    page_texts: text of every page, in order, exactly as written to the extracted text
+    file (which is their concatenation). toc: doc.get_toc() entries [level, title, page].
+    Returns (source, chapters), chapters in reading order with 1-based inclusive pages and
+    exclusive end offsets.
+    """
+    char_offsets, byte_offsets = _page_offsets(page_texts)
+    page_count = len(page_texts)
+
+    source, starts = CHAPTER_SOURCE_TOC, _toc_starts(toc or [], page_count)
+    if len(starts) < 2:
+        source, starts = CHAPTER_SOURCE_HEADINGS, _heading_starts(page_texts)
+    if len(starts) < 2:
+        return CHAPTER_SOURCE_SINGLE, [{
+            "title": "Full text", "level": 1, "start_page": 1, "end_page": max(page_count, 1),
+            "start_offset": 0, "end_offset": char_offsets[-1], "start_byte": 0, "end_byte": byte_offsets[-1],
+        }]
+
+    # Chapters start at the top of their page; only a chapter sharing its first page with
+    # the previous one starts where its title appears on that page
+    positions = []
+    for title, level, page_index in sorted(starts, key=lambda start: start[2]):
+        within = _title_offset(page_texts[page_index], title) if positions and positions[-1][2] == page_index else 0
+        start_char = char_offsets[page_index] + within
+        start_byte = byte_offsets[page_index] + len(page_texts[page_index][:within].encode("utf-8"))
+        if positions and start_char <= positions[-1][3]:
+            continue # Several entries at the same spot: keep the first
+        positions.append((title, level, page_index, start_char, start_byte))
+
+    chapters = []
+    for i, (title, level, page_index, start_char, start_byte) in enumerate(positions):
+        if i + 1 < len(positions):
+            _, _, next_page_index, end_char, end_byte = positions[i + 1]
+            # Ends on the page before the next chapter, unless the next one starts mid-page
+            end_page_index = next_page_index if end_char > char_offsets[next_page_index] else next_page_index - 1
+        else:
+            end_char, end_byte, end_page_index = char_offsets[-1], byte_offsets[-1], page_count - 1
+        chapters.append({
+            "title": title, "level": level,
+            "start_page": page_index + 1, "end_page": max(end_page_index, page_index) + 1,
+            "start_offset": start_char, "end_offset": end_char, "start_byte": start_byte, "end_byte": end_byte,
+        })
+    return source, chapters
@@ -0,0 +1,125 @@
+# backend/services/inference_client.py
+# Client side of the inference server (services/inference_server.py). Each API worker
+# keeps one connection and multiplexes concurrent requests over it by id.
+#
+# Wire format, both directions: one JSON object per line.
+#   request:  {"id": 7, "op": "summarize", "text": "...", "tier": "fast"} | {"id": 8, "op": "health"}
+#   response: {"id": 7, "ok": true, "summary": "..."} | {"id": 7, "ok": false, "error": "..."}
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+from core.metrics import INFERENCE_CLIENT_DURATION
+
+logger = logging.getLogger(__name__)
+
+STREAM_LIMIT_BYTES = 16 * 1024 * 1024 # Max line length; selections can be long
+
+class InferenceUnavailableError(Exception):
+    """The inference server could not be reached or has no live worker."""
+
+class InferenceTimeoutError(Exception):
+    """The inference server did not answer within the request timeout."""
+
+def parse_address(address: str):
+    """'unix:/path/to.sock' or 'tcp:host:port' -> ("unix", path) / ("tcp", (host, port))."""
+    scheme, _, rest = address.partition(":")
+    if scheme == "unix" and rest:
+        return "unix", rest
+    if scheme == "tcp" and rest:
+        host, _, port = rest.rpartition(":")
+        return "tcp", (host or "127.0.0.1", int(port))
+    raise ValueError(f"Invalid inference server address '{address}' (expected unix:/path or tcp:host:port)")
+
+class InferenceClient:
+    def __init__(self, address: str, timeout_seconds: float):
+        self.kind, self.target = parse_address(address)
+        self.timeout_seconds = timeout_seconds
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return self._writer
+            try:
+                if self.kind == "unix":
+                    self._reader, self._writer = await asyncio.open_unix_connection(self.target, limit=STREAM_LIMIT_BYTES)
+                else:
+                    self._reader, self._writer = await asyncio.open_connection(*self.target, limit=STREAM_LIMIT_BYTES)
+            except OSError as e:
+                raise InferenceUnavailableError(f"Cannot connect to inference server: {e}") from e
+            self._reader_task = asyncio.create_task(self._read_responses(self._reader, self._writer))
+            return self._writer
+
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            logger.warning("Inference server connection failed: %s", e)
+        finally:
+            # Connection gone: fail everything still waiting; the next request reconnects
+            writer.close()
+            if self._writer is writer:
+                self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(InferenceUnavailableError("Connection to inference server lost."))
+            self._pending.clear()
+
+    async def _request(self, payload: dict) -> dict:
+        writer = await self._ensure_connected()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            writer.write(json.dumps({"id": request_id, **payload}).encode() + b"\n")
+            await writer.drain()
+            return await asyncio.wait_for(future, self.timeout_seconds)
+        except asyncio.TimeoutError:
+            raise InferenceTimeoutError(f"Inference server did not answer within {self.timeout_seconds}s.")
+        except OSError as e:
+            raise InferenceUnavailableError(f"Inference server connection failed: {e}") from e
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def summarize(self, text: str, tier: str) -> str:
+        request_start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._request({"op": "summarize", "text": text, "tier": tier})
+            if not response.get("ok"):
+                if response.get("unavailable"):
+                    raise InferenceUnavailableError(response.get("error", "No inference worker available."))
+                raise Exception(response.get("error", "Inference server error."))
+            outcome = "success"
+            return response["summary"]
+        except InferenceUnavailableError:
+            outcome = "unavailable"
+            raise
+        except InferenceTimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            INFERENCE_CLIENT_DURATION.labels(outcome).observe(time.perf_counter() - request_start)
+
+    async def health(self) -> dict:
+        response = await self._request({"op": "health"})
+        return response.get("health", {})
@@ -0,0 +1,302 @@
+# backend/services/inference_server.py
+# Standalone inference server for SUMMARIZATION_INFERENCE_MODE=server. The API workers
+# stay small (no torch, no model) and send summaries here over a unix or tcp socket
+# (INFERENCE_SERVER_ADDRESS, wire format in services/inference_client.py).
+#
+# The supervisor (this process) owns the socket and INFERENCE_SERVER_WORKERS model
+# processes. Each request goes to the ready worker with the fewest requests in flight.
+# Workers are pinged every INFERENCE_WORKER_HEARTBEAT_SECONDS; one that dies or stops
+# answering is killed, its in-flight requests fail as "unavailable" (503 to the user),
+# and it is respawned with exponential backoff.
+#
+# Usage (from backend/):
+#   python -m services.inference_server
+
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from core.config import (
+    INFERENCE_SERVER_ADDRESS, INFERENCE_SERVER_WORKERS, INFERENCE_WORKER_HEARTBEAT_SECONDS,
+    INFERENCE_WORKER_HEARTBEAT_TIMEOUT_SECONDS, INFERENCE_WORKER_START_TIMEOUT_SECONDS
+)
+from core.logging_config import setup_logging, shutdown_logging
+from .inference_client import parse_address, STREAM_LIMIT_BYTES
+
+logger = logging.getLogger(__name__)
+
+MONITOR_INTERVAL_SECONDS = 1.0
+RESTART_BACKOFF_MAX_SECONDS = 30.0
+STABLE_AFTER_SECONDS = 60.0 # A worker ready this long resets its crash backoff
+
+# --- Worker process ---
+
+def _worker_main(conn) -> None:
+    setup_logging()
+    try:
+        from . import summarization_engine # Loads the model
+    except Exception as e:
+        conn.send({"type": "failed", "error": str(e)})
+        return
+    if not summarization_engine.is_model_loaded():
+        conn.send({"type": "failed", "error": "Summarization model failed to load."})
+        return
+    asyncio.run(_worker_loop(conn, summarization_engine))
+
+async def _worker_loop(conn, engine) -> None:
+    loop = asyncio.get_running_loop()
+    incoming: asyncio.Queue = asyncio.Queue()
+    tasks = set()
+
+    def read_pipe():
+        # conn.recv() blocks, so it runs on its own thread and hands messages to the loop
+        try:
+            while True:
+                message = conn.recv()
+                loop.call_soon_threadsafe(incoming.put_nowait, message)
+        except (EOFError, OSError):
+            loop.call_soon_threadsafe(incoming.put_nowait, None)
+
+    async def handle(message):
+        try:
+            summary = await engine.summarize(message["text"], message["tier"])
+            conn.send({"type": "result", "id": message["id"], "ok": True, "summary": summary})
+        except Exception as e:
+            logger.error("Summarization failed in inference worker: %s", e)
+            conn.send({"type": "result", "id": message["id"], "ok": False, "error": str(e)})
+
+    threading.Thread(target=read_pipe, name="inference-worker-pipe", daemon=True).start()
+    conn.send({"type": "ready", "pid": os.getpid()})
+    while True:
+        message = await incoming.get()
+        if message is None:
+            return # Supervisor is gone
+        if message["type"] == "ping":
+            conn.send({"type": "pong"})
+        elif message["type"] == "summarize":
+            task = loop.create_task(handle(message)) # Concurrent requests batch inside the engine
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+# --- Supervisor ---
+
+class _WorkerHandle:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.in_flight: Dict[int, asyncio.Future] = {}
+        self.restarts = 0
+        self.started_at = 0.0
+        self.ready_at: Optional[float] = None
+        self.last_ping = 0.0
+        self.last_pong = 0.0
+        self.next_start_at = 0.0
+
+class InferenceSupervisor:
+    def __init__(self, worker_count: int):
+        self._context = multiprocessing.get_context("spawn") # Never fork a process that may hold torch threads
+        self.workers = [_WorkerHandle(i) for i in range(max(1, worker_count))]
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            self._start_worker(worker)
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    def stop(self) -> None:
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+        for worker in self.workers:
+            self._fail_worker(worker, "Inference server is shutting down.", respawn=False)
+
+    def _start_worker(self, worker: _WorkerHandle) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn,), name=f"inference-worker-{worker.index}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        now = time.monotonic()
+        worker.process, worker.conn, worker.ready, worker.ready_at = process, parent_conn, False, None
+        worker.started_at = worker.last_ping = worker.last_pong = now
+        threading.Thread(
+            target=self._read_worker, args=(worker, process, parent_conn), name=f"inference-supervisor-{worker.index}", daemon=True
+        ).start()
+        logger.info("Started inference worker %s (pid %s).", worker.index, process.pid)
+
+    def _read_worker(self, worker: _WorkerHandle, process, conn) -> None:
+        try:
+            while True:
+                message = conn.recv()
+                self._loop.call_soon_threadsafe(self._on_worker_message, worker, process, message)
+        except (EOFError, OSError):
+            self._loop.call_soon_threadsafe(self._on_worker_exit, worker, process)
+
+    def _on_worker_message(self, worker: _WorkerHandle, process, message: dict) -> None:
+        if worker.process is not process:
+            return # From a worker that has already been replaced
+        kind = message.get("type")
+        if kind == "result":
+            future = worker.in_flight.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result({k: v for k, v in message.items() if k not in ("type", "id")})
+        elif kind == "pong":
+            worker.last_pong = time.monotonic()
+        elif kind == "ready":
+            worker.ready, worker.ready_at = True, time.monotonic()
+            worker.last_pong = worker.ready_at
+            logger.info("Inference worker %s (pid %s) is ready.", worker.index, process.pid)
+        elif kind == "failed":
+            logger.error("Inference worker %s failed to start: %s", worker.index, message.get('error'))
+
+    def _on_worker_exit(self, worker: _WorkerHandle, process) -> None:
+        if worker.process is process:
+            self._fail_worker(worker, f"Inference worker {worker.index} exited.")
+
+    def _fail_worker(self, worker: _WorkerHandle, reason: str, respawn: bool = True) -> None:
+        process = worker.process
+        if process is None:
+            return
+        logger.warning("%s Failing %s in-flight request(s).", reason, len(worker.in_flight))
+        worker.process, worker.ready = None, False
+        if process.is_alive():
+            process.kill()
+        worker.conn.close()
+        for future in worker.in_flight.values():
+            if not future.done():
+                future.set_result({"ok": False, "unavailable": True, "error": reason})
+        worker.in_flight.clear()
+        if respawn:
+            backoff = min(RESTART_BACKOFF_MAX_SECONDS, 2 ** worker.restarts)
+            worker.restarts += 1
+            worker.next_start_at = time.monotonic() + backoff
+            logger.info("Respawning inference worker %s in %.0fs.", worker.index, backoff)
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(MONITOR_INTERVAL_SECONDS)
+            now = time.monotonic()
+            for worker in self.workers:
+                if worker.process is None:
+                    if now >= worker.next_start_at:
+                        self._start_worker(worker)
+                elif not worker.process.is_alive():
+                    self._fail_worker(worker, f"Inference worker {worker.index} died (exit code {worker.process.exitcode}).")
+                elif not worker.ready:
+                    if now - worker.started_at > INFERENCE_WORKER_START_TIMEOUT_SECONDS:
+                        self._fail_worker(worker, f"Inference worker {worker.index} did not become ready in time.")
+                elif now - worker.last_pong > INFERENCE_WORKER_HEARTBEAT_TIMEOUT_SECONDS:
+                    self._fail_worker(worker, f"Inference worker {worker.index} stopped answering heartbeats.")
+                else:
+                    if worker.restarts and now - worker.ready_at > STABLE_AFTER_SECONDS:
+                        worker.restarts = 0
+                    if now - worker.last_ping >= INFERENCE_WORKER_HEARTBEAT_SECONDS:
+                        worker.last_ping = now
+                        self._send(worker, {"type": "ping"})
+
+    def _send(self, worker: _WorkerHandle, message: dict) -> bool:
+        try:
+            worker.conn.send(message)
+            return True
+        except (OSError, ValueError) as e:
+            self._fail_worker(worker, f"Inference worker {worker.index} pipe failed: {e}.")
+            return False
+
+    async def summarize(self, text: str, tier: str) -> dict:
+        ready = [worker for worker in self.workers if worker.ready]
+        if not ready:
+            return {"ok": False, "unavailable": True, "error": "No inference worker is ready."}
+        worker = min(ready, key=lambda w: len(w.in_flight))
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        worker.in_flight[request_id] = future
+        if not self._send(worker, {"type": "summarize", "id": request_id, "text": text, "tier": tier}):
+            return {"ok": False, "unavailable": True, "error": "Inference worker pipe failed."}
+        return await future
+
+    def health(self) -> dict:
+        return {
+            "ready_workers": sum(1 for worker in self.workers if worker.ready),
+            "workers": [
+                {
+                    "index": worker.index,
+                    "pid": worker.process.pid if worker.process is not None else None,
+                    "ready": worker.ready,
+                    "in_flight": len(worker.in_flight),
+                    "restarts": worker.restarts,
+                }
+                for worker in self.workers
+            ],
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request: dict) -> None:
+            op = request.get("op")
+            if op == "summarize":
+                response = await self.summarize(request.get("text", ""), request.get("tier", "balanced"))
+            elif op == "health":
+                response = {"ok": True, "health": self.health()}
+            else:
+                response = {"ok": False, "error": f"Unknown op '{op}'."}
+            try:
+                async with write_lock:
+                    writer.write(json.dumps({"id": request.get("id"), **response}).encode() + b"\n")
+                    await writer.drain()
+            except OSError:
+                pass # Client went away; it has already failed the request on its side
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(respond(json.loads(line)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (OSError, ValueError) as e:
+            logger.warning("Dropping inference client connection: %s", e)
+        finally:
+            writer.close()
+
+async def serve(address: str = INFERENCE_SERVER_ADDRESS, worker_count: int = INFERENCE_SERVER_WORKERS) -> None:
+    supervisor = InferenceSupervisor(worker_count)
+    kind, target = parse_address(address)
+    if kind == "unix":
+        if os.path.exists(target):
+            os.remove(target) # Stale socket from a previous run
+        server = await asyncio.start_unix_server(supervisor.handle_connection, path=target, limit=STREAM_LIMIT_BYTES)
+    else:
+        server = await asyncio.start_server(supervisor.handle_connection, *target, limit=STREAM_LIMIT_BYTES)
+    supervisor.start()
+    logger.info("Inference server listening on %s with %s worker(s).", address, len(supervisor.workers))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        supervisor.stop()
+
+def main() -> None:
+    setup_logging()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_logging()
+
+if __name__ == "__main__":
+    main()
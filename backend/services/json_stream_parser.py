@@ -0,0 +1,69 @@
+# backend/services/json_stream_parser.py
+# Incremental parser for a streamed JSON array of objects (e.g. flashcards): each
+# top-level object is returned as soon as its closing brace arrives, so a response
+# that breaks off or goes wrong near the end still yields everything before it.
+#
+# Only object boundaries are tracked (braces outside strings), which also makes it
+# tolerant of code fences, a missing "[" / "]" or chatter around the array.
+
+import json
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+class JsonObjectStreamParser:
+    def __init__(self):
+        self._buffer: List[str] = [] # Characters of the object being read
+        self._depth = 0 # Brace depth; > 0 while inside a top-level object
+        self._in_string = False
+        self._escaped = False
+        self.objects_parsed = 0
+        self.objects_skipped = 0 # Balanced but not valid JSON
+
+    def feed(self, text: str) -> List[dict]:
+        """Consumes the next piece of the stream; returns the objects it completed."""
+        completed = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue # Outside an object: "[", ",", whitespace, fences, prose
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    parsed = self._parse("".join(self._buffer))
+                    self._buffer = []
+                    if parsed is not None:
+                        completed.append(parsed)
+        return completed
+
+    def _parse(self, object_text: str):
+        try:
+            parsed = json.loads(object_text)
+        except json.JSONDecodeError as e:
+            self.objects_skipped += 1
+            logger.warning("Skipping malformed object in JSON stream (%s): %r", e, object_text[:200])
+            return None
+        self.objects_parsed += 1
+        return parsed
+
+    def close(self) -> int:
+        """Ends the stream; returns the number of characters of an unfinished object that were dropped."""
+        dropped = len(self._buffer) if self._depth else 0
+        self._buffer, self._depth, self._in_string, self._escaped = [], 0, False, False
+        return dropped
@@ -0,0 +1,19 @@
+# backend/services/library_version.py
+# Per-user counter bumped after every change to the user's books or categories. It is
+# the ETag of library reads (see core/http_cache.py), so a poll can be answered with one
+# point read instead of the listing query.
+# Bump only after the change is written: a client that saw the new version must never
+# be sent the old data under it.
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.user_schemas import PyObjectId
+
+LIBRARY_VERSIONS_COLLECTION = "library_versions"
+
+async def get_library_version(db: AsyncIOMotorDatabase, user_id: PyObjectId) -> int:
+    version_doc = await db[LIBRARY_VERSIONS_COLLECTION].find_one({"_id": user_id}, {"version": 1})
+    return version_doc["version"] if version_doc else 0
+
+async def bump_library_version(db: AsyncIOMotorDatabase, user_id: PyObjectId) -> None:
+    await db[LIBRARY_VERSIONS_COLLECTION].update_one({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
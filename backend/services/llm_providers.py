@@ -0,0 +1,448 @@
+# backend/services/llm_providers.py
+# Text generation providers for study notes and flashcards, behind a router that picks
+# one per request from recent latency and error rates.
+#
+# Providers (LLM_PROVIDERS, in order of preference):
+#   gemini - Google Gemini (GOOGLE_API_KEY, GEMINI_MODEL_NAME)
+#   local  - an Ollama-compatible server (LOCAL_LLM_URL, LOCAL_LLM_MODEL)
+#   fake   - canned answers, no network; for tests and benchmarks
+#
+# Routing: providers whose recent p90 latency is within LLM_LATENCY_SLO_MS are tried in
+# preference order, slower ones after them, and ones cooling down (rate limited, or too
+# many recent errors) last. If the chosen provider has not answered by its p90 (at most
+# LLM_HEDGE_AFTER_MS) the request is also sent to the next one and the first answer
+# wins; if it fails, the next one is tried right away.
+# Streamed calls (stream()) are not hedged, and fail over only until the first piece of
+# output has been passed on.
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional
+
+import httpx
+import google.generativeai as genai
+
+from core.config import (
+    LLM_PROVIDERS, LLM_LATENCY_SLO_MS, LLM_HEDGING_ENABLED, LLM_HEDGE_AFTER_MS, LLM_PROVIDER_TIMEOUT_SECONDS,
+    LLM_STATS_WINDOW, LLM_MIN_SAMPLES, LLM_MAX_ERROR_RATE, LLM_COOLDOWN_SECONDS, LOCAL_LLM_URL, LOCAL_LLM_MODEL
+)
+from core.logging_config import truncated
+from core.metrics import (
+    GEMINI_REQUEST_DURATION, GEMINI_ERRORS, LLM_PROVIDER_DURATION, LLM_PROVIDER_REQUESTS,
+    LLM_ROUTER_HEDGES, LLM_ROUTER_FAILOVERS
+)
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest") # Default if not in .env
+
+if GOOGLE_API_KEY:
+    genai.configure(api_key=GOOGLE_API_KEY)
+else:
+    logger.warning("GOOGLE_API_KEY not found in environment. The Gemini provider for Flashcards and Study Notes is disabled.")
+
+class LLMProviderError(Exception):
+    """A provider failed to produce an answer (error, blocked prompt, bad response)."""
+
+class LLMRateLimitedError(LLMProviderError):
+    """The provider is rejecting requests for quota reasons; it is skipped for a while."""
+
+class LLMUnavailableError(Exception):
+    """No configured provider produced an answer."""
+
+# --- Providers ---
+# generate(prompt, params, operation) returns the generated text ("" for an empty but
+# not failed answer). params: {"temperature": float, "max_output_tokens": int}.
+# stream(prompt, params, operation, json_schema=None) yields the text as it is generated;
+# with a json_schema (OpenAPI subset, as Gemini's response_schema) the output is
+# constrained to JSON matching it.
+
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME):
+        self.model = model_name
+
+    def is_configured(self) -> bool:
+        return bool(GOOGLE_API_KEY and self.model)
+
+    async def generate(self, prompt: str, params: dict, operation: str) -> str:
+        gemini_model = genai.GenerativeModel(self.model)
+        generation_config = genai.types.GenerationConfig(**params)
+        call_start = time.perf_counter()
+        try:
+            if hasattr(gemini_model, 'generate_content_async'):
+                response = await gemini_model.generate_content_async(prompt, generation_config=generation_config)
+            else:
+                logger.warning("(%s) generate_content_async not found. Update 'google-generativeai'. This will block.", operation)
+                response = gemini_model.generate_content(prompt, generation_config=generation_config)
+        except Exception as e:
+            GEMINI_ERRORS.labels(operation).inc()
+            if type(e).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(e):
+                raise LLMRateLimitedError(f"Gemini rate limited: {e}") from e
+            raise
+        finally:
+            GEMINI_REQUEST_DURATION.labels(operation).observe(time.perf_counter() - call_start)
+
+        if not response.parts:
+            GEMINI_ERRORS.labels(operation).inc()
+            logger.error("(%s) Gemini API response has no parts. Full response: %s", operation, truncated(response))
+            if response.prompt_feedback and response.prompt_feedback.block_reason:
+                raise LLMProviderError(f"Gemini API call blocked for {operation}: {response.prompt_feedback.block_reason_message}")
+            return ""
+        return response.text
+
+    async def stream(self, prompt: str, params: dict, operation: str, json_schema: Optional[dict] = None) -> AsyncIterator[str]:
+        gemini_model = genai.GenerativeModel(self.model)
+        if json_schema is not None:
+            params = {**params, "response_mime_type": "application/json", "response_schema": json_schema}
+        generation_config = genai.types.GenerationConfig(**params)
+        call_start = time.perf_counter()
+        try:
+            response = await gemini_model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+            async for chunk in response:
+                if chunk.parts:
+                    yield chunk.text
+                elif chunk.prompt_feedback and chunk.prompt_feedback.block_reason:
+                    raise LLMProviderError(f"Gemini API call blocked for {operation}: {chunk.prompt_feedback.block_reason_message}")
+        except LLMProviderError:
+            GEMINI_ERRORS.labels(operation).inc()
+            raise
+        except Exception as e:
+            GEMINI_ERRORS.labels(operation).inc()
+            if type(e).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(e):
+                raise LLMRateLimitedError(f"Gemini rate limited: {e}") from e
+            raise
+        finally:
+            GEMINI_REQUEST_DURATION.labels(operation).observe(time.perf_counter() - call_start)
+
+class LocalProvider:
+    """A model served locally by Ollama (or anything speaking its /api/generate)."""
+    name = "local"
+
+    def __init__(self, base_url: str = LOCAL_LLM_URL, model_name: str = LOCAL_LLM_MODEL):
+        self.base_url = base_url.rstrip("/")
+        self.model = model_name
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def is_configured(self) -> bool:
+        return bool(self.base_url and self.model)
+
+    def _request_body(self, prompt: str, params: dict, stream: bool, json_schema: Optional[dict] = None) -> dict:
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=LLM_PROVIDER_TIMEOUT_SECONDS)
+        options = {"temperature": params.get("temperature"), "num_predict": params.get("max_output_tokens")}
+        body = {
+            "model": self.model, "prompt": prompt, "stream": stream,
+            "options": {k: v for k, v in options.items() if v is not None},
+        }
+        if json_schema is not None:
+            body["format"] = json_schema # Structured outputs (Ollama 0.5+)
+        return body
+
+    @staticmethod
+    def _check_status(status_code: int, body_text: str) -> None:
+        if status_code == 429:
+            raise LLMRateLimitedError("Local LLM is overloaded (429).")
+        if status_code != 200:
+            raise LLMProviderError(f"Local LLM returned HTTP {status_code}: {truncated(body_text)}")
+
+    async def generate(self, prompt: str, params: dict, operation: str) -> str:
+        body = self._request_body(prompt, params, stream=False)
+        try:
+            response = await self._client.post("/api/generate", json=body)
+        except httpx.HTTPError as e:
+            raise LLMProviderError(f"Local LLM request failed: {e}") from e
+        self._check_status(response.status_code, response.text)
+        return response.json().get("response", "")
+
+    async def stream(self, prompt: str, params: dict, operation: str, json_schema: Optional[dict] = None) -> AsyncIterator[str]:
+        body = self._request_body(prompt, params, stream=True, json_schema=json_schema)
+        try:
+            async with self._client.stream("POST", "/api/generate", json=body) as response:
+                if response.status_code != 200:
+                    self._check_status(response.status_code, (await response.aread()).decode("utf-8", "replace"))
+                async for line in response.aiter_lines(): # One JSON object per line
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if event.get("error"):
+                        raise LLMProviderError(f"Local LLM error: {event['error']}")
+                    if event.get("response"):
+                        yield event["response"]
+        except httpx.HTTPError as e:
+            raise LLMProviderError(f"Local LLM request failed: {e}") from e
+
+class FakeProvider:
+    """
+    Canned answers after latency_seconds; fails the first fail_times calls. For tests and
+    benchmarks. stream() yields the answer in small pieces spread over latency_seconds and,
+    with fail_after_chars set, breaks off with an error after that many characters.
+    """
+
+    def __init__(self, name: str = "fake", latency_seconds: float = 0.0, fail_times: int = 0, fail_after_chars: Optional[int] = None):
+        self.name = name
+        self.model = "fake"
+        self.latency_seconds = latency_seconds
+        self.fail_times = fail_times
+        self.fail_after_chars = fail_after_chars
+        self.calls = 0
+
+    def is_configured(self) -> bool:
+        return True
+
+    async def generate(self, prompt: str, params: dict, operation: str) -> str:
+        self.calls += 1
+        fail = self.calls <= self.fail_times # Decided before sleeping, so concurrent calls count in order
+        await asyncio.sleep(self.latency_seconds)
+        if fail:
+            raise LLMProviderError(f"{self.name}: simulated failure")
+        return self._answer(prompt)
+
+    async def stream(self, prompt: str, params: dict, operation: str, json_schema: Optional[dict] = None) -> AsyncIterator[str]:
+        self.calls += 1
+        fail = self.calls <= self.fail_times
+        if fail:
+            await asyncio.sleep(self.latency_seconds)
+            raise LLMProviderError(f"{self.name}: simulated failure")
+        answer = self._answer(prompt if json_schema is None else "JSON")
+        pieces = [answer[i:i + 16] for i in range(0, len(answer), 16)]
+        sent = 0
+        for piece in pieces:
+            await asyncio.sleep(self.latency_seconds / len(pieces))
+            if self.fail_after_chars is not None and sent + len(piece) > self.fail_after_chars:
+                yield piece[:self.fail_after_chars - sent]
+                raise LLMProviderError(f"{self.name}: simulated failure mid-stream")
+            sent += len(piece)
+            yield piece
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        if "JSON" in prompt:
+            return json.dumps([{"front": f"Term {i}", "back": f"Definition of term {i}."} for i in range(3)])
+        return "## Topic\n### Detail\n- Point one\n- Point two\n\n## Conclusion\n- Summary"
+
+PROVIDER_FACTORIES = {"gemini": GeminiProvider, "local": LocalProvider, "fake": FakeProvider}
+
+# --- Router ---
+
+class _ProviderStats:
+    """Rolling window of the provider's recent calls."""
+
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window) # Seconds; includes calls cancelled after losing a hedge (a lower bound)
+        self.outcomes = deque(maxlen=window) # True = success
+        self.cooldown_until = 0.0
+
+    def record(self, latency_seconds: float, ok: Optional[bool]) -> None:
+        self.latencies.append(latency_seconds)
+        if ok is not None:
+            self.outcomes.append(ok)
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def p90_seconds(self) -> Optional[float]:
+        if len(self.latencies) < LLM_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+# Providers that answered in the current context, see record_served_by()
+_served_by: ContextVar[Optional[list]] = ContextVar("llm_served_by", default=None)
+
+@contextmanager
+def record_served_by():
+    """Collects the names of the providers that answer LLM calls made inside the block."""
+    served_by = []
+    token = _served_by.set(served_by)
+    try:
+        yield served_by
+    finally:
+        _served_by.reset(token)
+
+class LLMRouter:
+    def __init__(self, providers: list):
+        self.providers = providers
+        self.stats = {provider.name: _ProviderStats(LLM_STATS_WINDOW) for provider in providers}
+
+    @property
+    def preferred(self):
+        """The first configured provider: the one used when all are healthy."""
+        return next((provider for provider in self.providers if provider.is_configured()), None)
+
+    def _rank(self) -> list:
+        slo_seconds = LLM_LATENCY_SLO_MS / 1000
+        within_slo, over_slo, cooling = [], [], []
+        for provider in self.providers:
+            if not provider.is_configured():
+                continue
+            stats = self.stats[provider.name]
+            p90 = stats.p90_seconds()
+            if stats.cooling_down():
+                cooling.append(provider)
+            elif p90 is None or p90 <= slo_seconds:
+                within_slo.append(provider)
+            else:
+                over_slo.append((p90, provider))
+        return within_slo + [provider for _, provider in sorted(over_slo, key=lambda item: item[0])] + cooling
+
+    def _hedge_delay(self, provider) -> float:
+        p90 = self.stats[provider.name].p90_seconds()
+        limit = LLM_HEDGE_AFTER_MS / 1000
+        return min(p90, limit) if p90 is not None else limit
+
+    async def _call(self, provider, prompt: str, params: dict, operation: str) -> str:
+        stats = self.stats[provider.name]
+        call_start = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(provider.generate(prompt, params, operation), LLM_PROVIDER_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            stats.record(time.perf_counter() - call_start, None) # Lost a hedge: still tells us it was slow
+            LLM_PROVIDER_REQUESTS.labels(provider.name, "cancelled").inc()
+            raise
+        except Exception as e:
+            self._record_failure(provider, time.perf_counter() - call_start, e)
+            if isinstance(e, asyncio.TimeoutError):
+                raise LLMProviderError(f"{provider.name} did not answer within {LLM_PROVIDER_TIMEOUT_SECONDS}s.") from e
+            raise
+        self._record_success(provider, time.perf_counter() - call_start, operation)
+        return text
+
+    def _record_success(self, provider, elapsed: float, operation: str) -> None:
+        self.stats[provider.name].record(elapsed, True)
+        LLM_PROVIDER_REQUESTS.labels(provider.name, "success").inc()
+        LLM_PROVIDER_DURATION.labels(provider.name, operation).observe(elapsed)
+        served_by = _served_by.get()
+        if served_by is not None:
+            served_by.append(provider.name)
+
+    def _record_failure(self, provider, elapsed: float, error: Exception) -> None:
+        stats = self.stats[provider.name]
+        stats.record(elapsed, False)
+        LLM_PROVIDER_REQUESTS.labels(provider.name, "timeout" if isinstance(error, asyncio.TimeoutError) else "error").inc()
+        if isinstance(error, LLMRateLimitedError) or (
+            len(stats.outcomes) >= LLM_MIN_SAMPLES and stats.error_rate() > LLM_MAX_ERROR_RATE
+        ):
+            stats.cooldown_until = time.monotonic() + LLM_COOLDOWN_SECONDS
+            logger.warning("LLM provider '%s' cooling down for %.0fs: %s", provider.name, LLM_COOLDOWN_SECONDS, error)
+
+    async def generate(self, prompt: str, params: dict, operation: str) -> str:
+        ranked = self._rank()
+        if not ranked:
+            raise LLMUnavailableError("No LLM provider is configured (set GOOGLE_API_KEY or LOCAL_LLM_URL).")
+
+        remaining = list(ranked)
+        pending = {} # task -> provider
+        errors = []
+
+        def launch():
+            provider = remaining.pop(0)
+            pending[asyncio.ensure_future(self._call(provider, prompt, params, operation))] = provider
+            return provider
+
+        first = launch()
+        logger.info("(%s) Calling LLM provider '%s' (%s).", operation, first.name, first.model)
+        try:
+            while pending:
+                hedge_delay = self._hedge_delay(first) if LLM_HEDGING_ENABLED and remaining else None
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done: # Slower than usual: race the next provider
+                    LLM_ROUTER_HEDGES.labels(operation).inc()
+                    hedge = launch()
+                    logger.info("(%s) '%s' slower than %.1fs; hedging with '%s'.", operation, first.name, hedge_delay, hedge.name)
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        logger.warning("(%s) LLM provider '%s' failed: %s - %s", operation, provider.name, type(e).__name__, e)
+                        errors.append(f"{provider.name}: {e}")
+                if not pending and remaining:
+                    LLM_ROUTER_FAILOVERS.labels(operation).inc()
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise LLMUnavailableError(f"All LLM providers failed: {'; '.join(errors)}")
+
+    async def stream(self, prompt: str, params: dict, operation: str, json_schema: Optional[dict] = None) -> AsyncIterator[str]:
+        """
+        Yields the output of the best ranked provider as it is generated. A provider that
+        fails (or stays silent for LLM_PROVIDER_TIMEOUT_SECONDS) before producing anything
+        is replaced by the next one; after that its error is raised to the caller, who
+        keeps what it has received. Only a stream that completes counts as served.
+        """
+        ranked = self._rank()
+        if not ranked:
+            raise LLMUnavailableError("No LLM provider is configured (set GOOGLE_API_KEY or LOCAL_LLM_URL).")
+        errors = []
+        for attempt, provider in enumerate(ranked):
+            if attempt:
+                LLM_ROUTER_FAILOVERS.labels(operation).inc()
+            logger.info("(%s) Streaming from LLM provider '%s' (%s).", operation, provider.name, provider.model)
+            pieces = provider.stream(prompt, params, operation, json_schema)
+            call_start = time.perf_counter()
+            produced = False
+            try:
+                while True:
+                    try:
+                        piece = await asyncio.wait_for(pieces.__anext__(), LLM_PROVIDER_TIMEOUT_SECONDS)
+                    except StopAsyncIteration:
+                        break
+                    produced = True
+                    yield piece
+            except (asyncio.CancelledError, GeneratorExit):
+                self.stats[provider.name].record(time.perf_counter() - call_start, None) # Caller stopped reading
+                LLM_PROVIDER_REQUESTS.labels(provider.name, "cancelled").inc()
+                raise
+            except Exception as e:
+                self._record_failure(provider, time.perf_counter() - call_start, e)
+                if isinstance(e, asyncio.TimeoutError):
+                    e = LLMProviderError(f"{provider.name} produced no output for {LLM_PROVIDER_TIMEOUT_SECONDS}s.")
+                if produced:
+                    raise e
+                logger.warning("(%s) LLM provider '%s' failed: %s - %s", operation, provider.name, type(e).__name__, e)
+                errors.append(f"{provider.name}: {e}")
+                continue
+            finally:
+                await pieces.aclose()
+            self._record_success(provider, time.perf_counter() - call_start, operation)
+            return
+        raise LLMUnavailableError(f"All LLM providers failed: {'; '.join(errors)}")
+
+    def snapshot(self) -> List[dict]:
+        return [
+            {
+                "name": provider.name,
+                "model": provider.model,
+                "configured": provider.is_configured(),
+                "calls": len(self.stats[provider.name].latencies),
+                "error_rate": round(self.stats[provider.name].error_rate(), 3),
+                "p90_ms": None if self.stats[provider.name].p90_seconds() is None else round(self.stats[provider.name].p90_seconds() * 1000, 1),
+                "cooling_down": self.stats[provider.name].cooling_down(),
+            }
+            for provider in self.providers
+        ]
+
+def _build_providers(names: List[str]) -> list:
+    providers = []
+    for name in names:
+        if name not in PROVIDER_FACTORIES:
+            logger.error("Unknown LLM provider '%s' in LLM_PROVIDERS (known: %s); ignoring it.", name, ', '.join(PROVIDER_FACTORIES))
+            continue
+        providers.append(PROVIDER_FACTORIES[name]())
+    return providers
+
+llm_router = LLMRouter(_build_providers(LLM_PROVIDERS))
@@ -0,0 +1,83 @@
+# backend/services/model_weights.py
+# Shares one copy of the T5 weights between uvicorn worker processes.
+#
+# With SUMMARIZATION_WEIGHTS_MODE=mmap the weights are exported once to a plain torch
+# state-dict file and every worker maps that file read-only (torch.load(mmap=True)) and
+# assigns the mapped tensors straight into a model built on the meta device. The pages
+# live in the OS page cache once and are shared by all workers; they count towards each
+# worker's RSS but not its unique memory (see GET /admin/memory).
+#
+# Export ahead of starting the workers so they don't race to write the file:
+#   python -m services.model_weights --model mohsinnyz/Booksum-Edu --backend eager
+
+import argparse
+import itertools
+import logging
+import os
+import re
+
+import torch
+from transformers import T5Config, T5ForConditionalGeneration
+
+from .summarization_profile import apply_backend
+
+logger = logging.getLogger(__name__)
+
+# Backends whose weights are plain tensors and can therefore be memory-mapped
+MMAP_BACKENDS = ("eager", "bf16")
+
+def shared_weights_path(cache_dir: str, model_name: str, backend: str) -> str:
+    safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", model_name)
+    return os.path.join(cache_dir, f"{safe_name}.{backend}.pt")
+
+def export_shared_weights(model_name: str, backend: str, path: str) -> None:
+    """Writes the model's state dict (converted for the backend) to path, atomically."""
+    logger.info("Exporting %s (%s) weights to %s for memory mapping...", model_name, backend, path)
+    model = T5ForConditionalGeneration.from_pretrained(model_name)
+    model = apply_backend(model, backend, torch.device("cpu"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, path) # Concurrent exporters just overwrite each other with identical files
+    del model
+
+def load_shared_model(model_name: str, backend: str, cache_dir: str):
+    """
+    Returns a CPU model whose weights are memory-mapped from the shared export (created
+    if missing). Raises ValueError for backends that cannot be mapped.
+    """
+    if backend not in MMAP_BACKENDS:
+        raise ValueError(f"Backend '{backend}' cannot be memory-mapped (supported: {', '.join(MMAP_BACKENDS)}).")
+
+    path = shared_weights_path(cache_dir, model_name, backend)
+    if not os.path.exists(path):
+        export_shared_weights(model_name, backend, path)
+
+    config = T5Config.from_pretrained(model_name)
+    with torch.device("meta"): # No memory is allocated for the randomly initialised weights
+        model = T5ForConditionalGeneration(config)
+    state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, strict=True, assign=True)
+    model.tie_weights()
+
+    still_meta = [name for name, tensor in itertools.chain(model.named_parameters(), model.named_buffers()) if tensor.is_meta]
+    if still_meta:
+        raise RuntimeError(f"Shared weights at {path} are missing tensors: {still_meta[:5]}")
+    model.eval()
+    logger.info("Summarization weights memory-mapped from %s.", path)
+    return model
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export T5 weights for SUMMARIZATION_WEIGHTS_MODE=mmap")
+    parser.add_argument("--model", default=os.getenv("SUMMARIZATION_MODEL_NAME", "mohsinnyz/Booksum-Edu"))
+    parser.add_argument("--backend", choices=MMAP_BACKENDS, default="eager")
+    parser.add_argument("--cache-dir", default=None, help="Defaults to SUMMARIZATION_SHARED_WEIGHTS_DIR")
+    args = parser.parse_args()
+
+    from core.config import SUMMARIZATION_SHARED_WEIGHTS_DIR
+    path = shared_weights_path(args.cache_dir or SUMMARIZATION_SHARED_WEIGHTS_DIR, args.model, args.backend)
+    export_shared_weights(args.model, args.backend, path)
+    print(path)
+
+if __name__ == "__main__":
+    main()
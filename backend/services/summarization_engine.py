@@ -0,0 +1,160 @@
+# backend/services/summarization_engine.py
+# The T5 summarization model and its per-tier batching queues. Imported (and the model
+# loaded) by ai_service in the default in-process mode, or by the inference server
+# workers (services/inference_server.py) when API workers run with
+# SUMMARIZATION_INFERENCE_MODE=server and need neither torch nor the model.
+from transformers import T5ForConditionalGeneration, T5Tokenizer # For summarization
+import torch # For summarization
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from core.config import (
+    SUMMARIZATION_MODEL_NAME, SUMMARIZATION_PROFILE_PATH, SUMMARIZATION_WEIGHTS_MODE, SUMMARIZATION_SHARED_WEIGHTS_DIR
+)
+from core.metrics import (
+    SUMMARIZE_INFERENCE_DURATION, SUMMARIZE_INPUT_TOKENS, SUMMARIZE_OUTPUT_TOKENS,
+    SUMMARIZE_BATCH_SIZE, SUMMARIZE_QUEUE_WAIT
+)
+from .summarization_profile import (
+    load_summarization_settings, apply_torch_threads, apply_backend, tier_generation_kwargs, SUMMARIZATION_TIERS
+)
+from .model_weights import load_shared_model, MMAP_BACKENDS
+
+logger = logging.getLogger(__name__)
+
+# --- Summarization Model (existing) ---
+MODEL_NAME_SUMMARIZE = SUMMARIZATION_MODEL_NAME
+summarization_settings = load_summarization_settings(SUMMARIZATION_PROFILE_PATH)
+# How long a tier's queue waits for more requests to batch with the first one
+SUMMARIZATION_BATCH_WAIT_MS = float(os.getenv("SUMMARIZATION_BATCH_WAIT_MS", "10"))
+tokenizer_summarize = None
+model_summarize = None
+device_summarize = None
+summarization_weights_shared = False # True when the weights are memory-mapped (SUMMARIZATION_WEIGHTS_MODE=mmap)
+
+def load_summarization_model():
+    global tokenizer_summarize, model_summarize, device_summarize, summarization_weights_shared
+    try:
+        logger.info("Initializing and loading tokenizer for %s...", MODEL_NAME_SUMMARIZE)
+        tokenizer_summarize = T5Tokenizer.from_pretrained(MODEL_NAME_SUMMARIZE)
+        logger.info("Tokenizer for %s loaded.", MODEL_NAME_SUMMARIZE)
+
+        device_summarize = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        apply_torch_threads(summarization_settings["torch_threads"])
+        backend = summarization_settings["backend"]
+
+        if SUMMARIZATION_WEIGHTS_MODE == "mmap" and device_summarize.type == "cpu" and backend in MMAP_BACKENDS:
+            # One copy of the weights in the page cache, shared by every worker process
+            try:
+                model_summarize = load_shared_model(MODEL_NAME_SUMMARIZE, backend, SUMMARIZATION_SHARED_WEIGHTS_DIR)
+                summarization_weights_shared = True
+                return
+            except Exception as e:
+                logger.error("Could not memory-map shared weights, loading a private copy instead: %s", e)
+        elif SUMMARIZATION_WEIGHTS_MODE == "mmap":
+            logger.warning("Shared (mmap) weights need a CPU device and one of %s; loading a private copy.", MMAP_BACKENDS)
+
+        logger.info("Initializing and loading model %s...", MODEL_NAME_SUMMARIZE)
+        model_summarize = T5ForConditionalGeneration.from_pretrained(MODEL_NAME_SUMMARIZE)
+        logger.info("Model %s loaded.", MODEL_NAME_SUMMARIZE)
+
+        model_summarize = apply_backend(model_summarize, backend, device_summarize)
+        model_summarize.to(device_summarize)
+        logger.info("Summarization model moved to %s (backend: %s).", device_summarize, backend)
+
+    except Exception as e:
+        logger.error("Failed to load summarization model or tokenizer '%s': %s", MODEL_NAME_SUMMARIZE, e)
+        tokenizer_summarize = None
+        model_summarize = None
+
+if model_summarize is None: 
+    load_summarization_model()
+
+def _summarize_batch(texts: List[str], tier: str) -> List[str]:
+    """Runs one generate() call for a batch of texts. Blocking; runs on the tier's inference thread."""
+    inference_start = time.perf_counter()
+    inputs = tokenizer_summarize( # Use specific summarization tokenizer
+        ["summarize: " + text for text in texts],
+        return_tensors='pt',
+        max_length=summarization_settings["max_input_tokens"],
+        truncation=True,
+        padding=summarization_settings["padding"]
+    ).to(device_summarize) # Use specific summarization device
+
+    with torch.inference_mode():
+        summary_ids = model_summarize.generate( # Use specific summarization model
+            **inputs,
+            **tier_generation_kwargs(summarization_settings, tier)
+        )
+    summaries = tokenizer_summarize.batch_decode(summary_ids, skip_special_tokens=True)
+
+    SUMMARIZE_INFERENCE_DURATION.labels(tier).observe(time.perf_counter() - inference_start)
+    SUMMARIZE_BATCH_SIZE.labels(tier).observe(len(texts))
+    for input_tokens in inputs["attention_mask"].sum(dim=1).tolist(): # Padding excluded
+        SUMMARIZE_INPUT_TOKENS.observe(input_tokens)
+    for output_tokens in summary_ids.ne(tokenizer_summarize.pad_token_id).sum(dim=1).tolist():
+        SUMMARIZE_OUTPUT_TOKENS.observe(output_tokens)
+    return summaries
+
+class _SummarizationBatcher:
+    """
+    Queue for one generation tier. Requests arriving within SUMMARIZATION_BATCH_WAIT_MS of
+    each other share a generate() call (up to max_batch_size). Each tier has its own queue
+    and inference thread, so a fast greedy request never waits behind a beam-search batch.
+    """
+    def __init__(self, tier: str):
+        self.tier = tier
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"summarize-{tier}")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop = None
+
+    async def submit(self, text: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((text, future, time.perf_counter()))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        max_batch_size = max(1, int(summarization_settings["max_batch_size"]))
+        while True:
+            batch = [await self._queue.get()]
+            if max_batch_size > 1 and SUMMARIZATION_BATCH_WAIT_MS > 0:
+                await asyncio.sleep(SUMMARIZATION_BATCH_WAIT_MS / 1000) # Let concurrent requests join
+            while len(batch) < max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            batch = [item for item in batch if not item[1].done()] # Drop requests whose client went away
+            if not batch:
+                continue
+            dispatched_at = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                SUMMARIZE_QUEUE_WAIT.labels(self.tier).observe(dispatched_at - enqueued_at)
+            try:
+                summaries = await loop.run_in_executor(self._executor, _summarize_batch, [text for text, _, _ in batch], self.tier)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), summary in zip(batch, summaries):
+                if not future.done():
+                    future.set_result(summary)
+
+_summarization_batchers = {tier: _SummarizationBatcher(tier) for tier in SUMMARIZATION_TIERS}
+
+def is_model_loaded() -> bool:
+    return model_summarize is not None and tokenizer_summarize is not None
+
+async def summarize(text: str, tier: str) -> str:
+    """Queues text on its tier's batcher and waits for the summary."""
+    return await _summarization_batchers[tier].submit(text)
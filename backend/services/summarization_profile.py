@@ -0,0 +1,98 @@
+# backend/services/summarization_profile.py
+# Runtime settings for the T5 summarizer. The defaults reproduce the original hard-coded
+# generate() call; a profile JSON written by benchmarks/bench_summarization.py
+# (SUMMARIZATION_PROFILE_PATH) overrides them at startup.
+
+import json
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUMMARIZATION_SETTINGS = {
+    "max_input_tokens": 512,
+    "padding": "max_length", # "max_length" pads every input to max_input_tokens; "longest" pads to the longest in the batch
+    "num_beams": 4,
+    "max_length": 150,
+    "min_length": 30,
+    "length_penalty": 2.0,
+    "torch_threads": None, # None keeps torch's default (one per core)
+    "backend": "eager", # "eager", "int8" (dynamic quantization of Linear layers, CPU only) or "bf16"
+    "max_batch_size": 1,
+}
+BACKENDS = ("eager", "int8", "bf16")
+PADDING_STRATEGIES = ("max_length", "longest")
+
+def load_summarization_settings(profile_path: Optional[str]) -> dict:
+    """Defaults, overridden by the "settings" of the profile at profile_path if one is given."""
+    settings = dict(DEFAULT_SUMMARIZATION_SETTINGS)
+    if not profile_path:
+        return settings
+    try:
+        with open(profile_path, encoding="utf-8") as profile_f:
+            profile = json.load(profile_f)
+    except (OSError, ValueError) as e:
+        logger.error("Could not read summarization profile '%s', using defaults: %s", profile_path, e)
+        return settings
+
+    overrides = profile.get("settings", {})
+    unknown = set(overrides) - set(DEFAULT_SUMMARIZATION_SETTINGS)
+    if unknown:
+        logger.warning("Ignoring unknown summarization profile settings: %s", sorted(unknown))
+    settings.update({k: v for k, v in overrides.items() if k in DEFAULT_SUMMARIZATION_SETTINGS})
+    if settings["backend"] not in BACKENDS or settings["padding"] not in PADDING_STRATEGIES:
+        logger.error("Invalid backend/padding in summarization profile '%s', using defaults.", profile_path)
+        return dict(DEFAULT_SUMMARIZATION_SETTINGS)
+    logger.info("Loaded summarization profile '%s': %s", profile_path, settings)
+    return settings
+
+# torch is imported inside the functions below: API workers in inference-server mode
+# import this module for the tier names only and must not pull in torch.
+def apply_torch_threads(torch_threads: Optional[int]) -> None:
+    import torch
+    if torch_threads:
+        torch.set_num_threads(int(torch_threads))
+
+def apply_backend(model, backend: str, device):
+    """Returns the model converted for the given backend (the input model may be modified)."""
+    import torch
+    if backend == "int8":
+        if device.type != "cpu":
+            logger.warning("int8 dynamic quantization only runs on CPU; keeping the eager model.")
+            return model
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "bf16":
+        return model.to(torch.bfloat16)
+    return model
+
+# Named generation profiles (latency tiers). "balanced" is the profile-tuned default above;
+# "fast" is greedy with a short output for previews, "thorough" searches wider for longer output.
+SUMMARIZATION_TIERS = {
+    "fast": {"num_beams": 1, "max_length": 60, "min_length": 10, "length_penalty": 1.0},
+    "balanced": {},
+    "thorough": {"num_beams": 6, "max_length": 300, "min_length": 60, "length_penalty": 2.0, "no_repeat_ngram_size": 3},
+}
+DEFAULT_SUMMARIZATION_TIER = "balanced"
+
+def generation_kwargs(settings: dict, **overrides) -> dict:
+    kwargs = {
+        "num_beams": settings["num_beams"],
+        "max_length": settings["max_length"],
+        "min_length": settings["min_length"],
+        "length_penalty": settings["length_penalty"],
+    }
+    kwargs.update(overrides)
+    kwargs.setdefault("early_stopping", kwargs["num_beams"] > 1) # Only meaningful for beam search
+    return kwargs
+
+def tier_generation_kwargs(settings: dict, tier: str) -> dict:
+    return generation_kwargs(settings, **SUMMARIZATION_TIERS[tier])
+
+def tier_output_settings(settings: dict, tier: str) -> dict:
+    """Everything in the settings that changes a tier's summaries (not just how fast they come)."""
+    return {
+        "generation": tier_generation_kwargs(settings, tier),
+        "max_input_tokens": settings["max_input_tokens"],
+        "padding": settings["padding"],
+        "backend": settings["backend"],
+    }
@@ -0,0 +1,76 @@
+# backend/services/text_chunking.py
+# Splits long selections into chunks for the map-reduce study notes / flashcards path in
+# ai_service. Chunks end on section boundaries (headings) where possible, then on
+# paragraph and finally sentence boundaries, so no chunk starts mid-thought.
+
+import re
+from typing import List
+
+# Lines that look like section headings in extracted PDF text or markdown:
+# "# Title", "Chapter 3", "2.1 Cell Structure", "SECTION TITLE IN CAPS"
+_HEADING_RE = re.compile(
+    r"^(#{1,6}\s+\S.*"
+    r"|(?i:chapter|section|part|unit|lesson)\s+[\dIVXLC]+\b.*"
+    r"|\d+(\.\d+)*\.?\s+[A-Z].{0,80}"
+    r"|[A-Z][A-Z0-9 ,:&'-]{3,80})$"
+)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+def _is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > 100 or len(line.split()) > 12 or line.endswith((".", ",", ";")):
+        return False # Headings are short and don't end like sentences
+    return bool(_HEADING_RE.match(line))
+
+def split_sections(text: str) -> List[str]:
+    """Splits text before every heading line; text before the first heading is its own section."""
+    sections, current = [], []
+    for line in text.splitlines():
+        if _is_heading(line) and any(l.strip() for l in current):
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        sections.append("\n".join(current).strip())
+    return sections
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    """Paragraphs, then sentences, then hard cuts for a section longer than max_chars."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", section):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END_RE.split(paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            pieces.append(sentence)
+    return _pack([piece for piece in pieces if piece], max_chars, separator=" ")
+
+def _pack(pieces: List[str], max_chars: int, separator: str) -> List[str]:
+    """Greedily joins consecutive pieces into chunks of at most max_chars."""
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """
+    Chunks of at most max_chars, in order. Whole sections are packed together; a section
+    is only broken up (at paragraphs, then sentences) when it alone exceeds max_chars.
+    """
+    pieces = []
+    for section in split_sections(text):
+        if len(section) <= max_chars:
+            pieces.append(section)
+        else:
+            pieces.extend(_split_oversized(section, max_chars))
+    return _pack(pieces, max_chars, separator="\n\n")
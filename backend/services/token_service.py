@@ -0,0 +1,86 @@
+# backend/services/token_service.py
+import logging
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import HTTPException, status
+from authlib.jose import JoseError
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from models.user_schemas import UserInDB, Token, PyObjectId
+from core.security import (
+    create_access_token, create_refresh_token, decode_token, REFRESH_TOKEN_TYPE
+)
+from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from core.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+USERS_COLLECTION = "users"
+# One document per live refresh token: {_id: jti, user_id, expires_at, created_at}.
+# Rotation deletes the presented token's record and inserts the next one.
+REFRESH_TOKENS_COLLECTION = "refresh_tokens"
+
+async def _issue_token_pair(db: AsyncIOMotorDatabase, user_id: ObjectId, email: str, token_version: int) -> Token:
+    access_token = create_access_token(data={"sub": str(user_id), "email": email, "ver": token_version})
+    refresh_token, jti, expires_at = create_refresh_token(str(user_id), email, token_version)
+    await db[REFRESH_TOKENS_COLLECTION].insert_one({
+        "_id": jti,
+        "user_id": user_id,
+        "expires_at": expires_at,
+        "created_at": datetime.now(timezone.utc)
+    })
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=refresh_token,
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+
+async def issue_tokens_for_user(db: AsyncIOMotorDatabase, user: UserInDB) -> Token:
+    """Access + refresh token pair after a successful password login."""
+    return await _issue_token_pair(db, user.id, user.email, user.token_version)
+
+async def rotate_refresh_token(db: AsyncIOMotorDatabase, refresh_token: str) -> Token:
+    """
+    Exchanges a refresh token for a new access + refresh pair without a password check.
+    Each refresh token works once: its record is consumed atomically. Presenting an
+    already-consumed (but validly signed and unexpired) token signals theft, so all of
+    the user's tokens are revoked.
+    """
+    invalid_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        claims = decode_token(refresh_token, REFRESH_TOKEN_TYPE)
+    except (JoseError, ValueError):
+        raise invalid_exception
+
+    user_id = ObjectId(claims["sub"])
+    consumed = await db[REFRESH_TOKENS_COLLECTION].find_one_and_delete({"_id": claims.get("jti"), "user_id": user_id})
+    if not consumed:
+        logger.warning("Refresh token reuse or revoked token for user %s; revoking all tokens.", user_id)
+        await revoke_user_tokens(db, user_id)
+        raise invalid_exception
+
+    # Revocation deletes every refresh record of the user, so an existing record normally
+    # implies claims["ver"] is current; the user is re-read anyway for the current email
+    # and version (and in case the user was deleted).
+    user_doc = await db[USERS_COLLECTION].find_one({"_id": user_id}, {"email": 1, "token_version": 1})
+    if not user_doc or user_doc.get("token_version", 0) != claims["ver"]:
+        raise invalid_exception
+    return await _issue_token_pair(db, user_id, user_doc["email"], claims["ver"])
+
+async def revoke_user_tokens(db: AsyncIOMotorDatabase, user_id: PyObjectId) -> None:
+    """Invalidates every access and refresh token issued to the user so far."""
+    updated = await db[USERS_COLLECTION].find_one_and_update(
+        {"_id": user_id},
+        {"$inc": {"token_version": 1}},
+        projection={"token_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    await db[REFRESH_TOKENS_COLLECTION].delete_many({"user_id": user_id})
+    if updated:
+        user_cache.revoke(str(user_id), updated["token_version"])
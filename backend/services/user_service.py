@@ -1,12 +1,19 @@
 # backend/services/user_service.py
+import logging
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Optional
 from models.user_schemas import UserCreate, UserInDB, UserPublic, UserUpdate, PyObjectId, UserPasswordChange 
-from core.security import get_password_hash, verify_password
+from core.security import get_password_hash_async, verify_password_async, verify_and_update_password_async
+from core.user_cache import user_cache
 from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 # from pydantic import HttpUrl # Not directly used in this file, but might be in schemas
 
+logger = logging.getLogger(__name__)
+
 USERS_COLLECTION = "users" 
+REFRESH_TOKENS_COLLECTION = "refresh_tokens" # See token_service
 
 async def get_user_by_email(db: AsyncIOMotorDatabase, email: str) -> Optional[UserInDB]:
     user_data = await db[USERS_COLLECTION].find_one({"email": email})
@@ -25,7 +32,7 @@ async def create_user(db: AsyncIOMotorDatabase, user_create: UserCreate) -> User
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     
     user_in_db_data = {
         "firstname": user_create.firstname,
@@ -38,20 +45,29 @@ async def create_user(db: AsyncIOMotorDatabase, user_create: UserCreate) -> User
         "verified": False    
     }
     
-    result = await db[USERS_COLLECTION].insert_one(user_in_db_data)
-    created_user_data = await db[USERS_COLLECTION].find_one({"_id": result.inserted_id})
-    if not created_user_data:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not create user")
-        
-    user_in_db_obj = UserInDB(**created_user_data)
+    try:
+        await db[USERS_COLLECTION].insert_one(user_in_db_data)
+    except DuplicateKeyError: # Concurrent signup with the same email (unique email index)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+
+    # insert_one added the generated _id to user_in_db_data; no need to read the user back
+    user_in_db_obj = UserInDB(**user_in_db_data)
     return UserPublic.from_user_in_db(user_in_db_obj)
 
 async def authenticate_user(db: AsyncIOMotorDatabase, email: str, password: str) -> Optional[UserInDB]:
     user = await get_user_by_email(db, email=email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    is_valid, new_hashed_password = await verify_and_update_password_async(password, user.hashed_password)
+    if not is_valid:
         return None
+    if new_hashed_password: # BCRYPT_ROUNDS changed since this hash was made
+        await db[USERS_COLLECTION].update_one(
+            {"_id": user.id},
+            {"$set": {"hashed_password": new_hashed_password}}
+        )
+        user.hashed_password = new_hashed_password
+        user_cache.invalidate(str(user.id))
     return user
 
 async def update_user_profile(
@@ -67,16 +83,13 @@ async def update_user_profile(
             return UserInDB(**current_user_doc)
         return None
 
-    result = await db[USERS_COLLECTION].update_one(
+    updated_user_doc = await db[USERS_COLLECTION].find_one_and_update(
         {"_id": user_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
-
-    if result.matched_count == 0:
-        return None 
-
-    updated_user_doc = await db[USERS_COLLECTION].find_one({"_id": user_id})
     if updated_user_doc:
+        user_cache.invalidate(str(user_id))
         return UserInDB(**updated_user_doc)
     return None
 
@@ -89,9 +102,11 @@ async def change_user_password(
     """
     Changes the password for a given user.
     The check for new_password matching confirm_new_password is now handled by the UserPasswordChange Pydantic model.
+    Also bumps the user's token_version and drops their refresh tokens, so every
+    existing session (including the caller's) has to log in again.
     """
     # 1. Verify the current password
-    if not verify_password(password_data.current_password, user.hashed_password):
+    if not await verify_password_async(password_data.current_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password."
@@ -104,26 +119,32 @@ async def change_user_password(
     #         detail="New password and confirmation password do not match."
     #     )
     
-    # 3. (Optional but good) Check if the new password is the same as the old one
-    if verify_password(password_data.new_password, user.hashed_password):
+    # 3. (Optional but good) Check if the new password is the same as the old one.
+    # The current password was just verified against the hash, so comparing the
+    # plaintexts is equivalent to a second bcrypt verify, without its cost.
+    if password_data.new_password == password_data.current_password:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="New password cannot be the same as the old password."
         )
 
     # 4. Hash the new password
-    new_hashed_password = get_password_hash(password_data.new_password)
+    new_hashed_password = await get_password_hash_async(password_data.new_password)
 
-    # 5. Update the password in the database
-    result = await db[USERS_COLLECTION].update_one(
+    # 5. Update the password in the database, revoking the tokens issued so far
+    updated = await db[USERS_COLLECTION].find_one_and_update(
         {"_id": user.id}, 
-        {"$set": {"hashed_password": new_hashed_password}}
+        {"$set": {"hashed_password": new_hashed_password}, "$inc": {"token_version": 1}},
+        projection={"token_version": 1},
+        return_document=ReturnDocument.AFTER
     )
 
-    if result.modified_count == 1:
+    if updated:
+        await db[REFRESH_TOKENS_COLLECTION].delete_many({"user_id": user.id})
+        user_cache.revoke(str(user.id), updated["token_version"]) # Also drops the cached copy holding the old hash
         return True
     
-    print(f"WARN: Password change for user {user.id} - update_one reported 0 modifications.")
+    logger.warning("Password change for user %s - user document not found.", user.id)
     raise HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail="Could not update password due to an unexpected issue."